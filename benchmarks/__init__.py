@@ -0,0 +1 @@
+"""Offline benchmarks replaying recorded source responses."""
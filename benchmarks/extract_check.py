@@ -0,0 +1,149 @@
+"""Equivalence and cost check of the targeted HTML extraction (src.core.extract).
+
+Builds page variants from the recorded finviz / tradingeconomics fixtures
+(as recorded, a scaled target table, and a full-size page with many tables
+and markup after the target) and, for each one, checks that the lxml
+extraction returns exactly what ``pd.read_html(...)[2]`` / BeautifulSoup
+returned before, then compares CPU time and peak RSS growth::
+
+    python -m benchmarks.extract_check
+    python -m benchmarks.extract_check --repeat 20 --rows 5000
+
+Exits with status 1 when any variant differs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.run import measure
+from benchmarks.stub_server import load_fixture
+
+RATES_CLASS = "datatable-item datatable-item-last"
+_FIXTURES = {"finviz": "finviz_premarket.html", "rates": "tradingeconomics_rate.html"}
+
+
+def _padding(tables: int, paragraphs: int) -> str:
+    # 目标之后的页面内容：大量表格、脚本和正文，模拟真实页面的体量
+    filler = "\n".join(
+        f'<table class="news"><tr><td>{i}</td><td>Headline {i}</td><td><a href="/n/{i}">more</a></td></tr></table>'
+        for i in range(tables)
+    )
+    text = "\n".join(f"<p>Paragraph {i} " + "lorem ipsum " * 40 + "</p>" for i in range(paragraphs))
+    return f"{filler}\n<script>var data = [{','.join(map(str, range(5000)))}];</script>\n{text}"
+
+
+def _finviz_variants(rows: int) -> dict[str, str]:
+    page = load_fixture(_FIXTURES["finviz"]).decode("utf-8")
+    body_rows = re.findall(r"<tr><td>[A-Z]+</td>.*?</tr>", page)
+    scaled = page.replace("\n".join(body_rows), "\n".join(body_rows[i % len(body_rows)] for i in range(rows)))
+    return {
+        "finviz fixture": page,
+        f"finviz {rows} rows": scaled,
+        "finviz full page": page.replace("</body>", _padding(tables=300, paragraphs=2000) + "</body>"),
+    }
+
+
+def _rates_variants() -> dict[str, str]:
+    page = load_fixture(_FIXTURES["rates"]).decode("utf-8")
+    return {
+        "rates fixture": page,
+        "rates full page": page.replace("</body>", _padding(tables=300, paragraphs=2000) + "</body>"),
+    }
+
+
+def _parsers(kind: str):
+    from bs4 import BeautifulSoup
+
+    from src.core import extract
+
+    if kind == "finviz":
+        return (lambda html: pd.read_html(io.StringIO(html))[2]), (lambda html: extract.nth_table(html, 2))
+    return (
+        lambda html: BeautifulSoup(html, "html.parser").find("span", {"class": RATES_CLASS}).text.strip(),
+        lambda html: extract.element_text(html, "span", RATES_CLASS),
+    )
+
+
+def _variants(rows: int) -> dict[str, tuple[str, str]]:
+    out = {name: ("finviz", html) for name, html in _finviz_variants(rows).items()}
+    out.update({name: ("rates", html) for name, html in _rates_variants().items()})
+    return out
+
+
+def _rss_growth_kb(kind: str, html: str, method: int) -> int | str:
+    """Peak RSS growth of one parse, measured in a fresh interpreter that only holds the page.
+
+    Uses the Linux peak-RSS reset (``/proc/self/clear_refs``); "-" elsewhere.
+    """
+    if not os.path.exists("/proc/self/clear_refs"):
+        return "-"
+    with tempfile.NamedTemporaryFile("w", suffix=".html", encoding="utf-8", delete=False) as fh:
+        fh.write(html)
+    code = (
+        "from benchmarks.extract_check import _parsers, _status_kb\n"
+        "from benchmarks.stub_server import load_fixture\n"
+        f"parse = _parsers({kind!r})[{method}]\n"
+        f"parse(load_fixture({_FIXTURES[kind]!r}).decode('utf-8'))\n"
+        f"html = open({fh.name!r}, encoding='utf-8').read()\n"
+        "open('/proc/self/clear_refs', 'w').write('5')\n"
+        "before = _status_kb('VmRSS')\n"
+        "parse(html)\n"
+        "print(_status_kb('VmHWM') - before)\n"
+    )
+    try:
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    finally:
+        os.unlink(fh.name)
+    return int(out.stdout.strip())
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status", encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _same(old, new) -> bool:
+    if isinstance(old, pd.DataFrame):
+        return isinstance(new, pd.DataFrame) and old.equals(new) and old.dtypes.equals(new.dtypes)
+    return old == new
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per parser")
+    parser.add_argument("--rows", type=int, default=2000, help="rows of the scaled finviz table")
+    parser.add_argument("--no-rss", action="store_true", help="skip the per-parse RSS measurement")
+    args = parser.parse_args(argv)
+
+    header = f"{'variant':<22}{'KB':>8}{'same':>6}{'old ms':>10}{'new ms':>10}{'old RSS KB':>12}{'new RSS KB':>12}"
+    print(header)
+    print("-" * len(header))
+    ok = True
+    for name, (kind, html) in _variants(args.rows).items():
+        old, new = _parsers(kind)
+        same = _same(old(html), new(html))
+        ok = ok and same
+        old_ms = measure("old", lambda: old(html), args.repeat)["mean_ms"]
+        new_ms = measure("new", lambda: new(html), args.repeat)["mean_ms"]
+        rss = ("-", "-") if args.no_rss else (_rss_growth_kb(kind, html, 0), _rss_growth_kb(kind, html, 1))
+        print(f"{name:<22}{len(html.encode('utf-8')) // 1024:>8}{'yes' if same else 'NO':>6}"
+              f"{old_ms:>10.2f}{new_ms:>10.2f}{rss[0]:>12}{rss[1]:>12}")
+    if not ok:
+        print("❌ 定向解析结果与原解析不一致", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
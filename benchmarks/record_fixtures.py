@@ -0,0 +1,58 @@
+"""Re-record the benchmark fixtures from the live sources.
+
+    python -m benchmarks.record_fixtures [--only eastmoney_clist.json ...]
+
+Each fixture in ``stub_server.ROUTES`` is fetched once through the shared
+session with the same query the fetcher sends and written over the file in
+``benchmarks/fixtures``.  The Yahoo bar file is not re-recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from benchmarks.stub_server import FIXTURE_DIR, ROUTES
+
+QUERIES = {
+    "eastmoney_clist.json": {
+        "pn": "1", "pz": "100", "po": "1", "np": "1",
+        "ut": "b2884a393a59ad64002292a3e90d46a5", "fltt": "2", "invt": "2",
+        "fid": "f62", "fs": "m:0+t:6,m:0+t:13,m:0+t:80,m:1+t:2,m:1+t:23",
+        "fields": "f12,f14,f2,f3,f62,f184,f66,f69,f72,f75,f78,f81,f84,f87",
+    },
+    "10jqka_limit_up_pool.json": {"page": 1, "limit": 50},
+    "xueqiu_hot_list.json": {"since_id": "-1", "max_id": "-1", "size": "50"},
+}
+HEADERS = {"weibo_hot_band.json": {"Referer": "https://s.weibo.com/top/summary"}}
+
+
+def main(argv=None) -> None:
+    from src.core.http import get_session
+
+    parser = argparse.ArgumentParser(description="Re-record benchmark fixtures from the live sources.")
+    parser.add_argument("--only", nargs="*", help="fixture file names to record (default: all)")
+    args = parser.parse_args(argv)
+
+    session = get_session()
+    session.get("https://xueqiu.com", timeout=15)
+    recorded = set()
+    for (host, path), name in ROUTES.items():
+        if name in recorded or (args.only and name not in args.only):
+            continue
+        params = dict(QUERIES.get(name, {}), _=int(time.time() * 1000)) if name in QUERIES else None
+        try:
+            resp = session.get(f"https://{host}{path}", params=params, headers=HEADERS.get(name), timeout=15)
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"⚠️ {name} 录制失败: {e}")
+            continue
+        with open(os.path.join(FIXTURE_DIR, name), "wb") as fh:
+            fh.write(resp.content)
+        recorded.add(name)
+        print(f"✅ {name} ({len(resp.content)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Offline benchmark harness for the collection and report pipeline.
+
+Replays the fixtures in ``benchmarks/fixtures`` from a local stub server and
+times each stage over repeated runs::
+
+    python -m benchmarks.run                      # fixture-sized payloads
+    python -m benchmarks.run --scale 5000         # synthetic 5000-row sources
+    python -m benchmarks.run --tickers 800 --json bench.json
+    python -m benchmarks.run --workers 4          # also the multi-process queue engine
+
+Reported per benchmark: mean and p50/p90/p99 latency in milliseconds, runs
+per second and, where rows are known, rows per second.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+import config
+from benchmarks.stub_server import StubServer, async_transport, download_bars_from_stub, install
+
+
+def measure(name: str, func: Callable[[], object], repeat: int, rows: int | None = None, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    arr = np.array(samples)
+    result = {
+        "name": name,
+        "runs": repeat,
+        "mean_ms": arr.mean() * 1000,
+        "p50_ms": np.percentile(arr, 50) * 1000,
+        "p90_ms": np.percentile(arr, 90) * 1000,
+        "p99_ms": np.percentile(arr, 99) * 1000,
+        "runs_per_s": 1 / arr.mean() if arr.mean() else float("inf"),
+    }
+    if rows:
+        result["rows"] = rows
+        result["rows_per_s"] = rows / arr.mean() if arr.mean() else float("inf")
+    return result
+
+
+def _print_table(results: list[dict]) -> None:
+    header = f"{'benchmark':<28}{'mean ms':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'runs/s':>10}{'rows/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rows_per_s = f"{r['rows_per_s']:>12.0f}" if "rows_per_s" in r else f"{'-':>12}"
+        print(f"{r['name']:<28}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['runs_per_s']:>10.1f}{rows_per_s}")
+
+
+def _isolate_state(root: str) -> None:
+    # 基准测试不读写真实的缓存/历史库/主机健康状态，也不复用上次的解析结果
+    config.STATE_DIR = root
+    config.CACHE_DIR = os.path.join(root, "cache")
+    config.HISTORY_DIR = os.path.join(root, "history")
+    config.CACHE_ENABLED = False
+    config.HISTORY_ENABLED = False
+    config.CONDITIONAL_ENABLED = False
+    config.QUEUE_PATH = os.path.join(root, "queue", "jobs.sqlite3")
+
+
+def _stub_worker(base_url: str, state_dir: str) -> None:
+    # 任务队列的工作进程由 spawn 启动，不继承上面的修改：同样隔离状态并把请求转到桩服务
+    from src.core.http import get_session
+    from src.data import quotes
+
+    _isolate_state(state_dir)
+    install(get_session(), base_url)
+    quotes.download_batch = download_bars_from_stub()
+
+
+def _synthetic_closes(tickers: int, days: int) -> tuple[pd.DataFrame, dict[str, str]]:
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(end="2026-09-30", periods=days)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(days, tickers)), axis=0))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    codes = [f"SYN{i:04d}" for i in range(tickers)]
+    return pd.DataFrame(values, index=index, columns=codes), {f"合成{i}": code for i, code in enumerate(codes)}
+
+
+def _synthetic_posts(keywords: int, posts: int) -> tuple[list[str], list[str]]:
+    # 关键词与帖子都由同一批汉字随机拼成，命中率与真实的股票简称表相近
+    rng = np.random.default_rng(2)
+    chars = [chr(c) for c in range(0x4E00, 0x4E00 + 400)]
+    words = ["".join(rng.choice(chars, size=int(n))) for n in rng.integers(2, 5, size=keywords)]
+    texts = ["".join(rng.choice(chars, size=200)) for _ in range(posts)]
+    return words, texts
+
+
+def _write_exports(export_dir: str, files: int, rows: int) -> int:
+    rng = np.random.default_rng(1)
+    for i in range(files):
+        cols = {"代码": [f"{j:06d}" for j in range(rows)], "收盘": rng.random(rows) * 100}
+        cols[f"指标{i % 3}"] = rng.normal(size=rows)
+        pd.DataFrame(cols).to_csv(os.path.join(export_dir, f"导出{i:03d}.csv"), index=False)
+    return files * rows
+
+
+def run_benchmarks(repeat: int, scale: int, latency: float, tickers: int, export_rows: int,
+                   workers: int = 0) -> list[dict]:
+    from src.core.http import get_session
+    from src.data import fetcher, quotes
+    from src.data.quotes import normalize_quotes
+    from src.execution.notion import build_report_blocks
+    from src.execution.telegram import build_telegram_messages
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="stock1_bench_") as tmp, StubServer(scale=scale, latency=latency) as server:
+        state_dir = os.path.join(tmp, "state")
+        _isolate_state(state_dir)
+        install(get_session(), server)
+        quotes.download_batch = download_bars_from_stub(server)
+
+        registry_holder = {}
+
+        def collect():
+            registry_holder["registry"] = fetcher.run_all_data_collection(use_cache=False, engine="threads")
+
+        collect()
+        registry = registry_holder["registry"]
+        collected_rows = sum(len(df) for _, df in registry.items())
+        results.append(measure("run_all_data_collection", collect, repeat, rows=collected_rows, warmup=0))
+        print(f"stub requests served: {server.requests}", file=sys.stderr)
+
+        from src.core import aio
+
+        if aio.available():
+            aio.AsyncHTTP.transport = async_transport(server)
+            results.append(measure(
+                "run_all_data_collection async",
+                lambda: fetcher.run_all_data_collection(use_cache=False, engine="async"),
+                repeat, rows=collected_rows,
+            ))
+
+        if workers:
+            from src.data.jobs import collect_with_workers
+
+            # 含工作进程的启动（spawn 后重新导入 pandas 等）
+            initializer = functools.partial(_stub_worker, server.base_url, state_dir)
+            results.append(measure(
+                f"collect_with_workers x{workers}",
+                lambda: collect_with_workers(workers=workers, use_cache=False, initializer=initializer),
+                repeat, rows=collected_rows,
+            ))
+
+        report_md = fetcher.build_report_markdown(registry)
+        results.append(measure("report assembly", lambda: fetcher.build_report_markdown(registry), repeat,
+                               rows=collected_rows))
+        results.append(measure("merge_results_to_excel",
+                               lambda: fetcher.merge_results_to_excel(registry, os.path.join(tmp, "overview.xlsx")),
+                               repeat, rows=collected_rows))
+        results.append(measure("merge_results_to_one",
+                               lambda: fetcher.merge_results_to_one(registry, os.path.join(tmp, "merged.csv")),
+                               repeat, rows=collected_rows))
+
+        export_dir = os.path.join(tmp, "exports")
+        os.makedirs(export_dir)
+        export_total = _write_exports(export_dir, files=20, rows=export_rows)
+        results.append(measure("merge_csvs_to_one", lambda: fetcher.merge_csvs_to_one(export_dir), repeat,
+                               rows=export_total))
+        results.append(measure("merge_csvs_to_one streaming",
+                               lambda: fetcher.merge_csvs_to_one(export_dir, chunksize=50_000), repeat,
+                               rows=export_total))
+
+        universe = [f"SYN{i:04d}" for i in range(tickers)]
+        results.append(measure(f"download_bars x{tickers}", lambda: quotes.download_bars(universe), repeat,
+                               rows=tickers))
+
+        closes, group = _synthetic_closes(tickers, days=260)
+        results.append(measure(f"normalize_quotes x{tickers}", lambda: normalize_quotes(closes, group), repeat,
+                               rows=tickers))
+
+        from src.data.indicators import indicator_table, top_correlations
+
+        # 约十年日K线的 日期 x 代码 面板
+        long_closes, long_group = _synthetic_closes(tickers, days=2520)
+        names = {code: name for name, code in long_group.items()}
+        long_panel = {"close": long_closes, "high": long_closes * 1.01, "low": long_closes * 0.99}
+        results.append(measure(f"indicator_table {tickers}x2520", lambda: indicator_table(long_panel, names),
+                               repeat, rows=tickers))
+        results.append(measure(f"top_correlations {tickers}x2520", lambda: top_correlations(long_panel, names),
+                               repeat, rows=tickers))
+
+        from src.data.keywords import KeywordAutomaton
+
+        words, texts = _synthetic_posts(keywords=3000, posts=2000)
+        automaton = KeywordAutomaton(words)
+        results.append(measure("keyword automaton build x3000", lambda: KeywordAutomaton(words), repeat))
+        results.append(measure("keyword count 3000x2000 posts", lambda: automaton.count_documents(texts), repeat,
+                               rows=len(texts)))
+
+        results.append(measure("telegram messages", lambda: build_telegram_messages(report_md), repeat))
+        results.append(measure("notion blocks", lambda: build_report_blocks(report_md), repeat))
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--scale", type=int, default=0, help="rows per list source (0 = fixture size)")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated per-response latency in seconds")
+    parser.add_argument("--tickers", type=int, default=500, help="tickers in the synthetic normalization frame")
+    parser.add_argument("--export-rows", type=int, default=5000, help="rows per synthetic export CSV (20 files)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="also time the job queue engine with this many worker processes (0 = skip)")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    import contextlib
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_benchmarks(args.repeat, args.scale, args.latency, args.tickers, args.export_rows, args.workers)
+    _print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Local stub server replaying recorded source responses for benchmarks.
+
+Every scraper URL is rewritten by ``StubAdapter`` to
+``http://127.0.0.1:<port>/<original host><original path>`` and answered from
+the files in ``benchmarks/fixtures``.  ``scale`` replicates list payloads
+(fund-flow rows, limit-up pool, hot lists, finviz table rows) to the
+requested number of rows so pipelines can be timed at synthetic sizes.
+Yahoo is not reached through requests (yfinance has its own client), so
+``async_transport`` does the same for the async engine's httpx client.
+``download_bars_from_stub`` stands in for ``src.data.quotes.download_batch``
+(one chunk of the chunked ``download_bars``) and fetches bars from the same
+server.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pandas as pd
+from requests.adapters import HTTPAdapter
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# (host, path) -> fixture file
+ROUTES = {
+    ("tradingeconomics.com", "/united-states/interest-rate"): "tradingeconomics_rate.html",
+    ("finviz.com", "/premarket.ashx"): "finviz_premarket.html",
+    ("data.10jqka.com.cn", "/dataapi/limit_up/limit_up_pool"): "10jqka_limit_up_pool.json",
+    ("push2.eastmoney.com", "/api/qt/clist/get"): "eastmoney_clist.json",
+    ("push2delay.eastmoney.com", "/api/qt/clist/get"): "eastmoney_clist.json",
+    ("weibo.com", "/ajax/statuses/hot_band"): "weibo_hot_band.json",
+    ("xueqiu.com", "/statuses/hot/listV2.json"): "xueqiu_hot_list.json",
+}
+_PERIOD_BARS = {"d": 1, "wk": 5, "mo": 21, "y": 252}
+
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as fh:
+        return fh.read()
+
+
+def _replicate(items: list, rows: int, key: str | None = None) -> list:
+    """Cycle ``items`` up to ``rows`` entries, giving copies a unique ``key``."""
+    if not items or rows <= len(items):
+        return items[:rows] if rows else items
+    out = []
+    for i in range(rows):
+        item = copy.deepcopy(items[i % len(items)])
+        if key and i >= len(items) and isinstance(item, dict) and key in item:
+            item[key] = f"{i:06d}"
+        out.append(item)
+    return out
+
+
+def _page(items: list, page: int, size: int) -> list:
+    return items[(page - 1) * size: page * size]
+
+
+def _period_rows(period: str) -> int:
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period or "5d")
+    if not match:
+        return 5
+    return int(match.group(1)) * _PERIOD_BARS[match.group(2)]
+
+
+class StubServer:
+    """Threaded HTTP server answering with (optionally scaled) fixtures."""
+
+    def __init__(self, scale: int = 0, latency: float = 0.0):
+        self.scale = scale
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._bars = pd.read_csv(io.BytesIO(load_fixture("yahoo_daily_bars.csv")), parse_dates=["Date"])
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # ---- responses ----
+    def respond(self, host: str, path: str, query: dict[str, list[str]]) -> tuple[int, str, bytes]:
+        with self._lock:
+            self.requests += 1
+        if host == "yahoo" and path == "/bars":
+            return 200, "text/csv", self._yahoo_bars(query)
+        if host == "xueqiu.com" and path in ("", "/"):
+            return 200, "text/html; charset=utf-8", b"<html><body>xueqiu</body></html>"
+        name = ROUTES.get((host, path))
+        if name is None:
+            return 404, "text/plain", b"no fixture"
+        body = load_fixture(name)
+        if name.endswith(".json"):
+            return 200, "application/json; charset=utf-8", self._scaled_json(name, json.loads(body), query)
+        if name == "finviz_premarket.html" and self.scale:
+            return 200, "text/html; charset=utf-8", self._scaled_finviz(body.decode("utf-8"))
+        return 200, "text/html; charset=utf-8", body
+
+    def _scaled_json(self, name: str, data: dict, query: dict[str, list[str]]) -> bytes:
+        arg = lambda key, default: int(query.get(key, [default])[0])  # noqa: E731
+        if name == "eastmoney_clist.json":
+            rows = self.scale or len(data["data"]["diff"])
+            diff = _replicate(data["data"]["diff"], rows, key="f12")
+            data["data"]["total"] = len(diff)
+            data["data"]["diff"] = _page(diff, arg("pn", 1), arg("pz", 100))
+        elif name == "10jqka_limit_up_pool.json":
+            rows = self.scale or len(data["data"]["info"])
+            info = _replicate(data["data"]["info"], rows, key="code")
+            page, limit = arg("page", 1), arg("limit", 50)
+            data["data"]["page"].update({"total": len(info), "limit": limit, "page": page,
+                                         "count": -(-len(info) // limit)})
+            data["data"]["info"] = _page(info, page, limit)
+        elif name == "weibo_hot_band.json" and self.scale:
+            data["data"]["band_list"] = _replicate(data["data"]["band_list"], self.scale)
+        elif name == "xueqiu_hot_list.json":
+            # next_max_id 在桩服务里就是下一页的偏移量，-1 表示没有更多
+            size, max_id = arg("size", 50), arg("max_id", -1)
+            posts = _replicate(data["items"], self.scale or size, key="id")
+            offset = max(0, max_id)
+            data["items"] = posts[offset: offset + size]
+            data["next_max_id"] = offset + size if offset + size < len(posts) else -1
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    def _scaled_finviz(self, html: str) -> bytes:
+        rows = re.findall(r"<tr><td>[A-Z]+</td>.*?</tr>", html)
+        scaled = "\n".join(rows[i % len(rows)] for i in range(self.scale))
+        return html.replace("\n".join(rows), scaled).encode("utf-8")
+
+    def _yahoo_bars(self, query: dict[str, list[str]]) -> bytes:
+        codes = [c for c in query.get("codes", [""])[0].split(",") if c]
+        start = query.get("start", [None])[0]
+        bars = self._bars
+        if start:
+            bars = bars[bars["Date"] >= pd.Timestamp(start)]
+        else:
+            bars = bars.tail(_period_rows(query.get("period", ["5d"])[0]))
+        frames = []
+        for code in codes:
+            # 每个代码用固定系数缩放同一条K线，保证可复现
+            factor = 0.5 + int(hashlib.md5(code.encode()).hexdigest()[:6], 16) / 0xFFFFFF * 10
+            df = bars.copy()
+            for col in ("Open", "High", "Low", "Close"):
+                df[col] = df[col] * factor
+            df.insert(0, "Code", code)
+            frames.append(df)
+        out = pd.concat(frames) if frames else pd.DataFrame(columns=["Code", *bars.columns])
+        return out.to_csv(index=False).encode("utf-8")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                parts = urlsplit(self.path)
+                host, _, path = parts.path.lstrip("/").partition("/")
+                if server.latency:
+                    time.sleep(server.latency)
+                status, ctype, body = server.respond(host, "/" + path if path else "/", parse_qs(parts.query))
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET  # noqa: N815
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StubAdapter(HTTPAdapter):
+    """Transport adapter that sends every request to the stub server instead."""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        kwargs["verify"] = True
+        return super().send(request, **kwargs)
+
+
+def install(session, server: StubServer | str) -> None:
+    """Route all of ``session``'s traffic to ``server`` (or its base URL), keeping its pool/retry settings."""
+    current = session.get_adapter("https://")
+    adapter = StubAdapter(
+        server if isinstance(server, str) else server.base_url,
+        pool_connections=getattr(current, "_pool_connections", 10),
+        pool_maxsize=getattr(current, "_pool_maxsize", 10),
+        max_retries=current.max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def async_transport(server: StubServer):
+    """httpx transport for ``src.core.aio.AsyncHTTP`` that sends every request to ``server``."""
+    import httpx
+
+    class StubAsyncTransport(httpx.AsyncHTTPTransport):
+        async def handle_async_request(self, request):
+            url = request.url
+            request.url = httpx.URL(f"{server.base_url}/{url.host}{url.path}", query=url.query)
+            return await super().handle_async_request(request)
+
+    return StubAsyncTransport()
+
+
+def download_bars_from_stub(server: StubServer | str | None = None):
+    """Build a drop-in replacement for ``src.data.quotes.download_batch``.
+
+    Requests go through the shared session, so ``install`` it first.
+    """
+    from src.core.http import get_session
+
+    def download_bars(codes, period=None, start=None):
+        codes = list(dict.fromkeys(codes))
+        if not codes:
+            return {}
+        params = {"codes": ",".join(codes)}
+        params.update({"start": start} if start else {"period": period or "5d"})
+        resp = get_session().get(f"https://yahoo/bars?{urlencode(params)}", timeout=15)
+        resp.raise_for_status()
+        df = pd.read_csv(io.StringIO(resp.text), parse_dates=["Date"])
+        return {code: group.drop(columns="Code").set_index("Date") for code, group in df.groupby("Code", sort=False)}
+
+    return download_bars
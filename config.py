@@ -74,7 +74,48 @@ def _cfg_get(cfg: dict, *keys: str) -> str:
     return str(node) if node is not None else ""
 
 
+def _cfg_section(*keys: str) -> dict[str, str]:
+    """Merge a mapping section of config/default.yaml with config/local.yaml (local wins)."""
+    merged: dict[str, str] = {}
+    for cfg in (_DEFAULT_CFG, _LOCAL_CFG):
+        node = cfg
+        for key in keys:
+            node = node.get(key, {}) if isinstance(node, dict) else {}
+        if isinstance(node, dict):
+            merged.update({k: str(v) for k, v in node.items() if not isinstance(v, dict)})
+    return merged
+
+
+DEFAULT_WATCHLIST_FILE = "config/watchlists.yaml"
+
+
+def _load_watchlists(paths: list[str], builtin: str = DEFAULT_WATCHLIST_FILE) -> dict[str, dict[str, str]]:
+    """Merge the ``watchlists`` groups of ``builtin``, the given files, then config/local.yaml (per group).
+
+    The built-in groups stay defined unless a later source overrides them,
+    so user files only need to list the groups they add or change.
+    """
+    groups: dict[str, dict[str, str]] = {}
+    sources = [builtin, *(path for path in paths if path != builtin)]
+    for cfg in [_parse_simple_yaml(path) for path in sources] + [_LOCAL_CFG]:
+        for group, tickers in (cfg.get("watchlists") or {}).items():
+            if isinstance(tickers, dict):
+                groups[group] = {name: str(code) for name, code in tickers.items() if not isinstance(code, dict)}
+    return groups
+
+
+def _setting(env_key: str, *keys: str, default: str = "") -> str:
+    """Resolve a setting from env, then config/local.yaml, then config/default.yaml."""
+    return (
+        os.getenv(env_key)
+        or _cfg_get(_LOCAL_CFG, *keys)
+        or _cfg_get(_DEFAULT_CFG, *keys)
+        or default
+    )
+
+
 _load_env_file()
+_DEFAULT_CFG = _parse_simple_yaml("config/default.yaml")
 _LOCAL_CFG = _parse_simple_yaml("config/local.yaml")
 
 NOTION_TOKEN = os.getenv("NOTION_TOKEN") or _cfg_get(_LOCAL_CFG, "notion", "token")
@@ -83,3 +124,106 @@ REPORT_TITLE = os.getenv("REPORT_TITLE") or _cfg_get(_LOCAL_CFG, "report", "titl
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN") or _cfg_get(_LOCAL_CFG, "telegram", "bot_token")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID") or _cfg_get(_LOCAL_CFG, "telegram", "chat_id")
+
+# 采集调度：并发线程数、单步超时与整体时限（秒）
+COLLECT_WORKERS = int(_setting("COLLECT_WORKERS", "collection", "workers", default="6"))
+COLLECT_STEP_TIMEOUT = float(_setting("COLLECT_STEP_TIMEOUT", "collection", "step_timeout", default="45"))
+COLLECT_DEADLINE = float(_setting("COLLECT_DEADLINE", "collection", "deadline", default="90"))
+# 采集引擎：threads（线程池）、async（asyncio + httpx，单线程共享一个 HTTP/2 客户端）或 queue（多进程任务队列，见下）
+COLLECT_ENGINE = _setting("COLLECT_ENGINE", "collection", "engine", default="threads").lower()
+# 逗号分隔的步骤名，跳过的步骤不会运行，也不会加载其依赖
+COLLECT_SKIP = [name.strip() for name in _setting("COLLECT_SKIP", "collection", "skip").split(",") if name.strip()]
+
+# 本地状态目录（主机健康度等跨运行状态）与镜像对冲请求延迟（秒）
+STATE_DIR = _setting("STOCK1_STATE_DIR", "paths", "state_dir", default=".stock1_state")
+HTTP_HEDGE_DELAY = float(_setting("HTTP_HEDGE_DELAY", "http", "hedge_delay", default="1.5"))
+# 异步引擎：全局并发请求数与每个主机每秒请求数
+ASYNC_CONCURRENCY = int(_setting("ASYNC_CONCURRENCY", "http", "async_concurrency", default="16"))
+ASYNC_HOST_RATE = float(_setting("ASYNC_HOST_RATE", "http", "host_rate", default="8"))
+
+# 持久化行情缓存
+APP_TIMEZONE = _setting("APP_TIMEZONE", "app", "timezone", default="Asia/Shanghai")
+CACHE_ENABLED = _setting("CACHE_ENABLED", "cache", "enabled", default="true").lower() in {"1", "true", "yes", "on"}
+CACHE_DIR = _setting("CACHE_DIR", "cache", "dir") or os.path.join(STATE_DIR, "cache")
+CACHE_MAX_MB = int(_setting("CACHE_MAX_MB", "cache", "max_mb", default="200"))
+
+# 本地日K线历史库（增量更新）
+HISTORY_ENABLED = _setting("HISTORY_ENABLED", "history", "enabled", default="true").lower() in {"1", "true", "yes", "on"}
+HISTORY_DIR = _setting("HISTORY_DIR", "history", "dir") or os.path.join(STATE_DIR, "history")
+# 历史库首次下载的区间（之后只增量补齐）；技术指标与相关性基于这段多年日K线
+HISTORY_PERIOD = _setting("HISTORY_PERIOD", "history", "period", default="3y")
+INDICATOR_REPORT_TOP = int(_setting("INDICATOR_REPORT_TOP", "indicators", "report_top", default="10"))
+CORRELATION_WINDOW = int(_setting("CORRELATION_WINDOW", "indicators", "correlation_window", default="60"))
+
+# --output-dir 的数据集文件格式：csv、parquet 或 arrow（后两者需要 pyarrow，按声明的列类型存储并压缩）
+OUTPUT_FORMAT = _setting("OUTPUT_FORMAT", "output", "format", default="csv").lower()
+OUTPUT_COMPRESSION = _setting("OUTPUT_COMPRESSION", "output", "compression", default="zstd").lower()
+
+# 任务队列引擎（collection.engine: queue）：采集步骤与行情分片写入 SQLite 队列，由多个工作进程领取执行；
+# 队列文件放在共享目录时，其他主机上的 --worker 进程也能参与。workers 为协调进程自己启动的本机工作进程数
+# （auto 为 CPU 核数，0 表示只依赖外部工作进程）；lease 秒内未完成也未续约的任务可被其他进程重新领取
+QUEUE_PATH = _setting("QUEUE_PATH", "queue", "path") or os.path.join(STATE_DIR, "queue", "jobs.sqlite3")
+_QUEUE_WORKERS = _setting("QUEUE_WORKERS", "queue", "workers", default="auto").lower()
+QUEUE_WORKERS = (os.cpu_count() or 1) if _QUEUE_WORKERS == "auto" else int(_QUEUE_WORKERS)
+QUEUE_SHARD_SIZE = int(_setting("QUEUE_SHARD_SIZE", "queue", "shard_size", default="100"))
+QUEUE_LEASE = float(_setting("QUEUE_LEASE", "queue", "lease", default="60"))
+QUEUE_MAX_ATTEMPTS = int(_setting("QUEUE_MAX_ATTEMPTS", "queue", "max_attempts", default="2"))
+QUEUE_POLL = float(_setting("QUEUE_POLL", "queue", "poll", default="0.2"))
+
+# 条件请求：按 URL 记录 ETag/Last-Modified 与内容哈希，内容未变时复用上次的解析结果
+CONDITIONAL_ENABLED = _setting(
+    "CONDITIONAL_ENABLED", "conditional", "enabled", default="true"
+).lower() in {"1", "true", "yes", "on"}
+CONDITIONAL_DIR = _setting("CONDITIONAL_DIR", "conditional", "dir") or os.path.join(STATE_DIR, "responses")
+
+# 常驻模式（--daemon）：各采集步骤的刷新节奏与报告推送时点，均为 APP_TIMEZONE 时间
+SCHEDULE_TICK = float(_setting("SCHEDULE_TICK", "schedule", "tick", default="15"))
+SCHEDULE_WEEKDAYS_ONLY = _setting(
+    "SCHEDULE_WEEKDAYS_ONLY", "schedule", "weekdays_only", default="true"
+).lower() in {"1", "true", "yes", "on"}
+SCHEDULE_DEFAULT = _setting("SCHEDULE_DEFAULT", "schedule", "default", default="every 30m")
+SCHEDULE_STEPS = _cfg_section("schedule", "steps")
+SCHEDULE_REPORTS = _cfg_section("schedule", "reports")
+
+# 行情分组（config/watchlists.yaml 打底，逗号分隔可再指定多个文件）与分批并发下载参数
+WATCHLIST_FILES = [
+    path.strip()
+    for path in _setting("WATCHLIST_FILES", "paths", "watchlists", default=DEFAULT_WATCHLIST_FILE).split(",")
+    if path.strip()
+]
+WATCHLISTS = _load_watchlists(WATCHLIST_FILES)
+WATCHLIST_REPORT_TOP = int(_setting("WATCHLIST_REPORT_TOP", "quotes", "report_top", default="10"))
+QUOTE_CHUNK_SIZE = int(_setting("QUOTE_CHUNK_SIZE", "quotes", "chunk_size", default="50"))
+QUOTE_CHUNK_WORKERS = int(_setting("QUOTE_CHUNK_WORKERS", "quotes", "chunk_workers", default="4"))
+
+# 热词关键词表（每行一个词，逗号分隔可指定多个文件）与雪球帖子翻页上限（每页 50 条）
+KEYWORD_FILES = [
+    path.strip()
+    for path in _setting("KEYWORD_FILES", "paths", "keywords", default="config/keywords.txt").split(",")
+    if path.strip()
+]
+XUEQIU_PAGES = int(_setting("XUEQIU_PAGES", "pagination", "xueqiu_pages", default="5"))
+
+# 分页接口（东方财富资金流向、同花顺涨停池）：首页读取总数后并发限速拉取其余页；max_rows 为 0 表示全量
+PAGE_WORKERS = int(_setting("PAGE_WORKERS", "pagination", "workers", default="4"))
+PAGE_RATE = float(_setting("PAGE_RATE", "pagination", "rate", default="8"))
+EASTMONEY_PAGE_SIZE = int(_setting("EASTMONEY_PAGE_SIZE", "pagination", "eastmoney_page_size", default="100"))
+EASTMONEY_MAX_ROWS = int(_setting("EASTMONEY_MAX_ROWS", "pagination", "eastmoney_max_rows", default="0"))
+TONGHUASHUN_PAGE_SIZE = int(_setting("TONGHUASHUN_PAGE_SIZE", "pagination", "tonghuashun_page_size", default="50"))
+TONGHUASHUN_MAX_ROWS = int(_setting("TONGHUASHUN_MAX_ROWS", "pagination", "tonghuashun_max_rows", default="0"))
+
+# 推送：各渠道并发发送；单个请求超时、渠道总时限（秒）与 429/5xx 退避重试
+DELIVERY_TIMEOUT = float(_setting("DELIVERY_TIMEOUT", "delivery", "timeout", default="60"))
+DELIVERY_REQUEST_TIMEOUT = float(_setting("DELIVERY_REQUEST_TIMEOUT", "delivery", "request_timeout", default="15"))
+DELIVERY_RETRIES = int(_setting("DELIVERY_RETRIES", "delivery", "retries", default="3"))
+DELIVERY_BACKOFF = float(_setting("DELIVERY_BACKOFF", "delivery", "backoff", default="1.0"))
+
+# Telegram：按小节拆分为多条消息顺序发送（每秒最多 rate 条）；超过 max_messages 条时只发首条并上传完整报告
+# document: report（上传 .md 全文）、excel（上传 Excel 总览，不存在时退回全文）或 off（全部按消息发送）
+TELEGRAM_RATE = float(_setting("TELEGRAM_RATE", "telegram", "rate", default="1"))
+TELEGRAM_MAX_MESSAGES = int(_setting("TELEGRAM_MAX_MESSAGES", "telegram", "max_messages", default="5"))
+TELEGRAM_DOCUMENT = _setting("TELEGRAM_DOCUMENT", "telegram", "document", default="report").lower()
+
+# Notion：每批追加的块数（上限 100）与并发续写大表格行的表格数
+NOTION_BATCH_SIZE = int(_setting("NOTION_BATCH_SIZE", "notion", "batch_size", default="100"))
+NOTION_CONCURRENCY = int(_setting("NOTION_CONCURRENCY", "notion", "concurrency", default="3"))
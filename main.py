@@ -1,7 +1,7 @@
 """Compatibility entrypoint. Prefer src.app.run for new integrations."""
 
-from src.app import run
+from src.app import main
 
 
 if __name__ == "__main__":
-    run()
+    main()
@@ -0,0 +1,61 @@
+"""Import-time regression check for the CLI entry point.
+
+    python scripts/check_import_time.py [--budget-ms 150] [--module src.app]
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter and
+fails when the module's cumulative import time exceeds the budget or when any
+heavy dependency is imported eagerly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "numpy", "requests", "urllib3", "yfinance", "bs4", "lxml", "notion_client", "openpyxl")
+
+
+def measure(module: str) -> dict[str, int]:
+    """Return ``{module name: cumulative import microseconds}`` for one import."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    timings: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        timings[name] = max(timings.get(name, 0), int(cumulative))
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail when the entry point imports slowly or eagerly.")
+    parser.add_argument("--module", default="src.app")
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    args = parser.parse_args(argv)
+
+    timings = measure(args.module)
+    total_ms = timings.get(args.module, 0) / 1000
+    eager = sorted(name for name in timings if name.split(".")[0] in HEAVY_MODULES and "." not in name)
+    print(f"{args.module}: {total_ms:.1f} ms (budget {args.budget_ms:g} ms)")
+    ok = True
+    if total_ms > args.budget_ms:
+        print("❌ import time over budget; slowest imports:")
+        for name, us in sorted(timings.items(), key=lambda item: item[1], reverse=True)[:10]:
+            print(f"   {us / 1000:8.1f} ms  {name}")
+        ok = False
+    if eager:
+        print(f"❌ heavy modules imported eagerly: {', '.join(eager)}")
+        ok = False
+    if ok:
+        print("✅ import-time check passed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
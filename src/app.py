@@ -1,28 +1,141 @@
 """Structured application entry for stock1."""
 
-from src.data.fetcher import main as build_report
-from src.execution.notion import upload_report_to_notion
-from src.execution.telegram import send_report_to_telegram
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+
+from src.core import metrics
 import config
-import urllib3
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# 启动时只加载标准库；pandas/requests/yfinance/notion_client 等在真正执行对应步骤时才导入
+REQUIRED_MODULES = ("pandas", "numpy", "requests", "urllib3", "yfinance", "tabulate")
+OPTIONAL_MODULES = ("bs4", "lxml", "openpyxl", "notion_client", "httpx", "h2", "pyarrow")
+
+
+def run(
+    offline: bool = False,
+    use_cache: bool | None = None,
+    output_dir: str | None = None,
+    metrics_path: str | None = None,
+    profile_path: str | None = None,
+    engine: str | None = None,
+    output_format: str | None = None,
+    workers: int | None = None,
+) -> None:
+    import urllib3
+
+    from src.data.fetcher import main as build_report
+    from src.execution.delivery import deliver_report
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    recorder = metrics.start_run(profile_path=profile_path)
+    overview_path = None
+    if config.TELEGRAM_DOCUMENT == "excel":
+        # Telegram 以附件形式发送 Excel 总览：未指定输出目录时写到状态目录
+        overview_path = os.path.join(output_dir or config.STATE_DIR, "全市场数据总览.xlsx")
+    report_md = build_report(offline=offline, use_cache=use_cache, output_dir=output_dir, overview_path=overview_path,
+                             engine=engine, output_format=output_format, workers=workers)
+    deliver_report(report_md, document_path=overview_path)
+    print("报告已生成，推送流程已执行（失败项已跳过）。")
+    write_run_record(recorder, metrics_path)
 
 
-def run() -> None:
-    report_md = build_report()
+def write_run_record(recorder: metrics.RunRecorder, metrics_path: str | None) -> None:
+    recorder.finish()
+    path = metrics_path or os.path.join(
+        config.STATE_DIR, "runs", f"{recorder.record.started_at.replace(':', '')}.json"
+    )
     try:
-        upload_report_to_notion(report_md, title=config.REPORT_TITLE)
-    except Exception as e:
-        print(f"⚠️ Notion 推送失败，已跳过: {e}")
+        recorder.write_json(path)
+    except OSError as e:
+        print(f"⚠️ 运行记录写入失败: {e}")
+        return
+    print(f"⏱️ {recorder.summary()}（运行记录: {path}）")
 
+
+def health_check() -> int:
+    """Check dependencies, delivery config and state dir without importing or fetching anything."""
+    ok = True
+    for module in REQUIRED_MODULES + OPTIONAL_MODULES:
+        present = importlib.util.find_spec(module) is not None
+        if not present and module in REQUIRED_MODULES:
+            ok = False
+        mark = "✅" if present else ("❌" if module in REQUIRED_MODULES else "⚠️")
+        print(f"{mark} 依赖 {module}")
+    print(f"{'✅' if config.NOTION_TOKEN and config.NOTION_PAGE_ID else '⚠️'} Notion 推送配置")
+    print(f"{'✅' if config.TELEGRAM_BOT_TOKEN and config.TELEGRAM_CHAT_ID else '⚠️'} Telegram 推送配置")
     try:
-        send_report_to_telegram(report_md)
-    except Exception as e:
-        print(f"⚠️ Telegram 推送失败，已跳过: {e}")
+        os.makedirs(config.STATE_DIR, exist_ok=True)
+        writable = os.access(config.STATE_DIR, os.W_OK)
+    except OSError:
+        writable = False
+    ok = ok and writable
+    print(f"{'✅' if writable else '❌'} 状态目录可写: {config.STATE_DIR}")
+    skipped = ", ".join(config.COLLECT_SKIP) or "无"
+    print(f"ℹ️ 并发 {config.COLLECT_WORKERS}，单步超时 {config.COLLECT_STEP_TIMEOUT:g}s，"
+          f"总时限 {config.COLLECT_DEADLINE:g}s，跳过步骤: {skipped}")
+    print("stock1: healthy" if ok else "stock1: unhealthy")
+    return 0 if ok else 1
 
-    print("报告已生成，推送流程已执行（失败项已跳过）。")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="stock1", description="Collect market data and push the daily report.")
+    parser.add_argument(
+        "--offline", "--cache-only", dest="offline", action="store_true",
+        help="build the report purely from the local market data cache",
+    )
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", default=None,
+                        help="neither read nor write the local market data cache")
+    parser.add_argument("--output-dir", help="also write each dataset as a file plus an Excel overview here")
+    parser.add_argument("--output-format", choices=("csv", "parquet", "arrow"),
+                        help="dataset file format for --output-dir (default: output.format); "
+                             "parquet/arrow need pyarrow")
+    parser.add_argument("--dry-run", "--health", dest="health", action="store_true",
+                        help="check dependencies and configuration without collecting or pushing")
+    parser.add_argument("--metrics-json", dest="metrics_path",
+                        help="write the JSON run record here (default: <state_dir>/runs/<start time>.json)")
+    parser.add_argument("--profile", dest="profile_path",
+                        help="dump cProfile stats of the run to this file (collection runs sequentially)")
+    parser.add_argument("--engine", choices=("threads", "async", "queue"),
+                        help="collection engine (default: collection.engine); async needs httpx, "
+                             "queue runs the steps in worker processes")
+    parser.add_argument("--workers", type=int,
+                        help="local worker processes of the queue engine (default: queue.workers); "
+                             "implies --engine queue")
+    parser.add_argument("--worker", action="store_true",
+                        help="serve collection jobs from the shared queue (queue.path) until stopped")
+    parser.add_argument("--daemon", action="store_true",
+                        help="stay resident, refresh each step on its configured cadence and push scheduled reports")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.health:
+        raise SystemExit(health_check())
+    if args.daemon:
+        from src.daemon import run_daemon
+
+        run_daemon()
+        return
+    if args.worker:
+        from src.data.jobs import serve
+
+        serve()
+        return
+    run(
+        offline=args.offline,
+        use_cache=args.use_cache,
+        output_dir=args.output_dir,
+        metrics_path=args.metrics_path,
+        profile_path=args.profile_path,
+        engine=args.engine or ("queue" if args.workers is not None else None),
+        output_format=args.output_format,
+        workers=args.workers,
+    )
 
 
 if __name__ == "__main__":
-    run()
+    main()
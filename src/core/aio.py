@@ -0,0 +1,115 @@
+"""asyncio HTTP engine for the scrapers (optional dependency: ``httpx``, HTTP/2 with ``h2``).
+
+One ``AsyncHTTP`` instance is shared by every coroutine of a collection run:
+a single pooled client (HTTP/2 when ``h2`` is installed), a global semaphore
+bounding requests in flight and per-host request spacing.  Responses expose
+``status_code``/``text``/``json()`` like requests', so the fetchers' parse
+functions serve both the sync and the async path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+from typing import Any
+from urllib.parse import urlsplit
+
+from src.core.http import DEFAULT_HEADERS, RETRYABLE_STATUS
+from src.core.metrics import record_response
+
+
+def available() -> bool:
+    return importlib.util.find_spec("httpx") is not None
+
+
+class AsyncRateLimiter:
+    """Space requests at least ``1 / rate`` seconds apart (no limit if ``rate <= 0``)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class AsyncHTTP:
+    """Shared async client with a global concurrency limit and per-host rate limits.
+
+    Use as ``async with AsyncHTTP() as http: resp = await http.get(url)``.
+    Requests with ``verify=False`` go through a second client without
+    certificate checks.  5xx/429 answers and transport errors are retried
+    ``retries`` times with exponential backoff.  ``transport`` (class
+    attribute) lets the benchmark route all traffic to its stub server.
+    """
+
+    transport = None
+
+    def __init__(self, concurrency: int = 16, host_rate: float = 5.0, timeout: float = 15.0,
+                 retries: int = 2, backoff: float = 0.5):
+        self.concurrency = concurrency
+        self.host_rate = host_rate
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._clients: dict[bool, Any] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self._limiters: dict[str, AsyncRateLimiter] = {}
+
+    async def __aenter__(self) -> "AsyncHTTP":
+        self._semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def _client(self, verify: bool):
+        import httpx
+
+        if verify not in self._clients:
+            self._clients[verify] = httpx.AsyncClient(
+                http2=importlib.util.find_spec("h2") is not None,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                verify=verify,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency),
+                transport=self.transport,
+            )
+        return self._clients[verify]
+
+    def _limiter(self, url: str) -> AsyncRateLimiter:
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = AsyncRateLimiter(self.host_rate)
+        return self._limiters[host]
+
+    async def get(self, url: str, verify: bool = True, **kwargs: Any):
+        import httpx
+
+        client = self._client(verify)
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    await self._limiter(url).wait()
+                    resp = await client.get(url, **kwargs)
+                if resp.status_code not in RETRYABLE_STATUS or attempt == self.retries:
+                    # 与 requests 路径一致：只记录最终响应，之前的尝试计为重试次数
+                    record_response(resp, retries=attempt)
+                    return resp
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+        raise AssertionError("unreachable")
@@ -0,0 +1,132 @@
+"""Conditional requests and parse de-duplication for sources that rarely change."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable
+
+import config
+from src.core.jsonfile import read_json, update_json
+
+
+def _key_digest(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class ResponseMemo:
+    """ETag/Last-Modified validators, body hashes and parsed results per URL.
+
+    ``headers(key)`` returns the conditional request headers for a URL whose
+    parsed result is on record.  ``parse(key, resp, parser)`` returns the
+    stored result for a ``304 Not Modified`` answer or a body whose SHA-1
+    matches the previous one, and otherwise runs ``parser`` and records the
+    new validators, hash and result.  Entries live under ``root`` (an
+    ``index.json`` plus one pickle per URL) so they survive restarts; the
+    index is merged with the on-disk copy on every write, so processes sharing
+    ``root`` keep each other's validators.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, "index.json")
+        self._index: dict[str, dict] = read_json(self._index_path)
+        self._results: dict[str, Any] = {}
+
+    def _result_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{_key_digest(key)}.pkl")
+
+    def _load_result(self, key: str) -> tuple[bool, Any]:
+        if key in self._results:
+            return True, self._results[key]
+        path = self._result_path(key)
+        if key not in self._index or not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as fh:
+                self._results[key] = pickle.load(fh)
+        except Exception:
+            return False, None
+        return True, self._results[key]
+
+    def headers(self, key: str) -> dict[str, str]:
+        with self._lock:
+            entry = self._index.get(key)
+            if not entry or not self._load_result(key)[0]:
+                return {}
+            out = {}
+            if entry.get("etag"):
+                out["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                out["If-Modified-Since"] = entry["last_modified"]
+            return out
+
+    def parse(self, key: str, resp, parser: Callable[[Any], Any]) -> Any:
+        with self._lock:
+            entry = self._index.get(key, {})
+            known, previous = self._load_result(key)
+        if resp.status_code == 304 and known:
+            return previous
+        digest = hashlib.sha1(resp.content or b"").hexdigest() if resp.status_code == 200 else None
+        if digest and known and digest == entry.get("sha1"):
+            # 内容未变：沿用上次的解析结果，只刷新校验头
+            self._record(key, resp, digest, previous, store=False)
+            return previous
+        result = parser(resp)
+        if digest and result is not None:
+            self._record(key, resp, digest, result, store=True)
+        return result
+
+    def _record(self, key: str, resp, digest: str, result: Any, store: bool) -> None:
+        entry = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "sha1": digest,
+            "updated": time.time(),
+        }
+        with self._lock:
+            self._index[key] = entry
+            self._results[key] = result
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                if store:
+                    with open(self._result_path(key), "wb") as fh:
+                        pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                # 其他进程写入的条目以磁盘为准，只覆盖本次记录的 URL；被它们更新过的解析结果不再沿用
+                merged = update_json(self._index_path, lambda index: {**index, key: entry}, indent=2)
+                for other, value in merged.items():
+                    if other in self._results and value.get("sha1") != self._index.get(other, {}).get("sha1"):
+                        del self._results[other]
+                self._index = merged
+            except OSError as e:
+                print(f"⚠️ 响应校验信息保存失败: {e}")
+
+
+class _Passthrough:
+    """Stand-in used when conditional requests are disabled."""
+
+    def headers(self, key: str) -> dict[str, str]:
+        return {}
+
+    def parse(self, key: str, resp, parser: Callable[[Any], Any]) -> Any:
+        return parser(resp)
+
+
+# 不应记入 memo 的请求（如 URL 每次都不同的游标翻页）直接用它解析
+PASSTHROUGH = _Passthrough()
+
+_memo: ResponseMemo | _Passthrough | None = None
+_memo_lock = threading.Lock()
+
+
+def get_memo() -> ResponseMemo | _Passthrough:
+    """Return the process-wide memo (under ``config.CONDITIONAL_DIR``), creating it on first use."""
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            _memo = ResponseMemo(config.CONDITIONAL_DIR) if config.CONDITIONAL_ENABLED else PASSTHROUGH
+        return _memo
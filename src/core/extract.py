@@ -0,0 +1,100 @@
+"""Targeted HTML extraction (optional dependency: ``lxml``).
+
+Instead of parsing a whole page into a tree (BeautifulSoup) or into one
+DataFrame per table (``pd.read_html``), the page is fed in chunks to an lxml
+pull parser that only reports the tags of interest and stops as soon as the
+target element is complete, so the rest of the page is never parsed.  The
+selection rules are those of the calls they replace: ``nth_table`` counts
+tables the way ``pd.read_html`` does, ``element_text`` matches a class
+attribute the way ``BeautifulSoup.find(tag, {"class": ...})`` does.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import re
+
+import pandas as pd
+
+CHUNK_SIZE = 64 * 1024
+
+
+def available() -> bool:
+    return importlib.util.find_spec("lxml") is not None
+
+
+# 与 pd.read_html 的筛选一致：它先要求有匹配 ".+" 的文本节点，再丢掉单元格去掉空白后全空的表格，
+# 所以表格内要有非空白字符才算一个表格
+_TEXT = re.compile(r"\S")
+
+
+def _has_text(element) -> bool:
+    # 逐个文本节点检查，遇到第一个即返回；大表格不必收集全部文本
+    return any(_TEXT.search(text) for text in element.itertext())
+
+
+def _hidden(element) -> bool:
+    return "display:none" in element.attrib.get("style", "").replace(" ", "")
+
+
+def _pull(html: str, tag: str, chunk_size: int):
+    """Yield ``(event, element)`` for ``tag`` while feeding ``html`` chunk by chunk."""
+    from lxml import etree
+
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=tag)
+    for offset in range(0, len(html), chunk_size):
+        parser.feed(html[offset:offset + chunk_size])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _table_markup(html: str, index: int, chunk_size: int) -> tuple[str | None, int]:
+    """Markup of the ``index``-th table as ``pd.read_html`` counts them, and the tables seen."""
+    from lxml import etree
+
+    started = []  # 按文档顺序（开始标签）排列的表格
+    counted: dict = {}  # 表格 -> 是否计入 read_html 的结果
+    for event, element in _pull(html, "table", chunk_size):
+        if event == "start":
+            started.append(element)
+            continue
+        counted[element] = _has_text(element) and not _hidden(element)
+        # 嵌套表格的外层要等到其结束标签才能判定，所以只在已判定的前缀里计数
+        position = 0
+        for table in started:
+            if table not in counted:
+                break
+            if counted[table]:
+                if position == index:
+                    return etree.tostring(table, encoding="unicode", with_tail=False), position + 1
+                position += 1
+    return None, sum(counted.values())
+
+
+def nth_table(html: str, index: int, chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """Return ``pd.read_html(html)[index]`` without parsing the other tables.
+
+    Raises IndexError when the page has fewer tables, like indexing the list.
+    """
+    # 先取出目标表格的片段并释放页面树，再只把这一个表格转换成 DataFrame
+    markup, seen = _table_markup(html, index, chunk_size)
+    if markup is None:
+        raise IndexError(f"页面中只有 {seen} 个表格，没有第 {index + 1} 个")
+    return pd.read_html(io.StringIO(markup))[0]
+
+
+def element_text(html: str, tag: str, class_: str, chunk_size: int = CHUNK_SIZE) -> str | None:
+    """Stripped text of the first ``tag`` whose class attribute is ``class_`` (None if absent)."""
+    classes = class_.split()
+    target = None
+    for event, element in _pull(html, tag, chunk_size):
+        if event == "start" and target is None:
+            value = element.get("class", "")
+            # BeautifulSoup 的 class 匹配：整串相同，或单个类名是其中之一；属性在开始标签里就已可见
+            if value == class_ or (len(classes) == 1 and class_ in value.split()):
+                target = element
+        elif event == "end" and element is target:
+            return "".join(element.itertext()).strip()
+    return None
@@ -0,0 +1,202 @@
+"""Hedged requests across mirror endpoints with persisted per-host health."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Iterable
+from urllib.parse import urlsplit
+
+import requests
+
+from src.core.jsonfile import read_json, update_json
+from src.core.metrics import bind_context
+
+# 连续失败一次相当于多出的延迟（秒），用于镜像排序
+FAILURE_PENALTY = 10.0
+UNKNOWN_LATENCY = 1.0
+EWMA_ALPHA = 0.3
+
+
+def _host(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class HostHealth:
+    """Latency/failure statistics per host, stored as JSON between runs.
+
+    ``save`` merges with the file on disk host by host (the more recently
+    updated statistics win), so processes sharing ``path`` keep each other's.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = read_json(path) if path else {}
+
+    def score(self, url: str) -> float:
+        stat = self._stats.get(_host(url))
+        if not stat:
+            return UNKNOWN_LATENCY
+        return stat.get("latency", UNKNOWN_LATENCY) + stat.get("failures", 0) * FAILURE_PENALTY
+
+    def order(self, urls: Iterable[str]) -> list[str]:
+        """Sort urls healthiest first; ties keep the given order."""
+        with self._lock:
+            return sorted(urls, key=self.score)
+
+    def record_success(self, url: str, elapsed: float) -> None:
+        with self._lock:
+            stat = self._stats.setdefault(_host(url), {})
+            prev = stat.get("latency")
+            stat["latency"] = elapsed if prev is None else EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * prev
+            stat["failures"] = 0
+            stat["updated"] = time.time()
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            stat = self._stats.setdefault(_host(url), {})
+            stat["failures"] = stat.get("failures", 0) + 1
+            stat["updated"] = time.time()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            stats = {host: dict(stat) for host, stat in self._stats.items()}
+
+        def merge(saved: dict[str, dict]) -> dict[str, dict]:
+            for host, stat in stats.items():
+                if stat.get("updated", 0) >= saved.get(host, {}).get("updated", 0):
+                    saved[host] = stat
+            return saved
+
+        try:
+            update_json(self.path, merge, indent=2)
+        except OSError as e:
+            print(f"⚠️ 主机健康状态保存失败: {e}")
+
+
+def hedged_get(
+    urls: Iterable[str],
+    validate: Callable[[requests.Response], Any],
+    session: requests.Session,
+    hedge_delay: float = 1.5,
+    health: HostHealth | None = None,
+    **kwargs: Any,
+) -> tuple[Any, str | None]:
+    """GET the first url, racing the next one whenever ``hedge_delay`` passes.
+
+    ``validate`` turns a response into a payload, returning ``None`` (or
+    raising) for unusable responses.  A failed attempt starts the next mirror
+    immediately.  The first valid payload wins and ``(payload, url)`` is
+    returned; remaining attempts are abandoned.  ``(None, None)`` means every
+    mirror failed.
+    """
+    ordered = health.order(urls) if health else list(urls)
+    if not ordered:
+        return None, None
+
+    def attempt(url: str) -> tuple[Any, float]:
+        start = time.monotonic()
+        resp = session.get(url, **kwargs)
+        return validate(resp), time.monotonic() - start
+
+    executor = ThreadPoolExecutor(max_workers=len(ordered), thread_name_prefix="hedge")
+    running: dict = {}
+    next_idx = 0
+
+    def launch() -> None:
+        nonlocal next_idx
+        url = ordered[next_idx]
+        next_idx += 1
+        running[executor.submit(bind_context(attempt), url)] = url
+
+    try:
+        launch()
+        while running:
+            more = next_idx < len(ordered)
+            done, _ = wait(list(running), timeout=hedge_delay if more else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for future in done:
+                url = running.pop(future)
+                try:
+                    payload, elapsed = future.result()
+                except Exception:
+                    payload, elapsed = None, 0.0
+                if payload is not None:
+                    if health:
+                        health.record_success(url, elapsed)
+                    return payload, url
+                if health:
+                    health.record_failure(url)
+                if next_idx < len(ordered):
+                    launch()
+        return None, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if health:
+            health.save()
+
+
+async def ahedged_get(
+    urls: Iterable[str],
+    validate: Callable[[Any], Any],
+    fetch: Callable[[str], Awaitable[Any]],
+    hedge_delay: float = 1.5,
+    health: HostHealth | None = None,
+) -> tuple[Any, str | None]:
+    """Async counterpart of ``hedged_get``: ``fetch(url)`` is awaited instead of ``session.get``."""
+    ordered = health.order(urls) if health else list(urls)
+    if not ordered:
+        return None, None
+    loop = asyncio.get_running_loop()
+
+    async def attempt(url: str) -> tuple[Any, float]:
+        start = loop.time()
+        resp = await fetch(url)
+        return validate(resp), loop.time() - start
+
+    running: dict[asyncio.Task, str] = {}
+    next_idx = 0
+
+    def launch() -> None:
+        nonlocal next_idx
+        url = ordered[next_idx]
+        next_idx += 1
+        running[asyncio.create_task(attempt(url))] = url
+
+    try:
+        launch()
+        while running:
+            more = next_idx < len(ordered)
+            done, _ = await asyncio.wait(list(running), timeout=hedge_delay if more else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                url = running.pop(task)
+                try:
+                    payload, elapsed = task.result()
+                except Exception:
+                    payload, elapsed = None, 0.0
+                if payload is not None:
+                    if health:
+                        health.record_success(url, elapsed)
+                    return payload, url
+                if health:
+                    health.record_failure(url)
+                if next_idx < len(ordered):
+                    launch()
+        return None, None
+    finally:
+        for task in running:
+            task.cancel()
+        if health:
+            health.save()
@@ -0,0 +1,141 @@
+"""Shared pooled HTTP session used by scrapers and delivery channels."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
+
+from src.core.metrics import record_response
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"
+    ),
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+# 每个主机最多保持的连接数；超过时等待空闲连接而不是新建
+POOL_MAXSIZE_PER_HOST = 4
+POOL_HOSTS = 16
+
+T = TypeVar("T")
+
+# 非幂等请求（POST 推送）不走 urllib3 自动重试，由 call_with_retries 按以下状态码退避重试
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def build_session(retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """Create a session with keep-alive pooling and exponential-backoff retries.
+
+    Connection errors, read timeouts and 5xx responses on idempotent methods
+    are retried ``retries`` times, sleeping ``backoff_factor * 2**n`` seconds.
+    Every response is reported to the active run recorder (src.core.metrics).
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_MAXSIZE_PER_HOST,
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.hooks["response"].append(record_response)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+class RetryableError(Exception):
+    """A transient failure; ``retry_after`` (seconds) overrides the backoff when the server sent one."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def request_not_sent(error: BaseException) -> bool:
+    """True when a requests error happened before the request reached the server.
+
+    Only a connect timeout or a failed connection attempt qualifies; a read
+    timeout or a dropped connection may come after the server accepted the
+    request.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if isinstance(error, requests.ConnectionError) and error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def call_with_retries(
+    func: Callable[[], T],
+    retries: int = 3,
+    backoff: float = 1.0,
+    max_wait: float = 30.0,
+    label: str = "请求",
+    idempotent: bool = True,
+) -> T:
+    """Call ``func`` and retry it on RetryableError with exponential backoff.
+
+    Waits ``backoff * 2**attempt`` seconds (or the error's ``retry_after``),
+    capped at ``max_wait``; the last error is re-raised after ``retries``
+    retries.  Connection errors and timeouts from requests count as retryable.
+    With ``idempotent=False`` (POSTs that create a message or page) only
+    RetryableError and requests errors raised before the request was sent
+    (see ``request_not_sent``) are retried, so a read timeout never re-sends.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+            # 非幂等请求读超时时服务端可能已处理，重发会产生重复消息/页面
+            safe = idempotent or isinstance(e, RetryableError) or request_not_sent(e)
+            if attempt == retries or not safe:
+                raise
+            retry_after = getattr(e, "retry_after", None)
+            wait = min(max_wait, retry_after if retry_after is not None else backoff * 2 ** attempt)
+            print(f"⚠️ {label}失败（{e}），{wait:.1f}s 后重试 {attempt + 1}/{retries}")
+            time.sleep(wait)
+    raise AssertionError("unreachable")
+
+
+def retry_after_seconds(resp: requests.Response) -> float | None:
+    """Server-requested delay from a Retry-After header or Telegram's ``parameters.retry_after``."""
+    try:
+        body = resp.json()
+        value = (body.get("parameters") or {}).get("retry_after") if isinstance(body, dict) else None
+    except ValueError:
+        value = None
+    value = value if value is not None else resp.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,215 @@
+"""Durable job queue in one SQLite file, shared by processes through the filesystem.
+
+Producers ``submit`` jobs under a run id; any number of worker processes,
+on this host or on other hosts that see the same directory, ``claim`` the
+oldest queued job in one ``BEGIN IMMEDIATE`` transaction, so a job is handed
+to exactly one worker.  A claimed job carries a lease: the worker ``renew``s
+it while running, and a job whose lease ran out (its worker died or hung) is
+claimed again by the next worker until ``max_attempts`` is used up.  Results
+of a job whose claim was lost are ignored by ``finish``.  Workers may attach
+the metrics they measured (a JSON object) to ``finish`` and ``fail``, since
+in-process recorders do not cross the process boundary.
+
+The database keeps SQLite's default rollback journal: WAL needs shared memory
+and does not work on network filesystems.  Leases compare wall-clock times,
+so hosts sharing a queue need synchronized clocks.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id);
+"""
+_COLUMNS = "id, run_id, name, kind, payload, status, attempts, worker, started, finished, result, error, metrics"
+
+
+@dataclass
+class Job:
+    id: int
+    run_id: str
+    name: str
+    kind: str
+    payload: dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    attempts: int = 0
+    worker: str | None = None
+    started: float | None = None
+    finished: float | None = None
+    result: str | None = None
+    error: str | None = None
+    metrics: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @classmethod
+    def _from_row(cls, row: tuple) -> "Job":
+        values = list(row)
+        values[4] = json.loads(values[4])
+        values[12] = json.loads(values[12]) if values[12] else {}
+        return cls(*values)
+
+
+def _dump_metrics(metrics: dict[str, Any] | None) -> str | None:
+    return json.dumps(metrics, ensure_ascii=False) if metrics else None
+
+
+class JobQueue:
+    """Jobs of all runs in the SQLite database at ``path``."""
+
+    def __init__(self, path: str, lease: float = 60.0, max_attempts: int = 2, timeout: float = 30.0):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            if "metrics" not in {row[1] for row in db.execute("PRAGMA table_info(jobs)")}:
+                # 旧版本创建的队列文件没有 metrics 列；并发打开时另一个进程可能已经加上
+                try:
+                    db.execute("ALTER TABLE jobs ADD COLUMN metrics TEXT")
+                except sqlite3.OperationalError as e:
+                    if "duplicate column" not in str(e):
+                        raise
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 每次操作一个连接：多线程、多进程（含 fork/spawn 出的工作进程）都无需共享连接对象
+        db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as db:
+            # IMMEDIATE 在读之前就取得写锁，两个进程不会选中同一个任务
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def submit(self, run_id: str, jobs: Iterable[tuple[str, str, dict[str, Any]]]) -> list[int]:
+        """Queue ``(name, kind, payload)`` jobs of one run in order; returns their ids."""
+        with self._transaction() as db:
+            return [
+                db.execute(
+                    "INSERT INTO jobs (run_id, name, kind, payload) VALUES (?, ?, ?, ?)",
+                    (run_id, name, kind, json.dumps(payload, ensure_ascii=False)),
+                ).lastrowid
+                for name, kind, payload in jobs
+            ]
+
+    def claim(self, worker: str, run_id: str | None = None) -> Job | None:
+        """Atomically hand the oldest available job (of ``run_id``, if given) to ``worker``."""
+        now = time.time()
+        scope, args = ("AND run_id = ?", (run_id,)) if run_id else ("", ())
+        with self._transaction() as db:
+            # 租约过期且重试次数已用完的任务记为失败，其余过期任务可被重新领取
+            db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = 'lease expired' "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, now, self.max_attempts),
+            )
+            row = db.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE (status = ? OR (status = ? AND lease_until < ?)) {scope} "
+                "ORDER BY id LIMIT 1",
+                (QUEUED, RUNNING, now, *args),
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job._from_row(row)
+            db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, lease_until = ?, started = ?, "
+                "error = NULL WHERE id = ?",
+                (RUNNING, worker, now + self.lease, now, job.id),
+            )
+        job.status, job.worker, job.attempts, job.started, job.error = RUNNING, worker, job.attempts + 1, now, None
+        return job
+
+    def _update_claimed(self, job: Job, assignments: str, values: tuple) -> bool:
+        # 只有仍持有该任务的工作进程才能更新它：租约过期后被他人领取或被取消的任务，迟到的结果直接丢弃
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND status = ?",
+                (*values, job.id, job.worker, RUNNING),
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, job: Job) -> bool:
+        """Extend the lease of a running job; False when the worker no longer holds it."""
+        return self._update_claimed(job, "lease_until = ?", (time.time() + self.lease,))
+
+    def finish(self, job: Job, result: str | None = None, metrics: dict[str, Any] | None = None) -> bool:
+        """Mark a claimed job done with a result reference (e.g. a file path) and the worker's metrics."""
+        return self._update_claimed(job, "status = ?, finished = ?, result = ?, metrics = ?",
+                                    (DONE, time.time(), result, _dump_metrics(metrics)))
+
+    def fail(self, job: Job, error: str, retry: bool = True, metrics: dict[str, Any] | None = None) -> bool:
+        """Record a failed attempt; the job is queued again while attempts remain and ``retry`` is set."""
+        status = QUEUED if retry and job.attempts < self.max_attempts else FAILED
+        return self._update_claimed(job, "status = ?, finished = ?, error = ?, metrics = ?",
+                                    (status, time.time(), error, _dump_metrics(metrics)))
+
+    def cancel(self, run_id: str) -> int:
+        """Cancel the queued and running jobs of a run; returns how many were cancelled."""
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE jobs SET status = ?, finished = ? WHERE run_id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), run_id, QUEUED, RUNNING),
+            ).rowcount
+
+    def jobs(self, run_id: str) -> list[Job]:
+        with self._connect() as db:
+            rows = db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE run_id = ? ORDER BY id", (run_id,)).fetchall()
+        return [Job._from_row(row) for row in rows]
+
+    def unfinished(self, run_id: str) -> int:
+        """Number of jobs of a run that are still queued or running."""
+        with self._connect() as db:
+            return db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND status IN (?, ?)", (run_id, QUEUED, RUNNING)
+            ).fetchone()[0]
+
+    def delete(self, run_id: str) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM jobs WHERE run_id = ?", (run_id,))
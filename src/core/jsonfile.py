@@ -0,0 +1,59 @@
+"""JSON state files shared by several processes (e.g. queue workers using one cache directory)."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import tempfile
+from typing import Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows：没有 flock，只保留“先合并再替换”
+    fcntl = None
+
+
+def read_json(path: str) -> dict:
+    """Contents of the JSON object at ``path``; ``{}`` when it is missing or unreadable."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def update_json(path: str, merge: Callable[[dict], dict], indent: int | None = None) -> dict:
+    """Re-read ``path``, pass its current contents to ``merge`` and atomically replace it with the result.
+
+    The read-merge-write runs under an exclusive lock on ``<path>.lock``, so
+    writers in other processes never drop each other's entries, and the new
+    contents go through a per-process temporary file and ``os.replace``.
+    Returns the merged data.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with _locked(path):
+        data = merge(read_json(path))
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as fh:
+            json.dump(data, fh, ensure_ascii=False, indent=indent)
+        try:
+            os.replace(fh.name, path)
+        except OSError:
+            os.remove(fh.name)
+            raise
+    return data
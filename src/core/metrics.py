@@ -0,0 +1,222 @@
+"""Per-run instrumentation: step timings, HTTP traffic, row counts, profiling."""
+
+from __future__ import annotations
+
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterable, Iterator
+
+OTHER = "(其他)"
+
+
+@dataclass
+class SpanMetrics:
+    name: str
+    status: str = "ok"
+    wall: float = 0.0
+    requests: int = 0
+    bytes: int = 0
+    retries: int = 0
+    rows: int | None = None
+    cache_hit: bool = False
+    error: str = ""
+
+
+@dataclass
+class RunRecord:
+    started_at: str
+    elapsed: float = 0.0
+    steps: dict[str, SpanMetrics] = field(default_factory=dict)
+    deliveries: dict[str, SpanMetrics] = field(default_factory=dict)
+    collection: dict[str, Any] = field(default_factory=dict)
+
+
+_current_span: contextvars.ContextVar[SpanMetrics | None] = contextvars.ContextVar("current_span", default=None)
+
+
+class RunRecorder:
+    """Collects SpanMetrics for collection steps and delivery channels.
+
+    HTTP responses are attributed to the span active in the calling thread's
+    context (see ``record_response``).  With ``profile_path`` set, every span
+    runs under one shared cProfile profiler; spans must then run one at a
+    time, so callers force sequential execution while profiling.
+    """
+
+    def __init__(self, profile_path: str | None = None):
+        self.record = RunRecord(started_at=datetime.datetime.now().isoformat(timespec="seconds"))
+        self.profile_path = profile_path
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._other = SpanMetrics(OTHER)
+        self._profiler = None
+        if profile_path:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+
+    @contextmanager
+    def _span(self, bucket: dict[str, SpanMetrics], name: str) -> Iterator[SpanMetrics]:
+        span = SpanMetrics(name)
+        with self._lock:
+            bucket[name] = span
+        token = _current_span.set(span)
+        start = time.monotonic()
+        try:
+            with self.profiled():
+                yield span
+        except Exception as e:
+            span.status = "failed"
+            span.error = str(e)
+            raise
+        finally:
+            span.wall = round(time.monotonic() - start, 4)
+            _current_span.reset(token)
+
+    def step(self, name: str):
+        return self._span(self.record.steps, name)
+
+    def delivery(self, name: str):
+        return self._span(self.record.deliveries, name)
+
+    @contextmanager
+    def profiled(self) -> Iterator[None]:
+        if self._profiler is None:
+            yield
+            return
+        self._profiler.enable()
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+
+    def record_response(self, resp, retries: int | None = None) -> None:
+        """Count ``resp`` on the current span; ``retries`` defaults to urllib3's retry history (requests)."""
+        span = _current_span.get() or self._other
+        size = len(resp.content or b"")
+        if retries is None:
+            # httpx 的响应没有 raw.retries，重试次数由调用方（AsyncHTTP）传入
+            history = getattr(getattr(getattr(resp, "raw", None), "retries", None), "history", ()) or ()
+            retries = len(history)
+        with self._lock:
+            span.requests += 1
+            span.bytes += size
+            span.retries += retries
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None
+
+    def attach_collection(self, collection) -> None:
+        """Copy the scheduler's outcome into the record and mark timed-out steps."""
+        self.record.collection = {
+            "finished": collection.finished,
+            "timed_out": collection.timed_out,
+            "failed": collection.failed,
+            "elapsed": round(collection.elapsed, 4),
+        }
+        with self._lock:
+            for name in collection.timed_out:
+                span = self.record.steps.setdefault(name, SpanMetrics(name))
+                span.status = "timed_out"
+                span.wall = round(collection.outcomes[name].elapsed, 4)
+
+    def add_steps(self, spans: Iterable[SpanMetrics]) -> None:
+        """Record step spans measured in other processes (queue workers); their unattributed traffic adds up."""
+        with self._lock:
+            for span in spans:
+                if span.name != OTHER:
+                    self.record.steps[span.name] = span
+                    continue
+                self._other.requests += span.requests
+                self._other.bytes += span.bytes
+                self._other.retries += span.retries
+
+    def attach_delivery(self, result) -> None:
+        """Mark delivery channels abandoned by the scheduler as timed out."""
+        with self._lock:
+            for name in result.timed_out:
+                span = self.record.deliveries.setdefault(name, SpanMetrics(name))
+                span.status = "timed_out"
+                span.wall = round(result.outcomes[name].elapsed, 4)
+
+    def finish(self) -> RunRecord:
+        self.record.elapsed = round(time.monotonic() - self._start, 4)
+        if self._other.requests:
+            self.record.steps[OTHER] = self._other
+        if self._profiler is not None:
+            self._profiler.dump_stats(self.profile_path)
+            print(f"🧪 cProfile 结果已写入 {self.profile_path}")
+        return self.record
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self.record), ensure_ascii=False, indent=2)
+
+    def write_json(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.to_json())
+
+    def summary(self) -> str:
+        spans = list(self.record.steps.values()) + list(self.record.deliveries.values())
+        slowest = sorted(spans, key=lambda s: s.wall, reverse=True)[:3]
+        total_bytes = sum(s.bytes for s in spans)
+        total_requests = sum(s.requests for s in spans)
+        parts = [f"总耗时 {self.record.elapsed:.1f}s", f"HTTP {total_requests} 次/{total_bytes / 1024:.0f}KB"]
+        parts.append("最慢: " + ", ".join(f"{s.name} {s.wall:.1f}s" for s in slowest))
+        return "；".join(parts)
+
+
+_active: RunRecorder | None = None
+
+
+def start_run(profile_path: str | None = None) -> RunRecorder:
+    """Create the process-wide recorder that fetchers and delivery report into."""
+    global _active
+    _active = RunRecorder(profile_path=profile_path)
+    return _active
+
+
+def active() -> RunRecorder | None:
+    return _active
+
+
+@contextmanager
+def step(name: str) -> Iterator[SpanMetrics]:
+    """Measure a collection step on the active recorder (no-op without one)."""
+    if _active is None:
+        yield SpanMetrics(name)
+        return
+    with _active.step(name) as span:
+        yield span
+
+
+@contextmanager
+def delivery(name: str) -> Iterator[SpanMetrics]:
+    if _active is None:
+        yield SpanMetrics(name)
+        return
+    with _active.delivery(name) as span:
+        yield span
+
+
+def record_response(resp, *args, retries: int | None = None, **kwargs):
+    """requests response hook feeding the active recorder (AsyncHTTP passes its own ``retries``)."""
+    if _active is not None:
+        try:
+            _active.record_response(resp, retries=retries)
+        except Exception:
+            pass
+    return resp
+
+
+def bind_context(func):
+    """Wrap ``func`` so it runs in a copy of the caller's context (for thread pools)."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(func, *args, **kwargs)
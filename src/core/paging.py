@@ -0,0 +1,84 @@
+"""Concurrent, rate-limited fetching of the remaining pages of a paginated API."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, TypeVar
+
+from src.core.metrics import bind_context
+
+T = TypeVar("T")
+
+
+class RateLimiter:
+    """Space calls at least ``1 / rate`` seconds apart across all threads (no limit if ``rate <= 0``)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def page_count(total: int, page_size: int, max_rows: int = 0) -> int:
+    """Pages needed for ``total`` rows, capped at ``max_rows`` rows when it is positive."""
+    rows = min(total, max_rows) if max_rows > 0 else total
+    return max(1, math.ceil(rows / page_size)) if page_size > 0 else 1
+
+
+def fetch_remaining_pages(
+    fetch_page: Callable[[int], T | None],
+    pages: int,
+    max_workers: int = 4,
+    rate: float = 0.0,
+) -> list[T | None]:
+    """Fetch pages ``2..pages`` concurrently and return them in page order.
+
+    Page 1 is fetched by the caller, which reads the total row count from it.
+    Requests are started no faster than ``rate`` per second and at most
+    ``max_workers`` are in flight; a page that raises is reported and comes
+    back as None so the caller can keep the pages it got.
+    """
+    numbers = list(range(2, pages + 1))
+    if not numbers:
+        return []
+    limiter = RateLimiter(rate)
+
+    def fetch(number: int) -> T | None:
+        limiter.wait()
+        try:
+            return fetch_page(number)
+        except Exception as e:
+            print(f"⚠️ 第 {number} 页获取失败，已跳过: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(numbers))), thread_name_prefix="pages") as pool:
+        # 每页各自复制调用方上下文：同一个 Context 不能在多个线程里同时进入
+        futures = [pool.submit(bind_context(fetch), number) for number in numbers]
+        return [future.result() for future in futures]
+
+
+async def afetch_remaining_pages(fetch_page: Callable[[int], Awaitable[T | None]], pages: int) -> list[T | None]:
+    """Async counterpart of ``fetch_remaining_pages``; concurrency and rate limits come from the client."""
+
+    async def fetch(number: int) -> T | None:
+        try:
+            return await fetch_page(number)
+        except Exception as e:
+            print(f"⚠️ 第 {number} 页获取失败，已跳过: {e}")
+            return None
+
+    return list(await asyncio.gather(*(fetch(number) for number in range(2, pages + 1))))
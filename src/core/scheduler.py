@@ -0,0 +1,176 @@
+"""Concurrent execution of independent collection steps with deadlines."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable
+
+FINISHED = "finished"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+
+@dataclass
+class StepOutcome:
+    name: str
+    status: str
+    elapsed: float = 0.0
+    error: str = ""
+    result: Any = None
+
+
+@dataclass
+class CollectionResult:
+    """Per-step outcomes of one scheduler run, in step order."""
+
+    outcomes: dict[str, StepOutcome] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def _names(self, status: str) -> list[str]:
+        return [name for name, outcome in self.outcomes.items() if outcome.status == status]
+
+    @property
+    def finished(self) -> list[str]:
+        return self._names(FINISHED)
+
+    @property
+    def timed_out(self) -> list[str]:
+        return self._names(TIMED_OUT)
+
+    @property
+    def failed(self) -> list[str]:
+        return self._names(FAILED)
+
+    def summary(self) -> str:
+        parts = [f"完成 {len(self.finished)}/{len(self.outcomes)}，耗时 {self.elapsed:.1f}s"]
+        if self.timed_out:
+            parts.append(f"超时: {', '.join(self.timed_out)}")
+        if self.failed:
+            parts.append(f"失败: {', '.join(self.failed)}")
+        return "；".join(parts)
+
+
+def run_steps(
+    steps: Iterable[tuple[str, Callable[..., Any]]],
+    *args: Any,
+    max_workers: int = 4,
+    step_timeout: float | None = None,
+    deadline: float | None = None,
+    label: str = "采集步骤",
+) -> CollectionResult:
+    """Run ``func(*args)`` for every ``(name, func)`` step on a thread pool.
+
+    ``step_timeout`` bounds each step from the moment it starts running and
+    ``deadline`` bounds the whole run.  Steps still running when their limit
+    passes are reported as timed out and abandoned: worker threads cannot be
+    killed, so their late results are simply ignored.  ``label`` names the
+    kind of step in log lines.
+    """
+    steps = list(steps)
+    result = CollectionResult(outcomes={name: StepOutcome(name, TIMED_OUT) for name, _ in steps})
+    started: dict[str, float] = {}
+    lock = threading.Lock()
+    run_start = time.monotonic()
+    run_deadline = run_start + deadline if deadline else None
+
+    def _call(name: str, func: Callable[..., Any]) -> Any:
+        with lock:
+            started[name] = time.monotonic()
+        return func(*args)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="collect")
+    pending: dict[Future, str] = {executor.submit(_call, name, func): name for name, func in steps}
+    try:
+        while pending:
+            now = time.monotonic()
+            limits = []
+            if run_deadline is not None:
+                limits.append(run_deadline)
+            if step_timeout:
+                with lock:
+                    limits.extend(started[name] + step_timeout for name in pending.values() if name in started)
+            timeout = max(0.0, min(limits) - now) if limits else None
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                name = pending.pop(future)
+                outcome = result.outcomes[name]
+                outcome.elapsed = now - started.get(name, now)
+                error = future.exception()
+                if error is not None:
+                    outcome.status = FAILED
+                    outcome.error = str(error)
+                    print(f"⚠️ {label}失败，已跳过: {name}; error={error}")
+                else:
+                    outcome.status = FINISHED
+                    outcome.result = future.result()
+
+            if run_deadline is not None and now >= run_deadline:
+                for future, name in pending.items():
+                    future.cancel()
+                    result.outcomes[name].elapsed = now - started.get(name, now)
+                    print(f"⚠️ {label}未在总时限内完成，已跳过: {name}")
+                pending.clear()
+                break
+
+            if step_timeout:
+                with lock:
+                    expired = [
+                        future for future, name in pending.items()
+                        if name in started and now - started[name] >= step_timeout
+                    ]
+                for future in expired:
+                    name = pending.pop(future)
+                    result.outcomes[name].elapsed = now - started[name]
+                    print(f"⚠️ {label}超时（>{step_timeout:g}s），已跳过: {name}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    result.elapsed = time.monotonic() - run_start
+    return result
+
+
+async def arun_steps(
+    steps: Iterable[tuple[str, Callable[[], Awaitable[Any]]]],
+    step_timeout: float | None = None,
+    deadline: float | None = None,
+    label: str = "采集步骤",
+) -> CollectionResult:
+    """Async counterpart of ``run_steps``: every step coroutine runs as a task on the current loop.
+
+    All steps start at once (request concurrency is bounded by the shared
+    client), so ``step_timeout`` and ``deadline`` are enforced by cancelling
+    the step's task.
+    """
+    steps = list(steps)
+    result = CollectionResult(outcomes={name: StepOutcome(name, TIMED_OUT) for name, _ in steps})
+    run_start = time.monotonic()
+
+    async def _call(name: str, func: Callable[[], Awaitable[Any]]) -> None:
+        outcome = result.outcomes[name]
+        start = time.monotonic()
+        try:
+            outcome.result = await asyncio.wait_for(func(), step_timeout or None)
+            outcome.status = FINISHED
+        except asyncio.TimeoutError:
+            print(f"⚠️ {label}超时（>{step_timeout:g}s），已跳过: {name}")
+        except Exception as error:
+            outcome.status = FAILED
+            outcome.error = str(error)
+            print(f"⚠️ {label}失败，已跳过: {name}; error={error}")
+        finally:
+            outcome.elapsed = time.monotonic() - start
+
+    tasks = {asyncio.create_task(_call(name, func)): name for name, func in steps}
+    if tasks:
+        _, pending = await asyncio.wait(list(tasks), timeout=deadline or None)
+        for task in pending:
+            task.cancel()
+            print(f"⚠️ {label}未在总时限内完成，已跳过: {tasks[task]}")
+        await asyncio.gather(*pending, return_exceptions=True)
+    result.elapsed = time.monotonic() - run_start
+    return result
@@ -0,0 +1,210 @@
+"""Resident intraday mode: per-step refresh cadences and scheduled report pushes.
+
+The daemon keeps one process alive with the shared HTTP session, the history
+store, the market data cache and a long-lived ResultRegistry.  Each collection
+step is refreshed on its own cadence from ``config.SCHEDULE_STEPS`` and the
+report is built from the latest datasets and pushed at every event in
+``config.SCHEDULE_REPORTS``; all times are in ``config.APP_TIMEZONE``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import re
+import signal
+import threading
+from dataclasses import dataclass
+
+import config
+from src.core import metrics
+
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600}
+_EVERY_RE = re.compile(r"every\s+(\d+(?:\.\d+)?)\s*([smh])(?:\s+(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2}))?")
+
+
+def _parse_time(text: str) -> datetime.time:
+    hour, minute = text.strip().split(":")
+    return datetime.time(int(hour), int(minute))
+
+
+def _timezone():
+    try:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(config.APP_TIMEZONE)
+    except Exception:
+        print(f"⚠️ 时区 {config.APP_TIMEZONE} 不可用，改用本机时区")
+        return None
+
+
+@dataclass(frozen=True)
+class Cadence:
+    """When a step or report runs: every ``interval`` seconds (optionally only
+    inside ``window``) or at fixed ``times`` of day."""
+
+    interval: float | None = None
+    window: tuple[datetime.time, datetime.time] | None = None
+    times: tuple[datetime.time, ...] = ()
+
+    @classmethod
+    def parse(cls, spec: str) -> "Cadence | None":
+        """Parse ``every 5m``, ``every 1h 09:25-15:05``, ``at 08:30,15:05`` or a bare
+        ``08:30,15:05``; ``off`` (or empty) returns None."""
+        spec = spec.strip().lower()
+        if spec in {"", "off", "never", "false"}:
+            return None
+        match = _EVERY_RE.fullmatch(spec)
+        if match:
+            value, unit, start, end = match.groups()
+            window = (_parse_time(start), _parse_time(end)) if start else None
+            return cls(interval=float(value) * _INTERVAL_UNITS[unit], window=window)
+        if spec.startswith("at "):
+            spec = spec[3:]
+        times = tuple(sorted(_parse_time(t) for t in spec.split(",") if t.strip()))
+        if not times:
+            raise ValueError(f"无法解析的调度节奏: {spec!r}")
+        return cls(times=times)
+
+    def next_after(self, now: datetime.datetime, weekdays_only: bool = False) -> datetime.datetime:
+        """The next run strictly after ``now``, skipping weekends when ``weekdays_only``."""
+        if self.interval is not None:
+            candidate = now + datetime.timedelta(seconds=self.interval)
+            start, end = self.window or (datetime.time(0, 0), None)
+            for offset in range(8):
+                day = (candidate + datetime.timedelta(days=offset)).date()
+                if weekdays_only and day.weekday() >= 5:
+                    continue
+                opens = datetime.datetime.combine(day, start, tzinfo=now.tzinfo)
+                closes = (datetime.datetime.combine(day, end, tzinfo=now.tzinfo)
+                          if end else opens + datetime.timedelta(days=1))
+                if offset == 0 and opens <= candidate < closes:
+                    return candidate
+                if opens >= candidate:
+                    return opens
+            return candidate
+        for offset in range(8):
+            day = now.date() + datetime.timedelta(days=offset)
+            if weekdays_only and day.weekday() >= 5:
+                continue
+            for t in self.times:
+                when = datetime.datetime.combine(day, t, tzinfo=now.tzinfo)
+                if when > now:
+                    return when
+        raise ValueError("调度节奏没有可用的时间点")
+
+
+class Daemon:
+    """Refresh collection steps on their cadences and push reports on schedule.
+
+    Due steps of one tick run together through ``run_collection_steps`` (so
+    the quote groups due at the same time share one download) and their
+    datasets replace the previous ones in the registry; a failed refresh keeps
+    the last good dataset.  Each report event closes the current run record
+    (``<state_dir>/runs``) and starts a new one.
+    """
+
+    def __init__(self, tick: float | None = None, weekdays_only: bool | None = None):
+        from src.core.http import get_session
+        from src.data import fetcher
+        from src.data.registry import ResultRegistry
+
+        self._fetcher = fetcher
+        self.tick = tick or config.SCHEDULE_TICK
+        self.weekdays_only = config.SCHEDULE_WEEKDAYS_ONLY if weekdays_only is None else weekdays_only
+        self.tz = _timezone()
+        self.registry = ResultRegistry()
+        self.store, self.cache = fetcher.open_stores()
+        self.stop_event = threading.Event()
+        get_session()
+
+        step_names = [name for name, _, _ in fetcher.build_collection_steps()]
+        self.step_cadences = {}
+        for name in step_names:
+            cadence = Cadence.parse(config.SCHEDULE_STEPS.get(name, config.SCHEDULE_DEFAULT))
+            if cadence is not None:
+                self.step_cadences[name] = cadence
+        unknown = set(config.SCHEDULE_STEPS) - set(step_names) - set(config.COLLECT_SKIP)
+        if unknown:
+            print(f"⚠️ 调度配置中的未知步骤已忽略: {', '.join(sorted(unknown))}")
+        self.report_cadences = {}
+        for event, spec in config.SCHEDULE_REPORTS.items():
+            cadence = Cadence.parse(spec)
+            if cadence is not None:
+                self.report_cadences[event] = cadence
+        self.next_step_run: dict[str, datetime.datetime] = {}
+        self.next_report: dict[str, datetime.datetime] = {}
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now(self.tz)
+
+    def stop(self, *_args) -> None:
+        print("🛑 收到退出信号，当前任务结束后退出")
+        self.stop_event.set()
+
+    # ---- jobs ----
+    def collect(self, names: list[str]) -> None:
+        steps = self._fetcher.build_collection_steps(
+            store=self.store, cache=self.cache, only=set(names), refresh=True
+        )
+        self._fetcher.run_collection_steps(steps, registry=self.registry)
+
+    def report(self, event: str) -> None:
+        from src.app import write_run_record
+        from src.execution.delivery import deliver_report
+
+        stamp = self.now().strftime("%Y-%m-%d %H:%M")
+        print(f"📝 {event}报告 {stamp}")
+        recorder = metrics.active()
+        try:
+            with recorder.profiled() if recorder else contextlib.nullcontext():
+                report_md = self._fetcher.build_report_markdown(self.registry)
+            deliver_report(report_md, title=f"{config.REPORT_TITLE}（{event} {stamp}）")
+        except Exception as e:
+            print(f"⚠️ {event}报告生成或推送失败，已跳过: {e}")
+        if recorder is not None:
+            write_run_record(recorder, None)
+        metrics.start_run()
+
+    # ---- loop ----
+    def run(self) -> None:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                signal.signal(sig, self.stop)
+            except ValueError:
+                pass  # 非主线程无法注册信号处理
+        metrics.start_run()
+        # 启动时完整采集一次，保证第一份报告就有全部数据
+        print(f"🚀 常驻模式启动（{config.APP_TIMEZONE}），预热 {len(self.step_cadences)} 个采集步骤")
+        self.collect(list(self.step_cadences))
+        now = self.now()
+        self.next_step_run = {
+            name: cadence.next_after(now, self.weekdays_only) for name, cadence in self.step_cadences.items()
+        }
+        self.next_report = {
+            event: cadence.next_after(now, self.weekdays_only) for event, cadence in self.report_cadences.items()
+        }
+        while not self.stop_event.is_set():
+            now = self.now()
+            due = [name for name, when in self.next_step_run.items() if when <= now]
+            if due:
+                self.collect(due)
+                now = self.now()
+                for name in due:
+                    self.next_step_run[name] = self.step_cadences[name].next_after(now, self.weekdays_only)
+            for event, when in list(self.next_report.items()):
+                if when <= now and not self.stop_event.is_set():
+                    self.report(event)
+                    self.next_report[event] = self.report_cadences[event].next_after(self.now(), self.weekdays_only)
+            upcoming = min([*self.next_step_run.values(), *self.next_report.values()], default=None)
+            wait = self.tick if upcoming is None else (upcoming - self.now()).total_seconds()
+            self.stop_event.wait(max(0.0, min(wait, self.tick)))
+        print("👋 常驻模式已退出")
+
+
+def run_daemon(tick: float | None = None) -> None:
+    """Entry for ``main.py --daemon``."""
+    import urllib3
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    Daemon(tick=tick).run()
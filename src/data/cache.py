@@ -0,0 +1,202 @@
+"""Persistent on-disk cache of collected market data frames."""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import os
+import threading
+import time
+from typing import Iterable
+
+import pandas as pd
+
+from src.core.jsonfile import read_json, update_json
+
+# 各市场常规交易时段（当地时区）；行情在开盘与收盘之间会变化，收盘价在下次开盘前不变
+MARKET_SESSIONS: dict[str, tuple[str, datetime.time, datetime.time]] = {
+    "US": ("America/New_York", datetime.time(9, 30), datetime.time(16, 0)),
+    "HK": ("Asia/Hong_Kong", datetime.time(9, 30), datetime.time(16, 0)),
+    "CN": ("Asia/Shanghai", datetime.time(9, 30), datetime.time(15, 0)),
+}
+ALL_MARKETS = tuple(MARKET_SESSIONS)
+
+# 各数据源缓存有效期：秒数，或市场名元组（有效到这些市场中最近的一次开盘或收盘）
+SOURCE_TTLS: dict[str, float | tuple[str, ...]] = {
+    "港股与中概股行情": ("HK", "US"),
+    "美股主要指数/科技股/中概ETF": ("US",),
+    "大宗商品/期货/外汇": ("US",),
+    "全球ETF资金流": ("US",),
+    "国际主要指数": ALL_MARKETS,
+    "技术指标": ALL_MARKETS,
+    "资产相关性": ALL_MARKETS,
+    "全球主要利率": 6 * 3600,
+    "美股盘前异动榜": 15 * 60,
+    "同花顺涨停雷达": 5 * 60,
+    "东方财富主力资金流向": 5 * 60,
+    "微博热搜榜": 10 * 60,
+    "雪球热词": 30 * 60,
+}
+DEFAULT_TTL = 15 * 60
+
+
+def trading_date(tz_name: str = "Asia/Shanghai") -> str:
+    """Today's date in the market timezone, used as the cache date key."""
+    try:
+        from zoneinfo import ZoneInfo
+
+        return datetime.datetime.now(ZoneInfo(tz_name)).date().isoformat()
+    except Exception:
+        return datetime.date.today().isoformat()
+
+
+def _zone(tz_name: str):
+    try:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(tz_name)
+    except Exception:
+        return None  # 没有时区数据时按本机时间计算
+
+
+def next_session_boundary(markets: Iterable[str], after: float) -> float:
+    """Epoch time of the first regular-session open or close of ``markets`` after ``after``.
+
+    Weekends are skipped; holidays are not known, so an entry may expire at a
+    boundary where nothing trades, which only costs one extra download.
+    """
+    boundaries = []
+    for market in markets:
+        tz_name, opens, closes = MARKET_SESSIONS[market]
+        tz = _zone(tz_name)
+        start = datetime.datetime.fromtimestamp(after, tz)
+        for offset in range(8):
+            day = start.date() + datetime.timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            moments = [datetime.datetime.combine(day, t, tzinfo=tz).timestamp() for t in (opens, closes)]
+            later = [moment for moment in moments if moment > after]
+            if later:
+                boundaries.append(later[0])
+                break
+    return min(boundaries, default=float("inf"))
+
+
+def is_expired(created: float, ttl: float | tuple[str, ...] | None, now: float | None = None) -> bool:
+    """Whether an entry created at ``created`` is stale under ``ttl`` (see ``SOURCE_TTLS``; None never expires)."""
+    now = time.time() if now is None else now
+    if ttl is None:
+        return False
+    if isinstance(ttl, tuple):
+        return now >= next_session_boundary(ttl, created)
+    return now - created > ttl
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class MarketDataCache:
+    """DataFrames keyed by (source, ticker set, trading date) with TTL and LRU eviction.
+
+    Frames are pickled so dtypes survive the round trip.  ``index.json`` under
+    ``root`` tracks size, creation and last access time of every entry; once
+    the total size exceeds ``max_bytes`` the least recently used entries are
+    removed.  Several processes may share ``root``: reads never rewrite the
+    index (access times are kept in memory and written with the next ``put``),
+    and ``put`` merges its changes into the on-disk index under a lock file.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 200 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, "index.json")
+        os.makedirs(root, exist_ok=True)
+        self._index: dict[str, dict] = read_json(self._index_path)
+        self._touched: dict[str, float] = {}
+
+    @staticmethod
+    def _series(source: str, tickers: Iterable[str]) -> str:
+        return _digest(source, ",".join(sorted(tickers)))
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, self._index[key]["file"])
+
+    @staticmethod
+    def _read(path: str) -> pd.DataFrame | None:
+        try:
+            return pd.read_pickle(path)
+        except Exception:
+            return None
+
+    def get(self, source: str, tickers: Iterable[str], date: str,
+            ttl: float | tuple[str, ...] | None = DEFAULT_TTL) -> pd.DataFrame | None:
+        """Return the cached frame for a fresh entry (see ``is_expired``), or ``None``."""
+        key = _digest(self._series(source, tickers), date)
+        with self._lock:
+            if key not in self._index:
+                # 其他工作进程可能刚写入这个条目
+                self._index = read_json(self._index_path)
+            entry = self._index.get(key)
+            if not entry or not os.path.exists(self._entry_path(key)):
+                return None
+            if is_expired(entry["created"], ttl):
+                return None
+            self._touched[key] = time.time()
+            path = self._entry_path(key)
+        return self._read(path)
+
+    def latest(self, source: str, tickers: Iterable[str]) -> pd.DataFrame | None:
+        """Return the most recent entry for a source regardless of date or TTL."""
+        series = self._series(source, tickers)
+        with self._lock:
+            self._index = read_json(self._index_path)
+            candidates = [
+                (entry["date"], entry["created"], key) for key, entry in self._index.items()
+                if entry.get("series") == series and os.path.exists(self._entry_path(key))
+            ]
+            if not candidates:
+                return None
+            key = max(candidates)[2]
+            self._touched[key] = time.time()
+            path = self._entry_path(key)
+        return self._read(path)
+
+    def put(self, source: str, tickers: Iterable[str], date: str, df: pd.DataFrame) -> None:
+        """Store ``df`` under (source, tickers, date)."""
+        series = self._series(source, tickers)
+        key = _digest(series, date)
+        file_name = key + ".pkl"
+        path = os.path.join(self.root, file_name)
+        df.to_pickle(path)
+        now = time.time()
+        entry = {
+            "source": source, "series": series, "date": date, "file": file_name,
+            "size": os.path.getsize(path), "created": now, "accessed": now,
+        }
+
+        def merge(index: dict[str, dict]) -> dict[str, dict]:
+            # 以磁盘上的索引为准（含其他进程的条目），只叠加本进程的新条目和访问时间
+            for touched, accessed in self._touched.items():
+                if touched in index:
+                    index[touched]["accessed"] = max(index[touched]["accessed"], accessed)
+            index[key] = entry
+            self._evict(index)
+            return index
+
+        with self._lock:
+            self._index = update_json(self._index_path, merge)
+            self._touched.clear()
+
+    def _evict(self, index: dict[str, dict]) -> None:
+        total = sum(entry["size"] for entry in index.values())
+        for key, entry in sorted(index.items(), key=lambda item: item[1]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del index[key]
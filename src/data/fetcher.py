@@ -1,470 +1,839 @@
 # data_fetcher.py
 
+import asyncio
+import functools
+import io
 import os
 import datetime
-import tempfile
 import pandas as pd
-import requests
 import time
 
+import config
+from src.core import extract, metrics
+from src.core.aio import AsyncHTTP, available as aio_available
+from src.core.conditional import PASSTHROUGH, get_memo
+from src.core.hedge import HostHealth, ahedged_get, hedged_get
+from src.core.http import get_session
+from src.core.paging import RateLimiter, afetch_remaining_pages, fetch_remaining_pages, page_count
+from src.core.scheduler import arun_steps, run_steps
+from src.data.cache import ALL_MARKETS, DEFAULT_TTL, SOURCE_TTLS, MarketDataCache, trading_date
+from src.data.history import HistoryStore
+from src.data.indicators import indicator_table, top_correlations
+from src.data.keywords import get_automaton
+from src.data.merge import stream_merge_csvs, stream_merge_to_excel
+from src.data.registry import ResultRegistry
+from src.data.schema import FORMATS, apply_schema, read_dataset
+from src.data.quotes import (
+    QUOTE_GROUPS, QuoteBatch, code_names, download_closes, normalize_quotes, unique_codes, watchlist_groups,
+)
+
+
+def _group_closes(group, quotes):
+    """Return pre-fetched closes, or batch-download just this group's tickers."""
+    if quotes is not None:
+        return quotes
+    return download_closes(QUOTE_GROUPS.get(group, {}).values())
+
+
+def _quote_group(group, quotes=None, **kwargs):
+    closes = _group_closes(group, quotes)
+    return normalize_quotes(closes, QUOTE_GROUPS.get(group, {}), **kwargs)
+
 # ========== 0. Yahoo指数采集 ==========
-def fetch_yahoo_indices(output_dir):
+def fetch_yahoo_indices(quotes=None):
     try:
-        import yfinance as yf
+        import yfinance  # noqa: F401
     except ImportError:
         print("未安装 yfinance，无法采集Yahoo指数。")
-        return False
-    index_codes = {
-        "上证指数": "000001.SS",
-        "深证成指": "399001.SZ",
-        "创业板指": "399006.SZ"
-    }
-    result = []
-    for name, code in index_codes.items():
-        try:
-            df = yf.download(code, period="2d", interval="1d", progress=False, auto_adjust=False)
-            if df.empty or len(df) == 0:
-                print(f"{name} 无数据")
-                continue
-            closes = df["Close"]
-            if len(closes) == 1:
-                latest_value = closes.iloc[-1]
-                latest_date = closes.index[-1]
-                pct_chg = "-"
-            else:
-                latest_value = closes.iloc[-1]
-                latest_date = closes.index[-1]
-                prev_value = closes.iloc[-2]
-                latest_value = latest_value.iloc[0] if hasattr(latest_value, "iloc") else latest_value
-                prev_value = prev_value.iloc[0] if hasattr(prev_value, "iloc") else prev_value
-                pct_chg = (float(latest_value) - float(prev_value)) / float(prev_value) * 100
-                pct_chg = f"{pct_chg:.2f}%"
-            latest_value = latest_value.iloc[0] if hasattr(latest_value, "iloc") else latest_value
-            result.append({
-                "指数": name,
-                "收盘点位": round(float(latest_value), 2),
-                "涨跌幅": pct_chg,
-                "日期": str(latest_date)[:10]
-            })
-        except Exception as e:
-            print(f"采集{name}失败: {e}")
-    df_out = pd.DataFrame(result)
-    out_path = os.path.join(output_dir, "指数.csv")
-    df_out.to_csv(out_path, index=False, encoding="utf-8-sig")
-    print(f"✅ Yahoo指数收盘数据写入 {out_path}")
-    return True
+        return None
+    df_out = _quote_group("指数", quotes, with_date=True)
+    for name in QUOTE_GROUPS.get("指数", {}):
+        if name not in set(df_out["名称"]):
+            print(f"{name} 无数据")
+    return df_out.drop(columns="代码").rename(columns={"名称": "指数", "收盘": "收盘点位"})
 
 # ==== 1. 港股与中概股行情 ====
-def fetch_hk_and_china_stocks(output_dir):
-    import yfinance as yf
-    tickers = {
-        "腾讯控股": "0700.HK",
-        "阿里巴巴": "9988.HK",
-        "比亚迪": "1211.HK",
-        "KWEB中概ETF": "KWEB"
-    }
-    result = []
-    for name, code in tickers.items():
-        df = yf.download(code, period="2d", interval="1d", progress=False, auto_adjust=False)
-        if not df.empty:
-            close_col = df["Close"]
-            latest_raw = close_col.iloc[-1]
-            latest_value = float(latest_raw.item() if hasattr(latest_raw, "item") else latest_raw)
-            if len(close_col) > 1:
-                prev_raw = close_col.iloc[-2]
-                prev_value = float(prev_raw.item() if hasattr(prev_raw, "item") else prev_raw)
-            else:
-                prev_value = latest_value
-            if prev_value != 0:
-                pct_chg = (latest_value - prev_value) / prev_value * 100
-                pct_chg = f"{pct_chg:.2f}%"
-            else:
-                pct_chg = "0.00%"
-            result.append({
-                "名称": name, "代码": code,
-                "收盘": round(latest_value, 2),
-                "涨跌幅": pct_chg
-            })
-    pd.DataFrame(result).to_csv(f"{output_dir}/港股与中概股行情.csv", index=False)
+def fetch_hk_and_china_stocks(quotes=None):
+    return _quote_group("港股与中概股行情", quotes)
 
 # ==== 2. 美股主要指数/科技股/中概ETF ====
-def fetch_us_indexes_etf(output_dir):
-    import yfinance as yf
-    tickers = {
-        "纳斯达克": "^IXIC",
-        "标普500": "^GSPC",
-        "道琼斯": "^DJI",
-        "特斯拉": "TSLA",
-        "苹果": "AAPL",
-        "KWEB": "KWEB"
-    }
-    result = []
-    for name, code in tickers.items():
-        df = yf.download(code, period="2d", interval="1d", progress=False, auto_adjust=False)
-        if not df.empty:
-            close_col = df["Close"]
-            latest_value = close_col.iloc[-1].item() if hasattr(close_col.iloc[-1], "item") else float(close_col.iloc[-1])
-            if len(close_col) > 1:
-                prev_value = close_col.iloc[-2].item() if hasattr(close_col.iloc[-2], "item") else float(close_col.iloc[-2])
-            else:
-                prev_value = latest_value
-            if prev_value != 0:
-                pct_chg = (latest_value - prev_value) / prev_value * 100
-                pct_chg = f"{pct_chg:.2f}%"
-            else:
-                pct_chg = "0.00%"
-            result.append({
-                "名称": name, "代码": code,
-                "收盘": round(latest_value, 2),
-                "涨跌幅": pct_chg
-            })
-    pd.DataFrame(result).to_csv(f"{output_dir}/美股主要指数.csv", index=False)
+def fetch_us_indexes_etf(quotes=None):
+    return _quote_group("美股主要指数", quotes)
 
 # ==== 3. 大宗商品/期货/外汇 ====
-def fetch_commodities_fx(output_dir):
-    import yfinance as yf
-    tickers = {
-        "黄金": "GC=F",
-        "原油": "CL=F",
-        "铜": "HG=F",
-        "布伦特原油": "BZ=F", 
-        "美元指数": "DX-Y.NYB",
-        "离岸人民币": "CNH=X"
-    }
-    result = []
-    for name, code in tickers.items():
-        df = yf.download(code, period="2d", interval="1d", progress=False, auto_adjust=False)
-        if not df.empty:
-            latest = df["Close"].iloc[-1]
-            prev = df["Close"].iloc[-2] if len(df) > 1 else latest
-            latest_val = float(latest.item() if hasattr(latest, "item") else latest)
-            prev_val = float(prev.item() if hasattr(prev, "item") else prev)
-            if prev_val != 0:
-                pct_chg = (latest_val - prev_val) / prev_val * 100
-                pct_chg_str = f"{pct_chg:.2f}%"
-            else:
-                pct_chg_str = "0.00%"
-            result.append({
-                "名称": name, "代码": code,
-                "收盘": round(latest_val, 2),
-                "涨跌幅": pct_chg_str
-            })
-    pd.DataFrame(result).to_csv(f"{output_dir}/期货外汇.csv", index=False)
+def fetch_commodities_fx(quotes=None):
+    return _quote_group("期货外汇", quotes)
 
 # ==== 4. 全球ETF资金流 ====
-def fetch_global_etf(output_dir):
-    import yfinance as yf
-    tickers = {
-        "A股ETF-ASHR": "ASHR",
-        "中概ETF-KWEB": "KWEB",
-        "恒生ETF-EWH": "EWH"
-    }
-    result = []
-    for name, code in tickers.items():
-        df = yf.download(code, period="2d", interval="1d", progress=False, auto_adjust=False)
-        if not df.empty:
-            latest = df["Close"].iloc[-1]
-            prev = df["Close"].iloc[-2] if len(df) > 1 else latest
-            latest_val = float(latest.item() if hasattr(latest, "item") else latest)
-            prev_val = float(prev.item() if hasattr(prev, "item") else prev)
-            if prev_val != 0:
-                pct_chg = (latest_val - prev_val) / prev_val * 100
-                pct_chg_str = f"{pct_chg:.2f}%"
-            else:
-                pct_chg_str = "0.00%"
-            result.append({
-                "名称": name, "代码": code,
-                "收盘": round(latest_val, 2),
-                "涨跌幅": pct_chg_str
-            })
-    pd.DataFrame(result).to_csv(f"{output_dir}/全球ETF资金流.csv", index=False)
+def fetch_global_etf(quotes=None):
+    return _quote_group("全球ETF资金流", quotes)
+
+# ==== 4b. 自选行情分组（config/watchlists.yaml 中内置分组以外的分组）====
+def fetch_watchlist(group, quotes=None):
+    df = _quote_group(group, quotes)
+    return df.sort_values("涨跌幅", ascending=False, na_position="last").reset_index(drop=True)
+
+# ==== 4c. 技术指标与资产相关性（全部行情代码的多年日K线，日期 x 代码二维数组上向量化计算）====
+def fetch_technical_indicators(panel=None):
+    if not panel or panel["close"].empty:
+        return None
+    return indicator_table(panel, code_names())
+
+
+def fetch_asset_correlations(panel=None):
+    if not panel or panel["close"].empty:
+        return None
+    return top_correlations(panel, code_names(), window=config.CORRELATION_WINDOW)
+
+# 每个 HTTP 数据源拆成“请求 + 解析”：解析函数只依赖响应的 status_code/text/json()，
+# 同步（requests）与异步（src.core.aio）两条采集路径共用同一套解析逻辑；
+# 内容少变的页面经 get_memo() 发送条件请求，304 或内容哈希未变时直接复用上次的解析结果
 
 # ==== 5. 全球主要利率/中美利差 ====
-def fetch_global_rates_macro(output_dir):
-    url = "https://tradingeconomics.com/united-states/interest-rate"
+RATES_URL = "https://tradingeconomics.com/united-states/interest-rate"
+
+
+RATES_SPAN_CLASS = "datatable-item datatable-item-last"
+
+
+def _parse_rates(resp):
     rate = "N/A"
-    try:
-        resp = requests.get(url, timeout=15)
-        if resp.ok:
-            try:
+    if resp.status_code == 200:
+        try:
+            if extract.available():
+                # 流式解析，读到目标 span 即停止，不构建整页的树
+                rate = extract.element_text(resp.text, "span", RATES_SPAN_CLASS) or rate
+            else:
                 from bs4 import BeautifulSoup
                 soup = BeautifulSoup(resp.text, "html.parser")
-                rate_span = soup.find("span", {"class": "datatable-item datatable-item-last"})
+                rate_span = soup.find("span", {"class": RATES_SPAN_CLASS})
                 if rate_span:
                     rate = rate_span.text.strip()
-            except Exception:
-                pass
+        except Exception:
+            pass
+    if rate == "N/A":
+        return None
+    return pd.DataFrame([{"美国基准利率": rate}])
+
+
+def fetch_global_rates_macro(session=None):
+    session = session or get_session()
+    try:
+        resp = session.get(RATES_URL, headers=get_memo().headers(RATES_URL), timeout=15)
+        return get_memo().parse(RATES_URL, resp, _parse_rates)
     except Exception as e:
         print(f"⚠️ 全球主要利率采集失败: {e}")
-    pd.DataFrame([{"美国基准利率": rate}]).to_csv(f"{output_dir}/全球主要利率.csv", index=False)
+    return None
+
+
+async def afetch_global_rates_macro(http):
+    try:
+        resp = await http.get(RATES_URL, headers=get_memo().headers(RATES_URL))
+        return get_memo().parse(RATES_URL, resp, _parse_rates)
+    except Exception as e:
+        print(f"⚠️ 全球主要利率采集失败: {e}")
+    return None
 
 # ==== 6. 美股盘前异动榜 ====
-def fetch_us_premarket_movers(output_dir):
-    url = "https://finviz.com/premarket.ashx"
-    df = pd.DataFrame()
+PREMARKET_URL = "https://finviz.com/premarket.ashx"
+
+
+def _parse_premarket(resp):
+    if resp.status_code != 200:
+        return pd.DataFrame()
+    if extract.available():
+        # 只把第 3 个表格转换成 DataFrame，读到它的结束标签就停止解析
+        return extract.nth_table(resp.text, 2)
+    return pd.read_html(io.StringIO(resp.text))[2]
+
+
+def fetch_us_premarket_movers(session=None):
+    session = session or get_session()
+    try:
+        resp = session.get(PREMARKET_URL, headers=get_memo().headers(PREMARKET_URL), timeout=15)
+        return get_memo().parse(PREMARKET_URL, resp, _parse_premarket)
+    except Exception as e:
+        print(f"⚠️ 美股盘前异动榜采集失败: {e}")
+    return pd.DataFrame()
+
+
+async def afetch_us_premarket_movers(http):
     try:
-        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
-        if resp.ok:
-            df = pd.read_html(resp.text)[2]
+        resp = await http.get(PREMARKET_URL, headers=get_memo().headers(PREMARKET_URL))
+        return get_memo().parse(PREMARKET_URL, resp, _parse_premarket)
     except Exception as e:
         print(f"⚠️ 美股盘前异动榜采集失败: {e}")
-    df.to_csv(f"{output_dir}/美股盘前异动榜.csv", index=False)
+    return pd.DataFrame()
 
 # ==== 7. 国际主要指数 ====
-def fetch_international_indexes(output_dir):
-    import yfinance as yf
-    tickers = {
-        "恒生指数": "^HSI",
-        "新加坡STI": "^STI",
-        "日经225": "^N225",
-        "富时A50": "XCHA.DE",
-        "德国DAX": "^GDAXI"
-    }
-    result = []
-    for name, code in tickers.items():
-        try:
-            df = yf.download(code, period="2d", interval="1d", progress=False, auto_adjust=False)
-            if not df.empty:
-                latest = df["Close"].iloc[-1]
-                prev = df["Close"].iloc[-2] if len(df) > 1 else latest
-                latest_val = float(latest.item() if hasattr(latest, "item") else latest)
-                prev_val = float(prev.item() if hasattr(prev, "item") else prev)
-                if prev_val != 0:
-                    pct_chg = (latest_val - prev_val) / prev_val * 100
-                    pct_chg_str = f"{pct_chg:.2f}%"
-                else:
-                    pct_chg_str = "0.00%"
-                result.append({
-                    "名称": name, "代码": code,
-                    "收盘": round(latest_val, 2),
-                    "涨跌幅": pct_chg_str
-                })
-        except Exception:
-            continue
-    pd.DataFrame(result).to_csv(f"{output_dir}/主要指数.csv", index=False)
+def fetch_international_indexes(quotes=None):
+    try:
+        closes = _group_closes("主要指数", quotes)
+    except Exception:
+        closes = pd.DataFrame()
+    return _quote_group("主要指数", closes)
 
 # ==== 8. 同花顺“涨停雷达” ====
-def fetch_tonghuashun_limit_up(output_dir):
+TONGHUASHUN_URL = "https://data.10jqka.com.cn/dataapi/limit_up/limit_up_pool"
+
+
+def _limit_up_params(page):
+    return {"page": page, "limit": config.TONGHUASHUN_PAGE_SIZE, "_": int(time.time() * 1000)}
+
+
+def _limit_up_page(res):
+    if res.status_code != 200:
+        return None
+    data = res.json()
+    if isinstance(data, dict) and isinstance(data.get("data"), dict) and "info" in data["data"]:
+        return data["data"]
+    return None
+
+
+def _limit_up_pages(first):
+    total = int((first.get("page") or {}).get("total") or len(first["info"]))
+    return page_count(total, config.TONGHUASHUN_PAGE_SIZE, config.TONGHUASHUN_MAX_ROWS)
+
+
+def _limit_up_frame(pages):
+    info = [row for page in pages if page for row in page["info"]]
+    if config.TONGHUASHUN_MAX_ROWS > 0:
+        info = info[:config.TONGHUASHUN_MAX_ROWS]
+    df = pd.DataFrame(info)
+    if df.empty:
+        return None
+    # 采集时按声明的列类型转换一次（见 src/data/schema.py）
+    return apply_schema("同花顺涨停雷", df)
+
+
+def fetch_tonghuashun_limit_up(session=None):
+    # 首页读取 data.page.total，其余页并发限速拉取后按页序合并
+    session = session or get_session()
+
+    def get_page(page):
+        return _limit_up_page(session.get(TONGHUASHUN_URL, params=_limit_up_params(page), timeout=15))
+
     try:
-        url = "https://data.10jqka.com.cn/dataapi/limit_up/limit_up_pool"
-        headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"}
-        params = {"page": 1, "limit": 50, "_": int(time.time() * 1000)}
-        res = requests.get(url, headers=headers, params=params, timeout=15)
-        if res.status_code == 200:
-            data = res.json()
-            if isinstance(data, dict) and "data" in data and "info" in data["data"]:
-                df = pd.DataFrame(data["data"]["info"])
-                if not df.empty:
-                    df.to_csv(f"{output_dir}/同花顺涨停雷.csv", index=False)
+        first = get_page(1)
+        if not first:
+            return None
+        rest = fetch_remaining_pages(get_page, _limit_up_pages(first), config.PAGE_WORKERS, config.PAGE_RATE)
+        return _limit_up_frame([first, *rest])
     except Exception:
         pass
+    return None
+
+
+async def afetch_tonghuashun_limit_up(http):
+    async def get_page(page):
+        return _limit_up_page(await http.get(TONGHUASHUN_URL, params=_limit_up_params(page)))
+
+    try:
+        first = await get_page(1)
+        if not first:
+            return None
+        rest = await afetch_remaining_pages(get_page, _limit_up_pages(first))
+        return _limit_up_frame([first, *rest])
+    except Exception:
+        pass
+    return None
 
 # ==== 9. 东方财富主力资金流向 ====
-def fetch_eastmoney_fund_flow(output_dir):
+EASTMONEY_MIRRORS = [
+    "https://push2.eastmoney.com",
+    "https://push2delay.eastmoney.com",
+    "http://push2.eastmoney.com",
+    "http://push2delay.eastmoney.com",
+]
+EASTMONEY_COLUMNS = {
+    "f12": "代码","f14": "名称","f2": "最新价","f3": "涨跌幅",
+    "f62": "主力净流入","f66": "超大单净流入","f69": "大单净流入",
+    "f75": "中单净流入","f78": "小单净流入"
+}
+
+
+def _eastmoney_params(page=1):
+    return {
+        "pn": str(page),"pz": str(config.EASTMONEY_PAGE_SIZE),"po": "1","np": "1",
+        "ut": "b2884a393a59ad64002292a3e90d46a5","fltt": "2","invt": "2",
+        "fid": "f62","fs": "m:0+t:6,m:0+t:13,m:0+t:80,m:1+t:2,m:1+t:23",
+        "fields": "f12,f14,f2,f3,f62,f184,f66,f69,f72,f75,f78,f81,f84,f87",
+        "_": int(time.time() * 1000)
+    }
+
+
+def _eastmoney_urls():
+    return [f"{base_url}/api/qt/clist/get" for base_url in EASTMONEY_MIRRORS]
+
+
+def _eastmoney_health():
+    return HostHealth(os.path.join(config.STATE_DIR, "host_health.json"))
+
+
+def _eastmoney_page(res):
+    if res.status_code != 200:
+        return None
+    data = res.json()
+    if data.get("data") and data["data"].get("diff"):
+        return data["data"]
+    return None
+
+
+def _eastmoney_pages(first):
+    return page_count(int(first.get("total") or len(first["diff"])), config.EASTMONEY_PAGE_SIZE,
+                      config.EASTMONEY_MAX_ROWS)
+
+
+def _eastmoney_frame(pages):
+    diff = [row for page in pages if page for row in page["diff"]]
+    if config.EASTMONEY_MAX_ROWS > 0:
+        diff = diff[:config.EASTMONEY_MAX_ROWS]
+    df = pd.DataFrame(diff)
+    if df.empty:
+        return None
+    df = df.rename(columns=EASTMONEY_COLUMNS)[list(EASTMONEY_COLUMNS.values())]
+    return apply_schema("东方财富主力资金流向", df)
+
+
+def fetch_eastmoney_fund_flow(session=None):
+    # 首页：镜像按历史健康度排序并对冲请求，首个镜像超过 hedge_delay 未返回就并发请求下一个；
+    # 其余页：从胜出的镜像按 total 并发限速拉取，结果按页序（即主力净流入排名）合并
+    session = session or get_session()
     try:
-        base_urls = [
-            "https://push2.eastmoney.com",
-            "https://push2delay.eastmoney.com",
-            "http://push2.eastmoney.com",
-            "http://push2delay.eastmoney.com"
-        ]
-        headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"}
-        params = {
-            "pn": "1","pz": "100","po": "1","np": "1",
-            "ut": "b2884a393a59ad64002292a3e90d46a5","fltt": "2","invt": "2",
-            "fid": "f62","fs": "m:0+t:6,m:0+t:13,m:0+t:80,m:1+t:2,m:1+t:23",
-            "fields": "f12,f14,f2,f3,f62,f184,f66,f69,f72,f75,f78,f81,f84,f87",
-            "_": int(time.time() * 1000)
-        }
-        for base_url in base_urls:
-            try:
-                url = f"{base_url}/api/qt/clist/get"
-                res = requests.get(url, params=params, headers=headers, timeout=15, verify=False)
-                if res.status_code == 200:
-                    data = res.json()
-                    if data.get("data") and data["data"].get("diff"):
-                        df = pd.DataFrame(data["data"]["diff"])
-                        if not df.empty:
-                            columns_map = {
-                                "f12": "代码","f14": "名称","f2": "最新价","f3": "涨跌幅",
-                                "f62": "主力净流入","f66": "超大单净流入","f69": "大单净流入",
-                                "f75": "中单净流入","f78": "小单净流入"
-                            }
-                            df = df.rename(columns=columns_map)
-                            df = df[list(columns_map.values())]
-                            df.to_csv(f"{output_dir}/东方财富主力资金流向.csv", index=False)
-                            return True
-            except Exception:
-                continue
+        first, url = hedged_get(
+            _eastmoney_urls(), _eastmoney_page, session,
+            hedge_delay=config.HTTP_HEDGE_DELAY, health=_eastmoney_health(),
+            params=_eastmoney_params(), timeout=15, verify=False,
+        )
+        if not first:
+            return None
+
+        def get_page(page):
+            return _eastmoney_page(session.get(url, params=_eastmoney_params(page), timeout=15, verify=False))
+
+        rest = fetch_remaining_pages(get_page, _eastmoney_pages(first), config.PAGE_WORKERS, config.PAGE_RATE)
+        return _eastmoney_frame([first, *rest])
+    except Exception:
+        pass
+    return None
+
+
+async def afetch_eastmoney_fund_flow(http):
+    try:
+        params = _eastmoney_params()
+        first, url = await ahedged_get(
+            _eastmoney_urls(), _eastmoney_page, lambda mirror: http.get(mirror, params=params, verify=False),
+            hedge_delay=config.HTTP_HEDGE_DELAY, health=_eastmoney_health(),
+        )
+        if not first:
+            return None
+
+        async def get_page(page):
+            return _eastmoney_page(await http.get(url, params=_eastmoney_params(page), verify=False))
+
+        rest = await afetch_remaining_pages(get_page, _eastmoney_pages(first))
+        return _eastmoney_frame([first, *rest])
     except Exception:
         pass
+    return None
 
 # ==== 10. 微博热搜榜 ====
-def fetch_weibo_hot_search(output_dir):
+WEIBO_URL = "https://weibo.com/ajax/statuses/hot_band"
+WEIBO_HEADERS = {"Referer": "https://s.weibo.com/top/summary"}
+
+
+def _parse_weibo(res):
+    data = res.json()
+    if "data" in data and "band_list" in data["data"]:
+        hot_list = data["data"]["band_list"]
+        hot_words = [item["word"] for item in hot_list if "word" in item]
+        df = pd.DataFrame({"热搜词": hot_words})
+        if not df.empty:
+            return df
+    return None
+
+
+def _tag_topics(df):
+    # 关键词在解析之后再标注：关键词表更新后，复用的解析结果也能用上新词
+    if df is None:
+        return None
+    automaton = get_automaton()
+    return df.assign(关键词=[", ".join(automaton.matches(word)) for word in df["热搜词"]])
+
+
+def fetch_weibo_hot_search(session=None):
+    session = session or get_session()
     try:
-        url = "https://weibo.com/ajax/statuses/hot_band"
-        headers = {"User-Agent": "Mozilla/5.0", "Referer": "https://s.weibo.com/top/summary"}
-        res = requests.get(url, headers=headers, timeout=10)
-        data = res.json()
-        if "data" in data and "band_list" in data["data"]:
-            hot_list = data["data"]["band_list"]
-            hot_words = [item["word"] for item in hot_list if "word" in item]
-            df = pd.DataFrame({"热搜词": hot_words})
-            if not df.empty:
-                df.to_csv(f"{output_dir}/微博热搜榜.csv", index=False)
+        resp = session.get(WEIBO_URL, headers={**WEIBO_HEADERS, **get_memo().headers(WEIBO_URL)}, timeout=10)
+        return _tag_topics(get_memo().parse(WEIBO_URL, resp, _parse_weibo))
     except Exception:
         pass
+    return None
 
-# ==== 11. 雪球热词 ====
-def fetch_xueqiu_hot_words(output_dir):
+
+async def afetch_weibo_hot_search(http):
     try:
-        session = requests.Session()
-        base_url = "https://xueqiu.com"
-        headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"}
-        session.get(base_url, headers=headers, timeout=15)
-        api_url = f"{base_url}/statuses/hot/listV2.json"
-        params = {"since_id": "-1","max_id": "-1","size": "50","_": int(time.time() * 1000)}
-        res = session.get(api_url, headers=headers, params=params, timeout=15)
-        if res.status_code == 200:
-            data = res.json()
-            keywords = []
-            hot_words = ["中船防务", "航发", "军工", "机器人", "宁德", "卫星", "券商", 
-                        "新能源", "芯片", "锂电池", "半导体", "AI", "创新药",
-                        "光伏", "通信", "ChatGPT", "智能驾驶", "汽车"]
-            items = data.get("items", [])
-            for item in items:
-                text = item.get("title", "") + " " + item.get("text", "")
-                found_words = [word for word in hot_words if word in text]
-                keywords.extend(found_words)
-            if keywords:
-                hot_df = pd.DataFrame(pd.Series(keywords).value_counts()).reset_index()
-                hot_df.columns = ["热词", "出现次数"]
-                hot_df.to_csv(f"{output_dir}/雪球热词.csv", index=False)
+        resp = await http.get(WEIBO_URL, headers={**WEIBO_HEADERS, **get_memo().headers(WEIBO_URL)}, timeout=10)
+        return _tag_topics(get_memo().parse(WEIBO_URL, resp, _parse_weibo))
     except Exception:
         pass
+    return None
+
+# ==== 11. 雪球热词 ====
+# 热词来自 config/keywords.txt（config.KEYWORD_FILES），编译成 Aho-Corasick 自动机后每篇帖子只扫描一遍；
+# 帖子按 max_id 翻页，每页的 next_max_id 决定下一页，最多 config.XUEQIU_PAGES 页；
+# 只有首页的 URL 每次相同，后续页的游标每次运行都不同，不记入 ResponseMemo（否则它只增不减）
+XUEQIU_URL = "https://xueqiu.com"
+XUEQIU_API_URL = f"{XUEQIU_URL}/statuses/hot/listV2.json"
+XUEQIU_PAGE_SIZE = 50
+
+
+def _xueqiu_params(max_id=-1):
+    return {"since_id": "-1", "max_id": str(max_id), "size": str(XUEQIU_PAGE_SIZE), "_": int(time.time() * 1000)}
+
+
+def _xueqiu_memo(max_id):
+    return get_memo() if str(max_id) == "-1" else PASSTHROUGH
+
+
+def _parse_xueqiu_page(res):
+    if res.status_code != 200:
+        return None
+    data = res.json()
+    posts = [
+        (item.get("id", f"{data.get('next_max_id')}-{i}"), item.get("title", "") + " " + item.get("text", ""))
+        for i, item in enumerate(data.get("items", []))
+    ]
+    return posts, data.get("next_max_id")
+
+
+def _xueqiu_next_max_id(page, max_id):
+    # 空页、没有 next_max_id 或游标原地不动时停止翻页
+    if not page or not page[0]:
+        return None
+    next_max_id = page[1]
+    if next_max_id in (None, -1, "-1", 0, "0") or str(next_max_id) == str(max_id):
+        return None
+    return next_max_id
+
+
+def _hot_words_frame(posts):
+    counts = get_automaton().count_documents(posts.values())
+    if counts:
+        return pd.DataFrame(counts.most_common(), columns=["热词", "出现次数"])
+    return None
+
+
+def fetch_xueqiu_hot_words(session=None, pages=None):
+    session = session or get_session()
+    limiter = RateLimiter(config.PAGE_RATE)
+    posts = {}  # 帖子 id -> 文本；翻页期间有新帖时相邻页会重叠，按 id 去重
+    try:
+        # 先访问首页拿到 cookie，共享会话会为后续 API 请求保留它
+        session.get(XUEQIU_URL, timeout=15)
+        max_id = -1
+        for _ in range(pages or config.XUEQIU_PAGES):
+            limiter.wait()
+            memo = _xueqiu_memo(max_id)
+            res = session.get(XUEQIU_API_URL, params=_xueqiu_params(max_id), headers=memo.headers(XUEQIU_API_URL),
+                              timeout=15)
+            page = memo.parse(XUEQIU_API_URL, res, _parse_xueqiu_page)
+            posts.update(page[0] if page else [])
+            max_id = _xueqiu_next_max_id(page, max_id)
+            if max_id is None:
+                break
+    except Exception as e:
+        if not posts:
+            return None
+        print(f"⚠️ 雪球翻页中断，使用已获取的 {len(posts)} 条帖子: {e}")
+    return _hot_words_frame(posts)
+
+
+async def afetch_xueqiu_hot_words(http, pages=None):
+    posts = {}
+    try:
+        await http.get(XUEQIU_URL)
+        max_id = -1
+        for _ in range(pages or config.XUEQIU_PAGES):
+            memo = _xueqiu_memo(max_id)
+            res = await http.get(XUEQIU_API_URL, params=_xueqiu_params(max_id), headers=memo.headers(XUEQIU_API_URL))
+            page = memo.parse(XUEQIU_API_URL, res, _parse_xueqiu_page)
+            posts.update(page[0] if page else [])
+            max_id = _xueqiu_next_max_id(page, max_id)
+            if max_id is None:
+                break
+    except Exception as e:
+        if not posts:
+            return None
+        print(f"⚠️ 雪球翻页中断，使用已获取的 {len(posts)} 条帖子: {e}")
+    return _hot_words_frame(posts)
 
 # ========== 运行所有采集 ==========
-def run_all_data_collection(output_dir):
+def _cache_read(cache, name, tickers, date, offline, refresh, span):
+    # 命中缓存时直接返回缓存数据；离线模式只读缓存（不限日期和有效期）；refresh 时只写不读
+    if cache is None or refresh:
+        return None
+    if offline:
+        df = cache.latest(name, tickers)
+    else:
+        # 自选行情分组与内置行情分组一样有效到下一次开盘或收盘
+        ttl = SOURCE_TTLS.get(name, ALL_MARKETS if name in watchlist_groups() else DEFAULT_TTL)
+        df = cache.get(name, tickers, date, ttl)
+    span.cache_hit = df is not None
+    if df is None and offline:
+        print(f"⚠️ 离线模式下无缓存数据，已跳过: {name}")
+    return df
+
+
+def _cache_write(cache, name, tickers, date, df, span):
+    if cache is not None and df is not None and not df.empty:
+        cache.put(name, tickers, date, df)
+    span.rows = 0 if df is None else len(df)
+    return df
+
+
+def _cached_step(cache, name, func, tickers, date, offline, refresh=False):
+    def step():
+        with metrics.step(name) as span:
+            df = _cache_read(cache, name, tickers, date, offline, refresh, span)
+            if df is None and not offline:
+                df = func()
+            return _cache_write(cache, name, tickers, date, df, span)
+    return step
+
+
+def _cached_async_step(cache, name, afunc, tickers, date, offline, refresh=False):
+    async def step():
+        with metrics.step(name) as span:
+            df = _cache_read(cache, name, tickers, date, offline, refresh, span)
+            if df is None and not offline:
+                df = await afunc()
+            return _cache_write(cache, name, tickers, date, df, span)
+    return step
+
+
+def open_stores(offline=False, use_cache=None):
+    """Return the (HistoryStore, MarketDataCache) pair configured for a run; either may be None."""
+    store = HistoryStore(config.HISTORY_DIR, initial_period=config.HISTORY_PERIOD) if config.HISTORY_ENABLED else None
+    use_cache = config.CACHE_ENABLED if use_cache is None else use_cache
+    cache = MarketDataCache(config.CACHE_DIR, config.CACHE_MAX_MB * 1024 * 1024) if use_cache or offline else None
+    return store, cache
+
+
+# 异步引擎下直接走协程的 HTTP 数据源；其余步骤（yfinance 行情）在线程里执行
+ASYNC_SOURCES = {
+    "全球主要利率": afetch_global_rates_macro,
+    "美股盘前异动榜": afetch_us_premarket_movers,
+    "同花顺涨停雷达": afetch_tonghuashun_limit_up,
+    "东方财富主力资金流向": afetch_eastmoney_fund_flow,
+    "微博热搜榜": afetch_weibo_hot_search,
+    "雪球热词": afetch_xueqiu_hot_words,
+}
+
+
+def quote_step_groups():
+    """Quote groups read by the quote steps: the built-in ones, then the watchlist groups."""
+    return ["港股与中概股行情", "美股主要指数", "期货外汇", "全球ETF资金流", "主要指数", *watchlist_groups()]
+
+
+def build_collection_steps(store=None, cache=None, offline=False, only=None, refresh=False, http=None, quotes=None):
+    """Return ``[(step name, callable, dataset name)]`` for the enabled steps.
+
+    Quote steps of one call share a single batched download.  ``only``
+    restricts the list to the given step names; ``refresh`` always fetches
+    (the cache is written but not read) for callers that schedule their own
+    refreshes, such as the daemon.  With an ``http`` client (src.core.aio)
+    the callables are coroutine functions for ``arun_steps``.  ``quotes``
+    replaces that batch with prepared bars (anything with the ``closes()`` and
+    ``panel()`` of QuoteBatch, e.g. the gathered shards of src.data.jobs).
+    """
+    # 所有行情分组合并去重后一次批量下载（由第一个未命中缓存的行情步骤触发），再分发给各分组
+    batch_codes = unique_codes(quote_step_groups())
+    batch = quotes if quotes is not None else QuoteBatch(batch_codes, store=store)
+
+    def with_quotes(func):
+        return lambda: func(quotes=batch.closes())
+
+    def with_panel(func):
+        return lambda: func(panel=batch.panel())
+
+    # (步骤名, 采集函数, 数据集名, 缓存键中的代码集合)
     steps = [
-        ("港股与中概股行情", fetch_hk_and_china_stocks),
-        ("美股主要指数/科技股/中概ETF", fetch_us_indexes_etf),
-        ("大宗商品/期货/外汇", fetch_commodities_fx),
-        ("全球ETF资金流", fetch_global_etf),
-        ("全球主要利率", fetch_global_rates_macro),
-        ("美股盘前异动榜", fetch_us_premarket_movers),
-        ("国际主要指数", fetch_international_indexes),
-        ("同花顺涨停雷达", fetch_tonghuashun_limit_up),
-        ("东方财富主力资金流向", fetch_eastmoney_fund_flow),
-        ("微博热搜榜", fetch_weibo_hot_search),
-        ("雪球热词", fetch_xueqiu_hot_words),
+        ("港股与中概股行情", with_quotes(fetch_hk_and_china_stocks), "港股与中概股行情",
+         QUOTE_GROUPS.get("港股与中概股行情", {}).values()),
+        ("美股主要指数/科技股/中概ETF", with_quotes(fetch_us_indexes_etf), "美股主要指数",
+         QUOTE_GROUPS.get("美股主要指数", {}).values()),
+        ("大宗商品/期货/外汇", with_quotes(fetch_commodities_fx), "期货外汇",
+         QUOTE_GROUPS.get("期货外汇", {}).values()),
+        ("全球ETF资金流", with_quotes(fetch_global_etf), "全球ETF资金流",
+         QUOTE_GROUPS.get("全球ETF资金流", {}).values()),
+        ("全球主要利率", fetch_global_rates_macro, "全球主要利率", ()),
+        ("美股盘前异动榜", fetch_us_premarket_movers, "美股盘前异动榜", ()),
+        ("国际主要指数", with_quotes(fetch_international_indexes), "主要指数",
+         QUOTE_GROUPS.get("主要指数", {}).values()),
+        ("同花顺涨停雷达", fetch_tonghuashun_limit_up, "同花顺涨停雷", ()),
+        ("东方财富主力资金流向", fetch_eastmoney_fund_flow, "东方财富主力资金流向", ()),
+        ("微博热搜榜", fetch_weibo_hot_search, "微博热搜榜", ()),
+        ("雪球热词", fetch_xueqiu_hot_words, "雪球热词", ()),
+        ("技术指标", with_panel(fetch_technical_indicators), "技术指标", batch_codes),
+        ("资产相关性", with_panel(fetch_asset_correlations), "资产相关性", batch_codes),
+    ]
+    steps += [
+        (group, with_quotes(functools.partial(fetch_watchlist, group)), group,
+         QUOTE_GROUPS.get(group, {}).values())
+        for group in watchlist_groups()
+    ]
+    date = trading_date(config.APP_TIMEZONE)
+    steps = [step for step in steps if step[0] not in config.COLLECT_SKIP and (only is None or step[0] in only)]
+    if http is None:
+        return [
+            (name, _cached_step(cache, name, func, tuple(tickers), date, offline, refresh), dataset)
+            for name, func, dataset, tickers in steps
+        ]
+
+    def as_async(name, func):
+        if name in ASYNC_SOURCES:
+            return functools.partial(ASYNC_SOURCES[name], http)
+        return functools.partial(asyncio.to_thread, func)
+
+    return [
+        (name, _cached_async_step(cache, name, as_async(name, func), tuple(tickers), date, offline, refresh), dataset)
+        for name, func, dataset, tickers in steps
     ]
-    for name, func in steps:
+
+
+def run_collection_steps(steps, registry=None, max_workers=None, step_timeout=None, deadline=None):
+    """Run ``build_collection_steps`` output concurrently and fill a ResultRegistry.
+
+    Only steps that finished within their deadlines contribute a dataset.
+    """
+    registry = registry if registry is not None else ResultRegistry()
+    datasets = {name: dataset for name, _, dataset in steps}
+    recorder = metrics.active()
+    if recorder is not None and recorder.profiling:
+        # cProfile 同一时间只能在一个线程里启用，剖析时顺序执行
+        max_workers = 1
+    result = run_steps(
+        [(name, func) for name, func, _ in steps],
+        max_workers=max_workers or config.COLLECT_WORKERS,
+        step_timeout=step_timeout or config.COLLECT_STEP_TIMEOUT,
+        deadline=deadline or config.COLLECT_DEADLINE,
+    )
+    return _store_collection(registry, datasets, result)
+
+
+def _store_collection(registry, datasets, result):
+    # 没有对应数据集的步骤（如任务队列的行情分片）只记录状态
+    for name in result.finished:
+        if name in datasets:
+            registry.put(datasets[name], result.outcomes[name].result)
+    registry.collection = result
+    recorder = metrics.active()
+    if recorder is not None:
+        recorder.attach_collection(result)
+    print(f"📊 数据采集：{result.summary()}")
+    return registry
+
+
+async def _collect_async(registry, store, cache, offline, step_timeout, deadline):
+    async with AsyncHTTP(concurrency=config.ASYNC_CONCURRENCY, host_rate=config.ASYNC_HOST_RATE) as http:
+        steps = build_collection_steps(store=store, cache=cache, offline=offline, http=http)
+        result = await arun_steps(
+            [(name, func) for name, func, _ in steps],
+            step_timeout=step_timeout or config.COLLECT_STEP_TIMEOUT,
+            deadline=deadline or config.COLLECT_DEADLINE,
+        )
+    return _store_collection(registry, {name: dataset for name, _, dataset in steps}, result)
+
+
+def run_all_data_collection(registry=None, max_workers=None, step_timeout=None, deadline=None,
+                            offline=False, use_cache=None, engine=None, workers=None):
+    """Run every enabled collection step and return a ResultRegistry of the datasets.
+
+    ``engine`` (``config.COLLECT_ENGINE``) picks the thread-pool scheduler
+    (``"threads"``), one asyncio loop sharing an httpx client (``"async"``) or
+    the multi-process job queue of src.data.jobs (``"queue"``, ``workers``
+    local worker processes, default ``config.QUEUE_WORKERS``).  The async and
+    queue engines fall back to threads while profiling; offline runs only
+    read the cache and always use threads.
+    """
+    registry = registry if registry is not None else ResultRegistry()
+    store, cache = open_stores(offline=offline, use_cache=use_cache)
+    engine = engine or config.COLLECT_ENGINE
+    recorder = metrics.active()
+    profiling = recorder is not None and recorder.profiling
+    if engine == "async" and not aio_available():
+        print("⚠️ 未安装 httpx，异步采集引擎不可用，改用线程池")
+        engine = "threads"
+    if engine == "async" and not profiling:
+        return asyncio.run(_collect_async(registry, store, cache, offline, step_timeout, deadline))
+    if engine == "queue" and not profiling and not offline:
+        from src.data.jobs import collect_with_workers
+
+        datasets, result = collect_with_workers(cache=cache, workers=workers, use_cache=cache is not None,
+                                                step_timeout=step_timeout, deadline=deadline)
+        return _store_collection(registry, datasets, result)
+    steps = build_collection_steps(store=store, cache=cache, offline=offline)
+    return run_collection_steps(steps, registry=registry, max_workers=max_workers,
+                                step_timeout=step_timeout, deadline=deadline)
+
+# ========== 汇总为Markdown ==========
+def format_pct_columns(df, pct_cols=("涨跌幅",)):
+    """Render numeric percent columns as '1.23%' strings and dates as YYYY-MM-DD; missing values become '-'."""
+    df = df.copy()
+    for col in pct_cols:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].map(lambda v: "-" if pd.isna(v) else f"{v:.2f}%")
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%d").fillna("-")
+        elif isinstance(df[col].dtype, pd.Int64Dtype) and df[col].hasnans:
+            df[col] = df[col].astype("object").where(df[col].notna(), "-")
+    return df
+
+
+def summarize_frame(df, cols=None, top=5):
+    if df is None or df.empty or df.columns.empty:
+        return "（无数据）"
+    if cols:
         try:
-            func(output_dir)
-        except Exception as e:
-            print(f"⚠️ 采集步骤失败，已跳过: {name}; error={e}")
+            df = df[cols]
+        except Exception:
+            return "（无数据）"
+    return format_pct_columns(df.head(top)).to_markdown(index=False)
+
 
-# ========== 汇总csv为Markdown ==========
 def summarize_csv(path, cols=None, top=5):
+    # 也接受 .parquet/.arrow 文件；CSV 按数据集声明的列类型读取，不再猜测类型
     if not os.path.exists(path):
         return "（无数据）"
     if os.path.getsize(path) == 0:
         return "（无数据）"
     try:
-        df = pd.read_csv(path)
+        df = read_dataset(path)
     except Exception:
         return "（无数据）"
-    if df.empty or df.columns.empty:
-        return "（无数据）"
-    if cols:
-        try:
-            df = df[cols]
-        except Exception:
-            return "（无数据）"
-    return df.head(top).to_markdown(index=False)
-
-def merge_csvs_to_excel(output_dir, output_excel="全市场数据总览.xlsx"):
-    import pandas as pd
-    files = [f for f in os.listdir(output_dir) if f.endswith(".csv")]
-    with pd.ExcelWriter(os.path.join(output_dir, output_excel)) as writer:
-        for csv_file in files:
-            csv_path = os.path.join(output_dir, csv_file)
-            try:
-                if os.path.getsize(csv_path) == 0:
-                    print(f"⚠️ 跳过空文件：{csv_file}")
-                    continue
-                df = pd.read_csv(csv_path)
-                if df.empty or df.columns.empty:
-                    print(f"⚠️ 跳过无内容文件：{csv_file}")
-                    continue
-                sheet_name = os.path.splitext(csv_file)[0][:31]
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-            except Exception as e:
-                print(f"⚠️ 文件 {csv_file} 合并失败，原因：{e}")
-    print(f"✅ 已合并为 {output_excel}")
-
+    return summarize_frame(df, cols=cols, top=top)
 
-def merge_csvs_to_one(output_dir, output_csv="all_data_merged.csv"):
-    import pandas as pd
-    files = [f for f in os.listdir(output_dir) if f.endswith(".csv")]
-    dfs = []
-    for csv_file in files:
+# ========== 合并输出 ==========
+def _iter_csv_frames(output_dir, exclude=()):
+    # 目录中的 .csv/.parquet/.arrow 数据集文件，各自按声明的列类型读取
+    extensions = tuple(FORMATS.values())
+    for csv_file in sorted(f for f in os.listdir(output_dir) if f.endswith(extensions)):
+        if csv_file in exclude:
+            continue
         csv_path = os.path.join(output_dir, csv_file)
         try:
             if os.path.getsize(csv_path) == 0:
                 print(f"⚠️ 跳过空文件：{csv_file}")
                 continue
-            df = pd.read_csv(csv_path)
-            if df.empty or df.columns.empty:
-                print(f"⚠️ 跳过无内容文件：{csv_file}")
-                continue
-            df["__来源表__"] = os.path.splitext(csv_file)[0]
-            dfs.append(df)
+            df = read_dataset(csv_path)
         except Exception as e:
             print(f"⚠️ 文件 {csv_file} 合并失败，原因：{e}")
             continue
+        yield os.path.splitext(csv_file)[0], df
+
+
+def _write_excel(frames, excel_path):
+    with pd.ExcelWriter(excel_path) as writer:
+        for name, df in frames:
+            try:
+                if df.empty or df.columns.empty:
+                    print(f"⚠️ 跳过无内容数据：{name}")
+                    continue
+                df.to_excel(writer, sheet_name=name[:31], index=False)
+            except Exception as e:
+                print(f"⚠️ {name} 合并失败，原因：{e}")
+    print(f"✅ 已合并为 {os.path.basename(excel_path)}")
+
+
+def _write_concat(frames, csv_path):
+    dfs = []
+    for name, df in frames:
+        if df.empty or df.columns.empty:
+            print(f"⚠️ 跳过无内容数据：{name}")
+            continue
+        dfs.append(df.assign(__来源表__=name))
     if not dfs:
         print("❗没有可用数据，未生成合并csv")
         return
     df_all = pd.concat(dfs, axis=0, ignore_index=True)
-    df_all.to_csv(os.path.join(output_dir, output_csv), index=False)
-    print(f"✅ 已合并为 {output_csv}")
+    df_all.to_csv(csv_path, index=False)
+    print(f"✅ 已合并为 {os.path.basename(csv_path)}")
 
-# ========== 主入口 ==========
-def main():
-    today = datetime.date.today()
-    today_str = today.strftime('%Y-%m-%d')
-    with tempfile.TemporaryDirectory(prefix="stock1_market_data_") as output_dir:
-        run_all_data_collection(output_dir)
 
-        report = f"# {today_str} 多市场采集报告\n"
+def merge_results_to_excel(registry, excel_path):
+    """Write every dataset in the registry as one sheet of an Excel workbook."""
+    _write_excel(registry.items(), excel_path)
 
-        report += "\n## 港股与中概股行情\n"
-        report += summarize_csv(f"{output_dir}/港股与中概股行情.csv", top=5)
 
-        report += "\n\n## 美股主要指数/ETF\n"
-        report += summarize_csv(f"{output_dir}/美股主要指数.csv", top=5)
+def merge_results_to_one(registry, csv_path):
+    """Concatenate every dataset in the registry into one CSV with a 来源表 column."""
+    _write_concat(registry.items(), csv_path)
 
-        report += "\n\n## 大宗商品/期货/外汇\n"
-        report += summarize_csv(f"{output_dir}/期货外汇.csv", top=5)
 
-        report += "\n\n## 全球ETF资金流\n"
-        report += summarize_csv(f"{output_dir}/全球ETF资金流.csv", top=5)
+def merge_csvs_to_excel(output_dir, output_excel="全市场数据总览.xlsx", chunksize=None):
+    # 指定 chunksize 时走流式写入（openpyxl write-only），内存占用与输入大小无关
+    if chunksize:
+        stream_merge_to_excel(output_dir, os.path.join(output_dir, output_excel), chunksize)
+        return
+    _write_excel(_iter_csv_frames(output_dir), os.path.join(output_dir, output_excel))
+
 
-        report += "\n\n## 国际主要指数\n"
-        report += summarize_csv(f"{output_dir}/主要指数.csv", top=5)
+def merge_csvs_to_one(output_dir, output_csv="all_data_merged.csv", chunksize=None):
+    if chunksize:
+        stream_merge_csvs(output_dir, os.path.join(output_dir, output_csv), chunksize)
+        return
+    _write_concat(_iter_csv_frames(output_dir, exclude={output_csv}), os.path.join(output_dir, output_csv))
 
-        report += "\n\n## 东方财富主力资金流向（前10）\n"
-        report += summarize_csv(f"{output_dir}/东方财富主力资金流向.csv", top=10)
+# ========== 主入口 ==========
+REPORT_SECTIONS = [
+    ("港股与中概股行情", "港股与中概股行情", 5),
+    ("美股主要指数/ETF", "美股主要指数", 5),
+    ("大宗商品/期货/外汇", "期货外汇", 5),
+    ("全球ETF资金流", "全球ETF资金流", 5),
+    ("国际主要指数", "主要指数", 5),
+    ("东方财富主力资金流向（前10）", "东方财富主力资金流向", 10),
+    ("同花顺涨停雷达（前10）", "同花顺涨停雷", 10),
+    ("微博热搜榜（前10）", "微博热搜榜", 10),
+    ("雪球热词（Top10）", "雪球热词", 10),
+    ("技术指标（按RSI排序）", "技术指标", config.INDICATOR_REPORT_TOP),
+    (f"资产相关性（近{config.CORRELATION_WINDOW}日收益）", "资产相关性", config.INDICATOR_REPORT_TOP),
+]
+# 列较多的数据集在报告里只展示部分列，完整数据见CSV/Excel输出
+REPORT_COLUMNS = {
+    "技术指标": ["名称", "收盘", "MA20", "MA60", "RSI14", "MACD柱", "ATR%", "20日波动率%"],
+}
 
-        report += "\n\n## 同花顺涨停雷达（前10）\n"
-        report += summarize_csv(f"{output_dir}/同花顺涨停雷.csv", top=10)
 
-        report += "\n\n## 微博热搜榜（前10）\n"
-        report += summarize_csv(f"{output_dir}/微博热搜榜.csv", top=10)
+def build_report_markdown(registry, today_str=None):
+    today_str = today_str or datetime.date.today().strftime('%Y-%m-%d')
+    report = f"# {today_str} 多市场采集报告\n"
+    # 自选行情分组排在内置行情小节之后
+    split = next(i for i, (_, dataset, _) in enumerate(REPORT_SECTIONS) if dataset == "主要指数") + 1
+    watchlists = [(group, group, config.WATCHLIST_REPORT_TOP) for group in watchlist_groups()]
+    sections = REPORT_SECTIONS[:split] + watchlists + REPORT_SECTIONS[split:]
+    for i, (title, dataset, top) in enumerate(sections):
+        report += ("\n## " if i == 0 else "\n\n## ") + f"{title}\n"
+        report += summarize_frame(registry.get(dataset), cols=REPORT_COLUMNS.get(dataset), top=top)
+    report += "\n\n*本报告由自动化脚本采集生成*"
+    return report
 
-        report += "\n\n## 雪球热词（Top10）\n"
-        report += summarize_csv(f"{output_dir}/雪球热词.csv", top=10)
 
-        report += "\n\n*本报告由自动化脚本采集生成*"
-        return report
+def main(offline=False, use_cache=None, output_dir=None, overview_path=None, engine=None, output_format=None,
+         workers=None):
+    registry = run_all_data_collection(offline=offline, use_cache=use_cache, engine=engine, workers=workers)
+    if output_dir:
+        # 可选的落盘输出：每个数据集一个文件（CSV/Parquet/Arrow），外加Excel总览
+        registry.write(output_dir, output_format or config.OUTPUT_FORMAT, config.OUTPUT_COMPRESSION)
+        overview_path = overview_path or os.path.join(output_dir, "全市场数据总览.xlsx")
+    if overview_path:
+        try:
+            merge_results_to_excel(registry, overview_path)
+        except Exception as e:
+            print(f"⚠️ Excel 总览生成失败，已跳过: {e}")
+    recorder = metrics.active()
+    if recorder is None:
+        return build_report_markdown(registry)
+    with recorder.profiled():
+        return build_report_markdown(registry)
@@ -0,0 +1,159 @@
+"""Incremental local store of daily bars, one memory-mapped .npy file per ticker."""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import defaultdict
+from typing import Callable, Iterable
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+_FIELD_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+def frame_to_bars(df: pd.DataFrame) -> np.ndarray:
+    """Convert a yfinance OHLCV frame into a BAR_DTYPE array, dropping empty rows."""
+    df = df.dropna(subset=["Close"])
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["date"] = pd.DatetimeIndex(df.index).tz_localize(None).values.astype("datetime64[D]")
+    for field, column in _FIELD_COLUMNS.items():
+        bars[field] = df[column].to_numpy(dtype="f8") if column in df else np.nan
+    return bars
+
+
+def bars_to_panel(bars_by_code: dict[str, np.ndarray], last: int | None = None) -> dict[str, pd.DataFrame]:
+    """Align per-ticker bars on the union of their dates as date x code frames per field.
+
+    Returns ``{"open": ..., "close": ..., "volume": ...}``; a ticker without a
+    bar on some date (another exchange's calendar, not yet listed) has NaN
+    there.  ``last`` keeps only the most recent dates of the union.
+    """
+    codes = [code for code, bars in bars_by_code.items() if len(bars)]
+    if not codes:
+        return {field: pd.DataFrame() for field in _FIELD_COLUMNS}
+    dates = np.unique(np.concatenate([np.asarray(bars_by_code[code]["date"]) for code in codes]))
+    if last is not None:
+        dates = dates[-last:]
+    # 按 代码 x 日期 填充（每个代码写连续内存），转置后正好是 pandas 的列块布局，无需再复制
+    panel = {field: np.full((len(codes), len(dates)), np.nan) for field in _FIELD_COLUMNS}
+    for j, code in enumerate(codes):
+        bars = np.asarray(bars_by_code[code])
+        bars = bars[bars["date"] >= dates[0]]
+        rows = np.searchsorted(dates, bars["date"])
+        for field, values in panel.items():
+            values[j, rows] = bars[field]
+    index = pd.DatetimeIndex(dates.astype("datetime64[ns]"))
+    return {field: pd.DataFrame(values.T, index=index, columns=codes) for field, values in panel.items()}
+
+
+class HistoryStore:
+    """Per-ticker daily bars appended incrementally from Yahoo.
+
+    ``update`` only downloads bars from the last stored date onwards (the last
+    bar is re-fetched because an intraday bar may still change), grouping
+    tickers that share a start date into one batched request.  Reads go
+    through ``np.load(mmap_mode="r")`` so nothing is fetched or parsed again.
+    """
+
+    def __init__(self, root: str, initial_period: str = "1y",
+                 downloader: Callable[..., dict[str, pd.DataFrame]] | None = None):
+        self.root = root
+        self.initial_period = initial_period
+        self._downloader = downloader
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self.root, quote(code, safe="") + ".npy")
+
+    def load(self, code: str) -> np.ndarray:
+        path = self._path(code)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.load(path, mmap_mode="r")
+
+    def last_date(self, code: str) -> np.datetime64 | None:
+        bars = self.load(code)
+        return bars["date"][-1] if len(bars) else None
+
+    def append(self, code: str, bars: np.ndarray) -> int:
+        """Merge new bars into the stored series, replacing overlapping dates."""
+        if not len(bars):
+            return 0
+        bars = np.sort(bars, order="date")
+        stored = np.array(self.load(code))
+        kept = stored[stored["date"] < bars["date"][0]] if len(stored) else stored
+        merged = np.concatenate([kept, bars])
+        path = self._path(code)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            np.save(fh, merged)
+        os.replace(tmp_path, path)
+        return len(merged) - len(stored)
+
+    def update(self, codes: Iterable[str]) -> dict[str, int]:
+        """Fetch only the missing bars for ``codes``; returns new bar counts.
+
+        Every run re-fetches from the last stored bar, so a partial intraday
+        bar stored by an earlier run (even one from today) is replaced.
+        """
+        by_start: dict[str | None, list[str]] = defaultdict(list)
+        with self._lock:
+            for code in dict.fromkeys(codes):
+                last = self.last_date(code)
+                # 最后一根K线可能是盘中的未完成K线（包括今天的），总是从它开始重新下载
+                by_start[None if last is None else str(last)].append(code)
+            added: dict[str, int] = {}
+            for start, group in by_start.items():
+                if start is None:
+                    frames = self._download(group, period=self.initial_period)
+                else:
+                    frames = self._download(group, start=start)
+                for code, df in frames.items():
+                    added[code] = self.append(code, frame_to_bars(df))
+            return added
+
+    def _download(self, codes: list[str], **kwargs) -> dict[str, pd.DataFrame]:
+        if self._downloader is not None:
+            return self._downloader(codes, **kwargs)
+        from src.data.quotes import download_bars
+
+        return download_bars(codes, **kwargs)
+
+    def closes(self, codes: Iterable[str], last: int | None = None) -> dict[str, pd.Series]:
+        """Stored closes per code (optionally only the ``last`` bars), no network I/O."""
+        out: dict[str, pd.Series] = {}
+        for code in codes:
+            bars = self.load(code)
+            if last is not None:
+                bars = bars[-last:]
+            if len(bars):
+                out[code] = pd.Series(np.asarray(bars["close"]), index=pd.DatetimeIndex(bars["date"]), name=code)
+        return out
+
+    def panel(self, codes: Iterable[str], last: int | None = None) -> dict[str, pd.DataFrame]:
+        """Stored bars of ``codes`` as date x code frames per field (see ``bars_to_panel``)."""
+        return bars_to_panel({code: self.load(code) for code in dict.fromkeys(codes)}, last=last)
+
+    def returns(self, codes: Iterable[str], periods: Iterable[int] = (1, 5, 20)) -> pd.DataFrame:
+        """Percent returns over each period (in bars) computed from the store."""
+        periods = list(periods)
+        rows = {}
+        for code, series in self.closes(codes, last=max(periods) + 1).items():
+            values = series.to_numpy()
+            rows[code] = {
+                f"{n}日涨跌幅": (values[-1] / values[-1 - n] - 1) * 100 if len(values) > n and values[-1 - n] else np.nan
+                for n in periods
+            }
+        return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,150 @@
+"""Vectorized technical indicators over date x ticker price panels.
+
+Every function takes 2-D arrays (rows = dates, columns = tickers) and works
+on all tickers at once.  Tickers trade on different calendars, so the panel
+from ``bars_to_panel`` has holes; ``pack_valid`` moves each column's bars to
+the bottom of the array (NaN padding on top), giving every ticker its own
+trading-day axis with the latest bar in the last row.  Indicators are
+computed on packed arrays; correlations use the date-aligned panel.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+MA_WINDOWS = (20, 60, 200)
+CORRELATION_PAIRS = 100
+# 最新一根的指标只依赖最近的K线：500 根足够 MA200，EMA（最慢的 26 日）的初值影响也已衰减到 1e-17 以下
+LOOKBACK = 500
+
+
+def pack_valid(*arrays: np.ndarray, valid: np.ndarray) -> list[np.ndarray]:
+    """Bottom-align the ``valid`` entries of each column, keeping their order."""
+    # 稳定排序：无效行（False）排到前面，有效行保持原有先后
+    order = np.argsort(valid, axis=0, kind="stable")
+    packed_valid = np.take_along_axis(valid, order, axis=0)
+    return [np.where(packed_valid, np.take_along_axis(a, order, axis=0), np.nan) for a in arrays]
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average per column; NaN until ``window`` values are available."""
+    filled = np.nan_to_num(values)
+    counts = np.cumsum(~np.isnan(values), axis=0)
+    sums = np.cumsum(filled, axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore"):
+        return np.where(counts >= window, sums / window, np.nan)
+
+
+def ema(values: np.ndarray, span: int | None = None, alpha: float | None = None) -> np.ndarray:
+    """Exponential moving average per column (recursive form, leading NaNs skipped)."""
+    return pd.DataFrame(values).ewm(span=span, alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder's relative strength index (0-100)."""
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = ema(np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None)), alpha=1 / period)
+    loss = ema(np.where(np.isnan(delta), np.nan, np.clip(-delta, 0, None)), alpha=1 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + gain / loss)
+    out = np.where(loss == 0, np.where(gain > 0, 100.0, 50.0), out)
+    return np.where(np.isnan(gain), np.nan, out)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, ...]:
+    """MACD line, signal line and histogram."""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    signal_line = ema(line, span=signal)
+    return line, signal_line, line - signal_line
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder's average true range."""
+    prev_close = np.roll(close, 1, axis=0)
+    prev_close[0] = np.nan
+    # fmax 忽略 NaN：首根K线没有前收盘，真实波幅退化为当日振幅
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return ema(true_range, alpha=1 / period)
+
+
+def rolling_volatility(close: np.ndarray, window: int = 20, periods: int = TRADING_DAYS) -> np.ndarray:
+    """Annualized standard deviation of daily log returns over ``window`` bars (percent)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(close), axis=0, prepend=np.nan)
+    std = pd.DataFrame(log_returns).rolling(window, min_periods=window).std().to_numpy()
+    return std * np.sqrt(periods) * 100
+
+
+def daily_returns(close: pd.DataFrame) -> pd.DataFrame:
+    """Return versus each ticker's previous bar, on the aligned dates (NaN where it has no bar)."""
+    return (close / close.ffill().shift(1) - 1).where(close.notna())
+
+
+def correlation(close: pd.DataFrame, window: int = 60) -> pd.DataFrame:
+    """Pairwise correlation of daily returns over the last ``window`` dates."""
+    returns = daily_returns(close).iloc[-window:]
+    return returns.corr(min_periods=max(2, window // 2))
+
+
+def indicator_table(panel: dict[str, pd.DataFrame], names: dict[str, str]) -> pd.DataFrame:
+    """Latest indicator values, one row per ticker, sorted by RSI (highest first).
+
+    Only each ticker's last ``LOOKBACK`` bars are used; the latest values are
+    the same as over the full history.
+    """
+    close = panel["close"]
+    columns = ["名称", "代码", "收盘", *(f"MA{w}" for w in MA_WINDOWS),
+               "RSI14", "MACD", "MACD信号", "MACD柱", "ATR14", "ATR%", "20日波动率%"]
+    if close.empty:
+        return pd.DataFrame(columns=columns)
+    valid = close.notna().to_numpy()
+    c, h, lo = (a[-LOOKBACK:] for a in pack_valid(
+        close.to_numpy(), panel["high"].to_numpy(), panel["low"].to_numpy(), valid=valid))
+    latest = c[-1]
+    line, signal_line, hist = macd(c)
+    atr_last = atr(h, lo, c)[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        atr_pct = atr_last / latest * 100
+    values = {
+        "收盘": latest,
+        **{f"MA{w}": sma(c, w)[-1] for w in MA_WINDOWS},
+        "RSI14": rsi(c)[-1],
+        "MACD": line[-1],
+        "MACD信号": signal_line[-1],
+        "MACD柱": hist[-1],
+        "ATR14": atr_last,
+        "ATR%": atr_pct,
+        "20日波动率%": rolling_volatility(c)[-1],
+    }
+    codes = list(close.columns)
+    out = pd.DataFrame({"名称": [names.get(code, code) for code in codes], "代码": codes})
+    for column, data in values.items():
+        out[column] = np.round(data, 2)
+    out = out[~np.isnan(latest)]
+    return out.sort_values("RSI14", ascending=False, na_position="last").reset_index(drop=True)[columns]
+
+
+def top_correlations(panel: dict[str, pd.DataFrame], names: dict[str, str], window: int = 60,
+                     limit: int = CORRELATION_PAIRS) -> pd.DataFrame:
+    """The ``limit`` most strongly correlated ticker pairs (by absolute correlation)."""
+    columns = ["资产A", "资产B", "相关系数"]
+    close = panel["close"]
+    if close.shape[1] < 2:
+        return pd.DataFrame(columns=columns)
+    corr = correlation(close, window).to_numpy()
+    i, j = np.triu_indices(len(corr), k=1)
+    values = corr[i, j]
+    keep = ~np.isnan(values)
+    i, j, values = i[keep], j[keep], values[keep]
+    order = np.argsort(-np.abs(values), kind="stable")[:limit]
+    codes = list(close.columns)
+    label = lambda k: f"{names.get(codes[k], codes[k])}（{codes[k]}）"  # noqa: E731
+    return pd.DataFrame({
+        "资产A": [label(k) for k in i[order]],
+        "资产B": [label(k) for k in j[order]],
+        "相关系数": np.round(values[order], 3),
+    }, columns=columns)
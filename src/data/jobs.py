@@ -0,0 +1,317 @@
+"""Multi-process sharded collection through the SQLite job queue (src.core.jobqueue).
+
+The coordinator (``collect_with_workers``) queues every HTTP source step
+and the quote universe, split into shards of ``config.QUEUE_SHARD_SIZE``
+codes, at ``config.QUEUE_PATH`` and starts local worker processes; workers
+started with ``main.py --worker`` on other hosts that see the same directory
+take jobs as well.  A step job runs the usual collection step; a shard job
+downloads (or incrementally updates) the bars of its codes and computes their
+technical indicators.  Parsing, normalization and the indicator arrays thus
+run in separate interpreters instead of contending for one GIL.  Results are
+pickled next to the queue file and gathered by the coordinator, which builds
+the quote group tables and the correlations from the shard bars and returns
+the same ``(step -> dataset, CollectionResult)`` as the in-process engines.
+The step metrics a worker measured travel back in its job row and are added
+to the coordinator's run recorder.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import pickle
+import shutil
+import signal
+import socket
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from typing import Any, Callable
+
+import pandas as pd
+
+import config
+from src.core import metrics
+from src.core.jobqueue import DONE, FAILED, Job, JobQueue
+from src.core.scheduler import FINISHED, TIMED_OUT, CollectionResult, StepOutcome, run_steps
+from src.data import fetcher
+from src.data.quotes import QuoteBatch, unique_codes
+
+STEP = "step"
+SHARD = "quotes"
+INDICATOR_STEP = "技术指标"
+PANEL_STEPS = (INDICATOR_STEP, "资产相关性")
+
+
+def open_queue(path: str | None = None) -> JobQueue:
+    return JobQueue(path or config.QUEUE_PATH, lease=config.QUEUE_LEASE, max_attempts=config.QUEUE_MAX_ATTEMPTS)
+
+
+def _results_dir(queue: JobQueue, run_id: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(queue.path)), "results", run_id)
+
+
+# ========== 工作进程 ==========
+def _run_step(job: Job, store, cache) -> pd.DataFrame | None:
+    steps = fetcher.build_collection_steps(store=store, cache=cache, only={job.name})
+    if not steps:
+        raise RuntimeError(f"本机配置中没有该采集步骤（或已跳过）: {job.name}")
+    return steps[0][1]()
+
+
+def _run_shard(job: Job, store) -> dict[str, Any]:
+    with metrics.step(job.name) as span:
+        batch = QuoteBatch(job.payload["codes"], store=store)
+        closes = batch.closes()
+        panel = batch.panel() if job.payload.get("panel") else None
+        span.rows = 0 if closes is None else closes.shape[1]
+        return {
+            "closes": closes,
+            "close": panel["close"] if panel else None,
+            "indicators": fetcher.fetch_technical_indicators(panel) if job.payload.get("indicators") else None,
+        }
+
+
+def _dump(result: Any, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _job_metrics(recorder: metrics.RunRecorder, job: Job, outcome: StepOutcome) -> dict[str, Any]:
+    # 工作进程的 RunRecorder 不跨进程：步骤耗时、状态与 HTTP 流量随任务结果写回队列
+    steps = dict(recorder.finish().steps)
+    span = steps.setdefault(job.name, metrics.SpanMetrics(job.name))
+    if outcome.status != FINISHED:
+        # 超时的步骤仍在后台线程里运行，span 尚未计时
+        span.status = "timed_out" if outcome.status == TIMED_OUT else "failed"
+        span.error = span.error or outcome.error
+        span.wall = span.wall or round(outcome.elapsed, 4)
+    return {"spans": [asdict(span) for span in steps.values()]}
+
+
+def _execute(queue: JobQueue, job: Job) -> None:
+    """Run one claimed job under the step timeout while renewing its lease, then record the outcome.
+
+    The job runs under a fresh run recorder whose step spans are stored with
+    the outcome (see ``_job_metrics``).
+    """
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(queue.lease / 3):
+            if not queue.renew(job):
+                return
+
+    threading.Thread(target=heartbeat, name="lease", daemon=True).start()
+    recorder = metrics.start_run()
+    try:
+        store, cache = fetcher.open_stores(use_cache=job.payload.get("use_cache"))
+        func = (lambda: _run_shard(job, store)) if job.kind == SHARD else (lambda: _run_step(job, store, cache))
+        outcome = run_steps([(job.name, func)], max_workers=1, step_timeout=config.COLLECT_STEP_TIMEOUT,
+                            label="队列任务").outcomes[job.name]
+    finally:
+        stop.set()
+    if outcome.status != FINISHED:
+        outcome.error = outcome.error or f"超时（>{config.COLLECT_STEP_TIMEOUT:g}s）"
+    job_metrics = _job_metrics(recorder, job, outcome)
+    if outcome.status == FINISHED:
+        path = os.path.join(_results_dir(queue, job.run_id), f"{job.id}.pkl")
+        _dump(outcome.result, path)
+        # 只记录文件名：共享目录在各主机上的挂载路径可能不同
+        queue.finish(job, os.path.basename(path), metrics=job_metrics)
+    else:
+        # 超时不再重试：同一数据源再跑一遍多半也会超时，且总时限内来不及
+        queue.fail(job, outcome.error, retry=outcome.status != TIMED_OUT, metrics=job_metrics)
+
+
+def run_worker(queue_path: str | None = None, run_id: str | None = None,
+               initializer: Callable[[], None] | None = None, stop_event: threading.Event | None = None) -> int:
+    """Claim and run jobs one at a time until ``stop_event`` is set; returns the number of jobs run.
+
+    With ``run_id`` only that run's jobs are taken and the worker exits once
+    the run has no queued or running jobs left (the coordinator's local
+    workers); without it the worker serves every run (``main.py --worker``).
+    ``initializer`` is called first, e.g. to configure a spawned process.
+    """
+    import urllib3
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    if initializer is not None:
+        initializer()
+    queue = open_queue(queue_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    stop_event = stop_event or threading.Event()
+    done = 0
+    while not stop_event.is_set():
+        job = queue.claim(worker, run_id=run_id)
+        if job is None:
+            if run_id is not None and not queue.unfinished(run_id):
+                break
+            stop_event.wait(config.QUEUE_POLL)
+            continue
+        try:
+            _execute(queue, job)
+        except Exception as e:
+            print(f"⚠️ 队列任务失败，已跳过: {job.name}; error={e}")
+            queue.fail(job, str(e))
+        done += 1
+    return done
+
+
+def serve(queue_path: str | None = None) -> None:
+    """Entry for ``main.py --worker``: serve the jobs of every run until SIGINT/SIGTERM."""
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_args: stop.set())
+    path = queue_path or config.QUEUE_PATH
+    print(f"🛠️ 队列工作进程启动（{socket.gethostname()}:{os.getpid()}），队列: {path}")
+    done = run_worker(path, stop_event=stop)
+    print(f"👋 队列工作进程已退出，共执行 {done} 个任务")
+
+
+# ========== 协调进程 ==========
+class GatheredQuotes:
+    """Quote shard results combined behind the ``closes()``/``panel()`` of one QuoteBatch.
+
+    Like QuoteBatch, ``closes()`` is None when any shard failed, so the quote
+    steps fall back to per-group downloads.
+    """
+
+    def __init__(self, parts: list[dict[str, Any]], complete: bool):
+        closes = [part["closes"] for part in parts if part["closes"] is not None]
+        self._closes = (pd.concat(closes, axis=1).sort_index()
+                        if complete and closes and len(closes) == len(parts) else None)
+        panels = [part["close"] for part in parts if part["close"] is not None]
+        self._panel = {"close": pd.concat(panels, axis=1).sort_index()} if panels else None
+
+    def closes(self) -> pd.DataFrame | None:
+        return self._closes
+
+    def panel(self) -> dict[str, pd.DataFrame] | None:
+        return self._panel
+
+
+def combine_indicators(tables: list[pd.DataFrame | None]) -> pd.DataFrame | None:
+    """Concatenate per-shard indicator tables in the order of ``indicator_table`` (RSI, highest first)."""
+    tables = [table for table in tables if table is not None and not table.empty]
+    if not tables:
+        return None
+    out = pd.concat(tables, ignore_index=True)
+    return out.sort_values("RSI14", ascending=False, na_position="last").reset_index(drop=True)
+
+
+def plan_jobs(enabled: list[str], use_cache: bool) -> list[tuple[str, str, dict[str, Any]]]:
+    """Queue entries ``(name, kind, payload)`` for the enabled steps: quote shards first, then HTTP steps."""
+    jobs = []
+    if any(name not in fetcher.ASYNC_SOURCES for name in enabled):
+        codes = unique_codes(fetcher.quote_step_groups())
+        size = max(1, config.QUEUE_SHARD_SIZE)
+        chunks = [codes[i:i + size] for i in range(0, len(codes), size)]
+        payload = {"panel": any(name in enabled for name in PANEL_STEPS), "indicators": INDICATOR_STEP in enabled}
+        jobs += [(f"行情分片 {i + 1}/{len(chunks)}", SHARD, {"codes": chunk, **payload})
+                 for i, chunk in enumerate(chunks)]
+    jobs += [(name, STEP, {"use_cache": use_cache}) for name in enabled if name in fetcher.ASYNC_SOURCES]
+    return jobs
+
+
+def _outcome(queue: JobQueue, job: Job) -> StepOutcome:
+    status = {DONE: FINISHED, FAILED: FAILED}.get(job.status, TIMED_OUT)
+    outcome = StepOutcome(job.name, status, elapsed=job.elapsed, error=job.error or "")
+    if status == FINISHED:
+        # 结果文件可能写在别的主机看不到的目录里或被截断：只记这个步骤失败，不中断整次采集
+        try:
+            with open(os.path.join(_results_dir(queue, job.run_id), job.result or ""), "rb") as fh:
+                outcome.result = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            outcome.status = FAILED
+            outcome.error = f"无法读取结果文件 {job.result}: {e}"
+            print(f"⚠️ 采集任务结果读取失败，已跳过: {job.name}; error={e}")
+    return outcome
+
+
+def _record_job_metrics(jobs: list[Job]) -> None:
+    # 把工作进程写回的步骤指标并入本进程的运行记录（未执行完的任务没有指标，由 attach_collection 记为超时）
+    recorder = metrics.active()
+    if recorder is not None:
+        recorder.add_steps(metrics.SpanMetrics(**span) for job in jobs for span in job.metrics.get("spans", ()))
+
+
+def collect_with_workers(cache=None, workers: int | None = None, use_cache: bool = True,
+                         step_timeout: float | None = None, deadline: float | None = None,
+                         initializer: Callable[[], None] | None = None,
+                         queue_path: str | None = None) -> tuple[dict[str, str], CollectionResult]:
+    """Run one collection through the job queue; returns ``(step -> dataset, CollectionResult)``.
+
+    ``workers`` local worker processes (``config.QUEUE_WORKERS``; 0 relies on
+    ``main.py --worker`` processes elsewhere) are spawned for this run and
+    stopped when it ends; ``initializer`` runs first in each of them.  Jobs
+    unfinished at the ``deadline`` are cancelled and reported as timed out.
+    The quote group steps and the correlations then run here on the gathered
+    shard bars, with ``cache`` as in the in-process engines.
+    """
+    start = time.monotonic()
+    deadline = deadline or config.COLLECT_DEADLINE
+    workers = config.QUEUE_WORKERS if workers is None else workers
+    datasets = {name: dataset for name, _, dataset in fetcher.build_collection_steps()}
+    enabled = list(datasets)
+    jobs = plan_jobs(enabled, use_cache)
+    queue = open_queue(queue_path)
+    run_id = uuid.uuid4().hex
+    queue.submit(run_id, jobs)
+    # spawn：工作进程不继承本进程的线程与连接池，各自导入后独立运行
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, name=f"stock1-worker-{i + 1}", daemon=True,
+                        kwargs={"queue_path": queue.path, "run_id": run_id, "initializer": initializer})
+        for i in range(max(0, min(workers, len(jobs))))
+    ]
+    for process in processes:
+        process.start()
+    print(f"📮 任务队列：{len(jobs)} 个任务，本机 {len(processes)} 个工作进程（{queue.path}）")
+    try:
+        while queue.unfinished(run_id) and time.monotonic() - start < deadline:
+            time.sleep(config.QUEUE_POLL)
+        cancelled = queue.cancel(run_id)
+        if cancelled:
+            print(f"⚠️ {cancelled} 个队列任务未在总时限内完成，已取消")
+        finished = queue.jobs(run_id)
+        outcomes = {job.name: _outcome(queue, job) for job in finished}
+        _record_job_metrics(finished)
+    finally:
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        queue.delete(run_id)
+        shutil.rmtree(_results_dir(queue, run_id), ignore_errors=True)
+
+    shards = [outcome for name, outcome in outcomes.items() if name.startswith("行情分片")]
+    parts = [outcome.result for outcome in shards if outcome.status == FINISHED]
+    if INDICATOR_STEP in datasets:
+        # 技术指标由各分片分别计算，合并后按 RSI 重新排序；有分片失败时只含其余分片的代码
+        failed = any(outcome.status == FAILED for outcome in shards)
+        outcomes[INDICATOR_STEP] = StepOutcome(
+            INDICATOR_STEP, FINISHED if parts else (FAILED if failed else TIMED_OUT),
+            elapsed=max((outcome.elapsed for outcome in shards), default=0.0),
+            error="; ".join(outcome.error for outcome in shards if outcome.error),
+            result=combine_indicators([part["indicators"] for part in parts]),
+        )
+    local = [name for name in enabled if name not in outcomes]
+    if local:
+        gathered = GatheredQuotes(parts, complete=len(parts) == len(shards))
+        steps = fetcher.build_collection_steps(cache=cache, only=set(local), quotes=gathered)
+        local_result = run_steps(
+            [(name, func) for name, func, _ in steps],
+            max_workers=config.COLLECT_WORKERS,
+            step_timeout=step_timeout or config.COLLECT_STEP_TIMEOUT,
+            deadline=max(1.0, deadline - (time.monotonic() - start)),
+        )
+        outcomes.update(local_result.outcomes)
+    # 按采集步骤的原有顺序排列，行情分片附在最后
+    ordered = {name: outcomes[name] for name in enabled if name in outcomes}
+    ordered.update({outcome.name: outcome for outcome in shards})
+    return datasets, CollectionResult(outcomes=ordered, elapsed=time.monotonic() - start)
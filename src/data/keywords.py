@@ -0,0 +1,105 @@
+"""Keyword dictionary compiled into an Aho-Corasick automaton for hot-word counting."""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import Counter, deque
+from typing import Iterable, Iterator
+
+import config
+
+
+class KeywordAutomaton:
+    """Multi-pattern matcher: every keyword occurrence in a text is found in one pass.
+
+    Matching is case-sensitive, like the substring checks it replaces, and
+    overlapping keywords (``宁德`` inside ``宁德时代``) are all reported.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(word for word in keywords if word))
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        for index, word in enumerate(self.keywords):
+            node = 0
+            for ch in word:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(index)
+        self._link()
+
+    def _link(self) -> None:
+        # 广度优先计算失败指针，并把失败链上的输出合并到每个节点
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def iter_matches(self, text: str) -> Iterator[int]:
+        """Yield the keyword index of every occurrence in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+    def matches(self, text: str) -> list[str]:
+        """Distinct keywords found in ``text``, in order of first occurrence."""
+        return [self.keywords[i] for i in dict.fromkeys(self.iter_matches(text))]
+
+    def count_documents(self, texts: Iterable[str]) -> Counter:
+        """Number of texts mentioning each keyword (a keyword counts once per text)."""
+        counts: Counter = Counter()
+        for text in texts:
+            counts.update(self.keywords[i] for i in set(self.iter_matches(text)))
+        return counts
+
+
+def load_keywords(paths: Iterable[str]) -> list[str]:
+    """Read keyword files: one keyword per line, ``#`` starts a comment line."""
+    words: list[str] = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"⚠️ 关键词文件不存在，已跳过: {path}")
+            continue
+        with open(path, encoding="utf-8") as fh:
+            words.extend(line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#"))
+    return words
+
+
+_automaton: KeywordAutomaton | None = None
+_automaton_stamp: tuple = ()
+_automaton_lock = threading.Lock()
+
+
+def get_automaton() -> KeywordAutomaton:
+    """Return the automaton for ``config.KEYWORD_FILES``, rebuilt only when a file changes."""
+    global _automaton, _automaton_stamp
+    stamp = tuple(
+        (path, os.path.getmtime(path) if os.path.exists(path) else None) for path in config.KEYWORD_FILES
+    )
+    with _automaton_lock:
+        if _automaton is None or stamp != _automaton_stamp:
+            _automaton = KeywordAutomaton(load_keywords(config.KEYWORD_FILES))
+            _automaton_stamp = stamp
+        return _automaton
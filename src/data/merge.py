@@ -0,0 +1,184 @@
+"""Streaming, constant-memory merges of directories of exported dataset files.
+
+Inputs are the ``.csv``, ``.parquet`` and ``.arrow`` files written by
+``ResultRegistry.write``: CSV files are read with their dataset's declared
+dtypes (src.data.schema), Parquet/Arrow files in record batches with their
+stored types.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Iterator
+
+import pandas as pd
+
+from src.data.schema import FORMATS, apply_schema, csv_dtypes
+
+SOURCE_COLUMN = "__来源表__"
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def _csv_files(input_dir: str, exclude: set[str] = frozenset()) -> Iterator[tuple[str, str]]:
+    extensions = tuple(FORMATS.values())
+    for csv_file in sorted(f for f in os.listdir(input_dir) if f.endswith(extensions)):
+        path = os.path.join(input_dir, csv_file)
+        if csv_file in exclude:
+            continue
+        if os.path.getsize(path) == 0:
+            print(f"⚠️ 跳过空文件：{csv_file}")
+            continue
+        yield os.path.splitext(csv_file)[0], path
+
+
+def _columns(path: str) -> list[str]:
+    ext = os.path.splitext(path)[1]
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).names
+    if ext == ".arrow":
+        import pyarrow.ipc as ipc
+
+        with ipc.open_file(path) as reader:
+            return reader.schema.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_chunks(path: str, chunksize: int, as_text: bool = False) -> Iterator[pd.DataFrame]:
+    """Yield a dataset file ``chunksize`` rows at a time.
+
+    With ``as_text`` every value comes back as its text ("" for missing);
+    otherwise CSV chunks get the declared dtypes and Parquet/Arrow chunks
+    keep their stored types.
+    """
+    name, ext = os.path.splitext(os.path.basename(path))
+    if ext == ".csv":
+        if as_text:
+            yield from pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False)
+        else:
+            for chunk in pd.read_csv(path, chunksize=chunksize, dtype=csv_dtypes(name)):
+                yield apply_schema(name, chunk)
+        return
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize)
+    else:
+        from pyarrow import feather
+
+        batches = feather.read_table(path, memory_map=True).to_batches(max_chunksize=chunksize)
+    for batch in batches:
+        chunk = batch.to_pandas()
+        if as_text:
+            chunk = chunk.astype(str).where(chunk.notna(), "")
+        yield chunk
+
+
+def union_schema(paths: list[str]) -> list[str]:
+    """Union of the column names of all files, in first-seen order."""
+    columns: dict[str, None] = {}
+    for path in paths:
+        try:
+            for col in _columns(path):
+                columns.setdefault(col, None)
+        except Exception as e:
+            print(f"⚠️ 文件 {os.path.basename(path)} 表头读取失败，原因：{e}")
+    return list(columns)
+
+
+def stream_merge_csvs(input_dir: str, output_csv: str, chunksize: int = 50_000) -> int:
+    """Append every dataset file under input_dir to output_csv chunk by chunk.
+
+    Headers are read first to build the union schema, then each file is read
+    ``chunksize`` rows at a time as text (no type inference; CSV values are
+    copied verbatim), aligned to the schema and appended.  Peak memory is one chunk
+    regardless of the number or size of inputs.  Returns the rows written.
+    """
+    output_name = os.path.basename(output_csv)
+    files = list(_csv_files(input_dir, exclude={output_name}))
+    columns = union_schema([path for _, path in files]) + [SOURCE_COLUMN]
+    rows = 0
+    with open(output_csv, "w", encoding="utf-8", newline="") as out:
+        pd.DataFrame(columns=columns).to_csv(out, index=False)
+        for name, path in files:
+            try:
+                for chunk in read_chunks(path, chunksize, as_text=True):
+                    chunk = chunk.reindex(columns=columns, fill_value="")
+                    chunk[SOURCE_COLUMN] = name
+                    chunk.to_csv(out, index=False, header=False)
+                    rows += len(chunk)
+            except Exception as e:
+                print(f"⚠️ 文件 {os.path.basename(path)} 合并失败，原因：{e}")
+    if rows:
+        print(f"✅ 已流式合并为 {output_name}（{rows} 行）")
+    else:
+        print("❗没有可用数据，合并csv只有表头")
+    return rows
+
+
+def stream_merge_to_excel(input_dir: str, output_excel: str, chunksize: int = 50_000) -> int:
+    """Write each dataset file as a sheet through openpyxl's write-only workbook.
+
+    Rows are streamed to disk as they are appended, so memory stays bounded
+    by one chunk.  Files longer than Excel's row limit continue on
+    ``<name>_2``, ``<name>_3``... sheets.  Returns the number of sheets.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    used: set[str] = set()
+    sheets = 0
+
+    def new_sheet(base: str, header: list[str]):
+        nonlocal sheets
+        title, n = base[:31], 1
+        while title in used:
+            n += 1
+            suffix = f"_{n}"
+            title = base[:31 - len(suffix)] + suffix
+        used.add(title)
+        ws = wb.create_sheet(title=title)
+        ws.append(header)
+        sheets += 1
+        return ws
+
+    for name, path in _csv_files(input_dir):
+        try:
+            ws, written = None, 0
+            for chunk in read_chunks(path, chunksize):
+                if ws is None:
+                    header = [str(col) for col in chunk.columns]
+                    ws = new_sheet(name, header)
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+                for row in chunk.itertuples(index=False, name=None):
+                    if written >= EXCEL_MAX_ROWS - 1:
+                        ws, written = new_sheet(name, header), 0
+                    ws.append(list(row))
+                    written += 1
+            if ws is None:
+                print(f"⚠️ 跳过无内容文件：{os.path.basename(path)}")
+        except Exception as e:
+            print(f"⚠️ 文件 {os.path.basename(path)} 合并失败，原因：{e}")
+    if not sheets:
+        wb.create_sheet(title="空")
+    wb.save(output_excel)
+    print(f"✅ 已流式合并为 {os.path.basename(output_excel)}（{sheets} 个工作表）")
+    return sheets
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Merge a directory of exported datasets with bounded memory.")
+    parser.add_argument("input_dir")
+    parser.add_argument("--csv", default="all_data_merged.csv", help="merged CSV file name (in input_dir)")
+    parser.add_argument("--excel", help="also write a workbook with one sheet per dataset (file name in input_dir)")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args(argv)
+    stream_merge_csvs(args.input_dir, os.path.join(args.input_dir, args.csv), args.chunksize)
+    if args.excel:
+        stream_merge_to_excel(args.input_dir, os.path.join(args.input_dir, args.excel), args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Batched Yahoo quote downloads shared by the quote fetchers."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+import pandas as pd
+
+import config
+from src.core.metrics import bind_context
+
+if TYPE_CHECKING:
+    from src.data.history import HistoryStore
+
+# 各行情分组的 名称 -> Yahoo 代码（config/watchlists.yaml）
+QUOTE_GROUPS: dict[str, dict[str, str]] = config.WATCHLISTS
+# 内置采集步骤使用的分组；其余分组是自选行情分组
+BUILTIN_GROUPS = ("指数", "港股与中概股行情", "美股主要指数", "期货外汇", "全球ETF资金流", "主要指数")
+
+
+def watchlist_groups() -> list[str]:
+    """Configured groups that are not consumed by a built-in step."""
+    return [name for name in QUOTE_GROUPS if name not in BUILTIN_GROUPS]
+
+
+def unique_codes(groups: Iterable[str] | None = None) -> list[str]:
+    """Return the de-duplicated Yahoo codes of the given groups, in first-seen order."""
+    names = list(groups) if groups is not None else list(QUOTE_GROUPS)
+    codes: dict[str, None] = {}
+    for name in names:
+        for code in QUOTE_GROUPS.get(name, {}).values():
+            codes.setdefault(code, None)
+    return list(codes)
+
+
+def code_names(groups: Iterable[str] | None = None) -> dict[str, str]:
+    """Map each Yahoo code of the given groups to its display name (first group wins)."""
+    names: dict[str, str] = {}
+    for group in (list(groups) if groups is not None else list(QUOTE_GROUPS)):
+        for name, code in QUOTE_GROUPS.get(group, {}).items():
+            names.setdefault(code, name)
+    return names
+
+
+def download_bars(
+    codes: Iterable[str],
+    period: str | None = None,
+    start: str | None = None,
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Download daily OHLCV bars for ``codes`` in concurrently executed chunks.
+
+    The de-duplicated universe is split into chunks of ``chunk_size`` codes
+    (``config.QUOTE_CHUNK_SIZE``); each chunk is one ``download_batch`` call
+    and up to ``max_workers`` chunks (``config.QUOTE_CHUNK_WORKERS``) run at
+    once, so a few hundred codes take a few batch round trips.  A failed chunk
+    is reported and skipped; the error is raised only when every chunk failed.
+    """
+    codes = list(dict.fromkeys(codes))
+    size = max(1, chunk_size or config.QUOTE_CHUNK_SIZE)
+    chunks = [codes[i:i + size] for i in range(0, len(codes), size)]
+    if len(chunks) <= 1:
+        return download_batch(codes, period=period, start=start)
+    workers = max(1, min(max_workers or config.QUOTE_CHUNK_WORKERS, len(chunks)))
+    frames: dict[str, pd.DataFrame] = {}
+    errors: list[Exception] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quotes") as pool:
+        futures = [pool.submit(bind_context(download_batch), chunk, period=period, start=start) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                frames.update(future.result())
+            except Exception as e:
+                errors.append(e)
+                print(f"⚠️ 行情分批下载失败（{chunk[0]} 等 {len(chunk)} 个代码），已跳过: {e}")
+    if errors and len(errors) == len(chunks):
+        raise errors[0]
+    return frames
+
+
+def download_batch(codes: Iterable[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+    """Download daily OHLCV bars for all codes in one batched ``yf.download`` call.
+
+    Returns ``{code: bars}`` with rows lacking a close dropped.  Pass either a
+    ``period`` (e.g. ``"5d"``) or a ``start`` date.
+    """
+    import yfinance as yf
+
+    codes = list(dict.fromkeys(codes))
+    if not codes:
+        return {}
+    window = {"start": start} if start else {"period": period or "5d"}
+    data = yf.download(
+        codes,
+        interval="1d",
+        progress=False,
+        auto_adjust=False,
+        group_by="ticker",
+        threads=True,
+        **window,
+    )
+    frames: dict[str, pd.DataFrame] = {}
+    if data is None or data.empty:
+        return frames
+    for code in codes:
+        try:
+            df = data[code] if isinstance(data.columns, pd.MultiIndex) else data
+        except KeyError:
+            continue
+        df = df.dropna(subset=["Close"])
+        if not df.empty:
+            frames[code] = df
+    return frames
+
+
+def download_closes(codes: Iterable[str], period: str = "5d") -> pd.DataFrame:
+    """Download daily closes for all codes as one wide (date x code) frame.
+
+    Tickers trading on different calendars share one date index in a batched
+    download, so the period is a few days wide to guarantee two valid closes
+    per ticker.
+    """
+    frames = download_bars(codes, period=period)
+    return pd.DataFrame({code: df["Close"] for code, df in frames.items()})
+
+
+def normalize_quotes(closes: pd.DataFrame, tickers: dict[str, str], with_date: bool = False) -> pd.DataFrame:
+    """Turn a wide close frame into 名称/代码/收盘/涨跌幅 rows for one group.
+
+    The last and previous valid close of every ticker are located with array
+    operations over the whole (date x code) block, so gaps from other
+    exchanges' calendars are skipped without a per-ticker loop.  涨跌幅 stays
+    numeric (percent units, NaN when only one close exists); formatting
+    happens at render time.
+    """
+    codes = [code for code in tickers.values() if code in closes.columns]
+    columns = ["名称", "代码", "收盘", "涨跌幅"] + (["日期"] if with_date else [])
+    if not codes or closes.empty:
+        return pd.DataFrame(columns=columns)
+    values = closes[codes].to_numpy(dtype="f8")
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))[:, None]
+    last_idx = np.where(valid, rows, -1).max(axis=0)
+    prev_idx = np.where(valid & (rows < last_idx), rows, -1).max(axis=0)
+    has_data = last_idx >= 0
+    cols = np.arange(len(codes))
+    latest = values[last_idx.clip(min=0), cols]
+    prev = np.where(prev_idx >= 0, values[prev_idx.clip(min=0), cols], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(prev != 0, (latest - prev) / prev * 100, 0.0)
+
+    names = {code: name for name, code in tickers.items()}
+    out = pd.DataFrame({
+        "名称": [names[code] for code in codes],
+        "代码": codes,
+        "收盘": np.round(latest, 2),
+        "涨跌幅": np.round(pct, 2),
+    })
+    if with_date:
+        out["日期"] = closes.index[last_idx.clip(min=0)].strftime("%Y-%m-%d")
+    return out[has_data].reset_index(drop=True)
+
+
+class QuoteBatch:
+    """Download a set of codes once and share the closes across threads.
+
+    The first caller performs the batched download (or incremental history
+    update when a store is given) while concurrent callers wait on the lock.
+    ``closes()`` returns a wide (date x code) frame, or ``None`` when the batch
+    failed so callers can fall back to per-group downloads.  ``panel()``
+    returns the multi-year daily bars of the same codes as date x code frames
+    for the indicator steps: read from the store after its update, or one
+    batched ``config.HISTORY_PERIOD`` download without a store.
+    """
+
+    def __init__(self, codes: Iterable[str], store: "HistoryStore | None" = None):
+        self._codes = list(codes)
+        self._store = store
+        self._lock = threading.Lock()
+        self._done = False
+        self._closes: pd.DataFrame | None = None
+        self._panel_lock = threading.Lock()
+        self._panel_done = False
+        self._panel: dict[str, pd.DataFrame] | None = None
+
+    def closes(self) -> pd.DataFrame | None:
+        with self._lock:
+            if not self._done:
+                try:
+                    if self._store is not None:
+                        # 只增量下载缺失的K线，涨跌幅从本地历史库计算
+                        self._store.update(self._codes)
+                        self._closes = pd.DataFrame(self._store.closes(self._codes, last=2))
+                    else:
+                        self._closes = download_closes(self._codes)
+                except Exception as e:
+                    print(f"⚠️ 批量行情下载失败，改为按分组下载: {e}")
+                    self._closes = None
+                self._done = True
+            return self._closes
+
+    def panel(self) -> dict[str, pd.DataFrame] | None:
+        from src.data.history import bars_to_panel, frame_to_bars
+
+        if self._store is not None:
+            self.closes()  # 先完成历史库的增量更新
+        with self._panel_lock:
+            if not self._panel_done:
+                try:
+                    if self._store is not None:
+                        self._panel = self._store.panel(self._codes)
+                    else:
+                        frames = download_bars(self._codes, period=config.HISTORY_PERIOD)
+                        self._panel = bars_to_panel({code: frame_to_bars(df) for code, df in frames.items()})
+                except Exception as e:
+                    print(f"⚠️ 历史K线加载失败，技术指标已跳过: {e}")
+                    self._panel = None
+                self._panel_done = True
+            return self._panel
@@ -0,0 +1,71 @@
+"""In-memory registry of collected datasets shared by report, merges and sinks."""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Iterator
+
+import pandas as pd
+
+from src.data.schema import FORMATS, apply_schema, columnar_available, write_dataset
+
+
+class ResultRegistry:
+    """Collected DataFrames keyed by dataset name (the former CSV file stem).
+
+    The report builder and merge functions read frames straight from here;
+    writing them to disk is an optional sink (``write``).  Frames are cast to
+    their declared schema (src.data.schema) on ``put``.  ``collection`` holds
+    the scheduler's CollectionResult of the run that filled it.
+    """
+
+    def __init__(self):
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+        self.collection = None
+
+    def put(self, name: str, df: pd.DataFrame | None) -> None:
+        if df is None:
+            return
+        df = apply_schema(name, df)
+        with self._lock:
+            self._frames[name] = df
+
+    def get(self, name: str) -> pd.DataFrame | None:
+        with self._lock:
+            return self._frames.get(name)
+
+    def items(self) -> Iterator[tuple[str, pd.DataFrame]]:
+        with self._lock:
+            items = list(self._frames.items())
+        return iter(items)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def write(self, output_dir: str, fmt: str = "csv", compression: str = "zstd") -> list[str]:
+        """Persist every non-empty dataset as ``<name>.csv|.parquet|.arrow`` under output_dir.
+
+        Parquet/Arrow need pyarrow; without it the datasets are written as CSV.
+        """
+        if fmt not in FORMATS:
+            print(f"⚠️ 未知的输出格式 {fmt}，改为CSV")
+            fmt = "csv"
+        elif fmt != "csv" and not columnar_available():
+            print(f"⚠️ 未安装 pyarrow，无法输出 {fmt}，改为CSV")
+            fmt = "csv"
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name, df in self.items():
+            if df.empty or df.columns.empty:
+                continue
+            paths.append(write_dataset(df, os.path.join(output_dir, name), fmt, compression))
+        return paths
+
+    def write_csvs(self, output_dir: str) -> list[str]:
+        """Persist every non-empty dataset as ``<name>.csv`` under output_dir."""
+        return self.write(output_dir, "csv")
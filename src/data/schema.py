@@ -0,0 +1,137 @@
+"""Declared column types per dataset and typed dataset files (CSV, Parquet, Arrow).
+
+Every dataset is cast once, when it enters the ResultRegistry, to the types
+declared in ``SCHEMAS``, so the report, the merges and the written files all
+see the same dtypes.  Column kinds:
+
+- ``float32``: prices, percentages, ratios
+- ``int64``: amounts, volumes, counts, epoch times (nullable ``Int64``: missing stays null)
+- ``category``: codes, names and other repeated labels
+- ``string``: free text
+- ``date``: calendar dates (datetime64)
+- ``percent``: ``"1.23%"`` text converted to float32 percent units
+
+Parquet and Arrow files (optional dependency: ``pyarrow``) keep these types
+on disk; CSV files are read back with the declared dtypes instead of letting
+pandas guess them.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+
+import pandas as pd
+
+from src.data.indicators import MA_WINDOWS
+from src.data.quotes import QUOTE_GROUPS
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# 行情分组（内置与自选）共用的列
+QUOTE_SCHEMA = {"名称": "category", "代码": "category", "收盘": "float32", "涨跌幅": "float32", "日期": "date"}
+_FLOWS = ("主力净流入", "超大单净流入", "大单净流入", "中单净流入", "小单净流入")
+_INDICATORS = ("收盘", *(f"MA{w}" for w in MA_WINDOWS), "RSI14", "MACD", "MACD信号", "MACD柱", "ATR14", "ATR%",
+               "20日波动率%")
+
+SCHEMAS: dict[str, dict[str, str]] = {
+    "全球主要利率": {"美国基准利率": "percent"},
+    "美股盘前异动榜": {"Ticker": "category", "Company": "category", "Last": "float32", "Change": "percent",
+                "Volume": "int64"},
+    "同花顺涨停雷": {
+        "code": "category", "name": "category", "latest": "float32", "change_rate": "float32",
+        "first_limit_up_time": "int64", "last_limit_up_time": "int64", "limit_up_type": "category",
+        "order_volume": "int64", "high_days": "category", "reason_type": "string", "currency_value": "int64",
+    },
+    "东方财富主力资金流向": {
+        "代码": "category", "名称": "category", "最新价": "float32", "涨跌幅": "float32",
+        **{col: "int64" for col in _FLOWS},
+    },
+    "微博热搜榜": {"热搜词": "string", "关键词": "string"},
+    "雪球热词": {"热词": "category", "出现次数": "int64"},
+    "技术指标": {"名称": "category", "代码": "category", **{col: "float32" for col in _INDICATORS}},
+    "资产相关性": {"资产A": "category", "资产B": "category", "相关系数": "float32"},
+}
+
+_CSV_DTYPES = {"float32": "float32", "category": "category", "string": "str"}
+
+
+def schema_for(name: str) -> dict[str, str]:
+    """Declared column kinds of a dataset (quote groups share ``QUOTE_SCHEMA``); empty if undeclared."""
+    if name in SCHEMAS:
+        return SCHEMAS[name]
+    return QUOTE_SCHEMA if name in QUOTE_GROUPS else {}
+
+
+def _cast(series: pd.Series, kind: str) -> pd.Series:
+    if kind == "float32":
+        return series if series.dtype == "float32" else pd.to_numeric(series, errors="coerce").astype("float32")
+    if kind == "int64":
+        # 可空整数：缺失的成交量/资金流保持为空，而不是变成 0（“无数据”不等于“无净流入”）
+        if series.dtype == "Int64":
+            return series
+        return pd.to_numeric(series, errors="coerce").round().astype("Int64")
+    if kind == "category":
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+    if kind == "date":
+        return series if pd.api.types.is_datetime64_any_dtype(series) else pd.to_datetime(series, errors="coerce")
+    if kind == "percent":
+        if pd.api.types.is_numeric_dtype(series):
+            return series.astype("float32")
+        text = series.astype("str").str.strip().str.rstrip("%").str.replace(",", "", regex=False)
+        return pd.to_numeric(text, errors="coerce").astype("float32")
+    return series
+
+
+def apply_schema(name: str, df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Cast the declared columns of ``df``; undeclared columns and datasets are left as they are."""
+    schema = schema_for(name)
+    if df is None or not schema:
+        return df
+    # df[col] 每次取出的都是新 Series 对象，先取一次再比较，已是声明类型的表原样返回
+    columns = {col: df[col] for col in schema if col in df.columns}
+    cast = {col: _cast(series, schema[col]) for col, series in columns.items()}
+    if all(cast[col] is columns[col] for col in cast):
+        return df
+    return df.assign(**cast)
+
+
+def columnar_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def write_dataset(df: pd.DataFrame, path_stem: str, fmt: str = "csv", compression: str = "zstd") -> str:
+    """Write ``df`` as ``<path_stem>.csv|.parquet|.arrow`` and return the path.
+
+    Parquet and Arrow (Feather v2) files are compressed with ``compression``;
+    ``uncompressed`` Arrow files can be memory-mapped without copying.
+    """
+    path = path_stem + FORMATS[fmt]
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression=None if compression == "uncompressed" else compression)
+    elif fmt == "arrow":
+        df.reset_index(drop=True).to_feather(path, compression=compression)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def read_dataset(path: str, name: str | None = None) -> pd.DataFrame:
+    """Read a dataset file written by ``write_dataset`` with its declared types.
+
+    ``name`` (default: the file stem) selects the schema used for CSV files.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext == ".arrow":
+        from pyarrow import feather
+
+        return feather.read_table(path, memory_map=True).to_pandas()
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    return apply_schema(name, pd.read_csv(path, dtype=csv_dtypes(name)))
+
+
+def csv_dtypes(name: str) -> dict[str, str]:
+    """``pd.read_csv`` dtypes for the declared columns that CSV text can be read into directly."""
+    return {col: _CSV_DTYPES[kind] for col, kind in schema_for(name).items() if kind in _CSV_DTYPES}
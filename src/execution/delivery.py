@@ -0,0 +1,55 @@
+"""Concurrent push of the report to every configured delivery channel."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import config
+from src.core import metrics
+from src.core.scheduler import CollectionResult, run_steps
+
+
+def _channels(document_path: str | None) -> list[tuple[str, Callable[[], bool], Callable[[str, str], object]]]:
+    from src.execution.notion import notion_configured, upload_report_to_notion
+    from src.execution.telegram import send_report_to_telegram, telegram_configured
+
+    return [
+        ("notion", notion_configured, lambda report_md, title: upload_report_to_notion(report_md, title=title)),
+        ("telegram", telegram_configured, lambda report_md, title: send_report_to_telegram(report_md, document_path=document_path)),
+    ]
+
+
+def deliver_report(
+    report_md: str,
+    title: str | None = None,
+    timeout: float | None = None,
+    document_path: str | None = None,
+) -> CollectionResult:
+    """Send the report to all configured channels at once and wait for them.
+
+    Channels run concurrently on the step scheduler, so delivery takes as long
+    as the slowest channel; each one retries transient errors itself and is
+    abandoned after ``timeout`` seconds (``config.DELIVERY_TIMEOUT``).  A
+    failing or unconfigured channel is logged and skipped.  ``document_path``
+    (e.g. the Excel overview) is offered to channels that upload attachments.
+    """
+    title = title or config.REPORT_TITLE
+    steps = []
+    for name, configured, send in _channels(document_path):
+        if not configured():
+            print(f"⚠️ {name} 未配置，已跳过推送")
+            continue
+
+        def step(send=send, name=name):
+            with metrics.delivery(name):
+                return send(report_md, title)
+
+        steps.append((name, step))
+    result = run_steps(steps, max_workers=max(1, len(steps)), step_timeout=timeout or config.DELIVERY_TIMEOUT,
+                       label="推送渠道")
+    recorder = metrics.active()
+    if recorder is not None:
+        recorder.attach_delivery(result)
+    if steps:
+        print(f"📮 推送：{result.summary()}")
+    return result
@@ -1,31 +1,230 @@
 # notion_uploader.py
-from notion_client import Client
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import config
+from src.core.http import RETRYABLE_STATUS, RetryableError, call_with_retries
 
+# Notion 接口限制：每次请求最多 100 个子块、含嵌套共 1000 个块；rich_text 单段 2000 字符、最多 100 段
+CHILDREN_LIMIT = 100
+REQUEST_BLOCK_LIMIT = 1000
+TEXT_LIMIT = 1800
+RICH_TEXT_LIMIT = 100
 
-def upload_report_to_notion(report_md: str, title: str = None):
-    if not config.NOTION_TOKEN or not config.NOTION_PAGE_ID:
-        raise ValueError("Missing NOTION_TOKEN or NOTION_PAGE_ID in environment variables.")
-    notion = Client(auth=config.NOTION_TOKEN)
-    title = title or config.REPORT_TITLE
+_client = None
+_client_lock = threading.Lock()
+
+
+def _rich_text(text: str) -> list:
+    # 单个 text 对象最多 2000 字符，超长文本拆成多段
+    return [
+        {"type": "text", "text": {"content": text[i:i+TEXT_LIMIT]}}
+        for i in range(0, len(text), TEXT_LIMIT)
+    ][:RICH_TEXT_LIMIT] or [{"type": "text", "text": {"content": ""}}]
+
+
+def _paragraph_blocks(text: str) -> list:
     # 多段大文本切分
     blocks = []
-    for i in range(0, len(report_md), 1800):
+    for i in range(0, len(text), TEXT_LIMIT):
         blocks.append({
             "object": "block",
             "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {"type": "text", "text": {"content": report_md[i:i+1800]}}
-                ]
-            }
+            "paragraph": {"rich_text": _rich_text(text[i:i+TEXT_LIMIT])}
         })
-    notion.pages.create(
+    return blocks
+
+
+def _heading_block(level: int, text: str) -> dict:
+    kind = f"heading_{level}"
+    return {"object": "block", "type": kind, kind: {"rich_text": _rich_text(text)}}
+
+
+def _table_cells(line: str) -> list:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _table_block(lines: list) -> dict:
+    rows = [_table_cells(line) for line in lines]
+    # 去掉表头分隔行 |---|:--|
+    rows = [row for row in rows if not all(re.fullmatch(r":?-+:?", cell) for cell in row if cell)]
+    width = max(len(row) for row in rows)
+    children = [
+        {
+            "object": "block",
+            "type": "table_row",
+            "table_row": {"cells": [_rich_text(cell) for cell in row + [""] * (width - len(row))]}
+        }
+        for row in rows
+    ]
+    return {
+        "object": "block",
+        "type": "table",
+        "table": {"table_width": width, "has_column_header": True, "has_row_header": False, "children": children}
+    }
+
+
+def build_report_blocks(report_md: str) -> list:
+    """Convert the report markdown into native Notion blocks.
+
+    ``#``/``##``/``###`` lines become headings, ``|``-delimited runs become
+    table blocks (first row as column header) and other lines are grouped
+    into paragraphs of at most TEXT_LIMIT characters.  Tables carry all their
+    rows; ``upload_report_to_notion`` splits them into request-sized batches.
+    """
+    blocks, text, table = [], [], []
+
+    def flush_text():
+        content = "\n".join(text).strip()
+        if content:
+            blocks.extend(_paragraph_blocks(content))
+        text.clear()
+
+    def flush_table():
+        if table:
+            blocks.append(_table_block(table))
+        table.clear()
+
+    for line in report_md.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("|"):
+            flush_text()
+            table.append(stripped)
+            continue
+        flush_table()
+        heading = re.match(r"(#{1,3})\s+(.*)", stripped)
+        if heading:
+            flush_text()
+            blocks.append(_heading_block(len(heading.group(1)), heading.group(2)))
+        else:
+            text.append(line)
+    flush_table()
+    flush_text()
+    return blocks
+
+
+def notion_configured() -> bool:
+    return bool(config.NOTION_TOKEN and config.NOTION_PAGE_ID)
+
+
+def get_notion_client():
+    """Return the process-wide Notion client (its HTTP connection pool is reused across pushes)."""
+    global _client
+    from notion_client import Client
+
+    with _client_lock:
+        if _client is None:
+            options = {"auth": config.NOTION_TOKEN, "timeout_ms": int(config.DELIVERY_REQUEST_TIMEOUT * 1000)}
+            try:
+                # 重试由 call_with_retries 统一处理，关闭新版客户端的内置重试以免叠加
+                _client = Client(**options, retry=False)
+            except TypeError:
+                _client = Client(**options)
+        return _client
+
+
+def _notion_call(func, idempotent: bool = True):
+    # 创建页面/追加子块不是幂等的：读超时时 Notion 可能已经写入，只在请求未发出（连接失败/连接超时）时重试
+    import httpx
+    from notion_client import APIResponseError
+    from notion_client.errors import RequestTimeoutError
+
+    def attempt():
+        try:
+            return func()
+        except RequestTimeoutError as e:
+            if not idempotent and not isinstance(e.__context__, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+                raise
+            raise RetryableError("请求超时") from e
+        except httpx.ConnectError as e:
+            raise RetryableError(f"连接失败（{e}）") from e
+        except APIResponseError as e:
+            if e.status not in RETRYABLE_STATUS:
+                raise
+            retry_after = e.headers.get("retry-after") if getattr(e, "headers", None) else None
+            raise RetryableError(f"HTTP {e.status} {e.code}", float(retry_after) if retry_after else None) from e
+
+    return call_with_retries(attempt, retries=config.DELIVERY_RETRIES, backoff=config.DELIVERY_BACKOFF,
+                             label="Notion 推送", idempotent=idempotent)
+
+
+def _page_batches(blocks: list, batch_size: int):
+    """Split top-level blocks into request batches; tables keep at most ``batch_size`` inline rows.
+
+    A batch holds at most ``batch_size`` blocks and REQUEST_BLOCK_LIMIT blocks
+    including table rows.  Returns ``(batches, overflow)`` where ``overflow``
+    maps a block's position to the rows still to be appended to that table.
+    """
+    trimmed, overflow = [], {}
+    for index, block in enumerate(blocks):
+        if block["type"] == "table" and len(block["table"]["children"]) > batch_size:
+            rows = block["table"]["children"]
+            block = {**block, "table": {**block["table"], "children": rows[:batch_size]}}
+            overflow[index] = rows[batch_size:]
+        trimmed.append(block)
+    batches, current, count = [], [], 0
+    for block in trimmed:
+        size = 1 + len(block["table"]["children"]) if block["type"] == "table" else 1
+        if current and (len(current) >= batch_size or count + size > REQUEST_BLOCK_LIMIT):
+            batches.append(current)
+            current, count = [], 0
+        current.append(block)
+        count += size
+    batches.append(current)
+    return batches, overflow
+
+
+def _append_rows(notion, table_id: str, rows: list, batch_size: int) -> None:
+    # 同一表格的行按顺序追加
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i+batch_size]
+        _notion_call(lambda: notion.blocks.children.append(block_id=table_id, children=batch), idempotent=False)
+
+
+def upload_report_to_notion(report_md: str, title: str = None):
+    """Create the report page with the first batch of blocks and append the rest.
+
+    Top-level batches are appended to the page one after another so the
+    blocks keep their order; the overflow rows of large tables are then
+    appended to their tables concurrently (``config.NOTION_CONCURRENCY``
+    tables at a time).
+    """
+    if not notion_configured():
+        raise ValueError("Missing NOTION_TOKEN or NOTION_PAGE_ID in environment variables.")
+    notion = get_notion_client()
+    title = title or config.REPORT_TITLE
+    batch_size = min(CHILDREN_LIMIT, config.NOTION_BATCH_SIZE)
+    batches, overflow = _page_batches(build_report_blocks(report_md), batch_size)
+    page = _notion_call(lambda: notion.pages.create(
         parent={"page_id": config.NOTION_PAGE_ID},
         properties={
             "title": [
                 {"type": "text", "text": {"content": title}}
             ]
         },
-        children=blocks
-    )
+        children=batches[0]
+    ), idempotent=False)
+
+    block_ids = {}
+    if any(index < len(batches[0]) for index in overflow):
+        # pages.create 不返回子块 ID，首批中需要续写行的表格从子块列表里查
+        listed = _notion_call(lambda: notion.blocks.children.list(block_id=page["id"], page_size=batch_size))
+        block_ids.update({index: block["id"] for index, block in enumerate(listed.get("results", []))})
+    offset = len(batches[0])
+    for batch in batches[1:]:
+        response = _notion_call(lambda: notion.blocks.children.append(block_id=page["id"], children=batch),
+                                idempotent=False)
+        block_ids.update({offset + i: block["id"] for i, block in enumerate(response.get("results", []))})
+        offset += len(batch)
+
+    if overflow:
+        workers = max(1, min(config.NOTION_CONCURRENCY, len(overflow)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notion") as pool:
+            futures = [
+                pool.submit(_append_rows, notion, block_ids[index], rows, batch_size)
+                for index, rows in overflow.items()
+            ]
+            for future in futures:
+                future.result()
+    return page
@@ -1,17 +1,128 @@
 # telegram_uploader.py
-import requests
+import os
+import re
+
 import config
+from src.core.http import RETRYABLE_STATUS, RetryableError, call_with_retries, get_session, retry_after_seconds
+from src.core.paging import RateLimiter
 
+# Telegram一条消息最大4096字符，留出余量
+MESSAGE_LIMIT = 4000
 
-def send_report_to_telegram(report_md: str):
-    if not config.TELEGRAM_BOT_TOKEN or not config.TELEGRAM_CHAT_ID:
-        raise ValueError("Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID in environment variables.")
-    url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
+
+def build_telegram_payload(report_md: str) -> dict:
+    return {
         "chat_id": config.TELEGRAM_CHAT_ID,
-        "text": report_md[:4000],  # Telegram一条消息最大4096字符
+        "text": report_md[:MESSAGE_LIMIT],
         #"parse_mode": "Markdown"
     }
-    resp = requests.post(url, data=payload)
-    resp.raise_for_status()
-    return resp.json()
+
+
+def _split_long(text: str, limit: int) -> list[str]:
+    # 单个小节超长时按行切分，单行超长时硬切
+    pieces, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_report(report_md: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split the report at ``## `` section headers into messages of at most ``limit`` chars.
+
+    Consecutive sections are packed into one message while they fit; a
+    section longer than ``limit`` is split on line boundaries.
+    """
+    chunks, current = [], ""
+    for section in re.split(r"(?m)^(?=## )", report_md):
+        if not section:
+            continue
+        if len(current) + len(section) <= limit:
+            current += section
+            continue
+        if current:
+            chunks.append(current)
+            current = ""
+        if len(section) <= limit:
+            current = section
+        else:
+            *full, current = _split_long(section, limit)
+            chunks.extend(full)
+    if current.strip():
+        chunks.append(current)
+    return [chunk.strip("\n") for chunk in chunks]
+
+
+def build_telegram_messages(report_md: str) -> list[dict]:
+    return [build_telegram_payload(chunk) for chunk in split_report(report_md)]
+
+
+def telegram_configured() -> bool:
+    return bool(config.TELEGRAM_BOT_TOKEN and config.TELEGRAM_CHAT_ID)
+
+
+def _post(session, method: str, **kwargs) -> dict:
+    # 429 按 Telegram 返回的 retry_after 等待，5xx 与连接失败指数退避；
+    # 发消息不是幂等的，读超时时消息可能已送达，不再重发，以免分段报告出现重复、乱序的小节
+    url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/{method}"
+
+    def attempt():
+        resp = session.post(url, timeout=config.DELIVERY_REQUEST_TIMEOUT, **kwargs)
+        if resp.status_code in RETRYABLE_STATUS:
+            raise RetryableError(f"HTTP {resp.status_code}", retry_after_seconds(resp))
+        resp.raise_for_status()
+        return resp.json()
+
+    return call_with_retries(attempt, retries=config.DELIVERY_RETRIES, backoff=config.DELIVERY_BACKOFF,
+                             label="Telegram 推送", idempotent=False)
+
+
+def _send_document(session, report_md: str, document_path: str | None) -> dict:
+    # 优先发送现成的附件（如 Excel 总览），否则把完整报告作为 .md 文件上传
+    if config.TELEGRAM_DOCUMENT == "excel" and document_path and os.path.exists(document_path):
+        with open(document_path, "rb") as fh:
+            document = (os.path.basename(document_path), fh.read())
+    else:
+        document = ("report.md", report_md.encode("utf-8"))
+    return _post(
+        session, "sendDocument",
+        data={"chat_id": config.TELEGRAM_CHAT_ID, "caption": "完整报告"},
+        files={"document": document},
+    )
+
+
+def send_report_to_telegram(report_md: str, session=None, document_path: str = None):
+    """Send the report as ordered messages split at section boundaries.
+
+    Messages go out one at a time (so they arrive in order) no faster than
+    ``config.TELEGRAM_RATE`` per second.  When the report needs more than
+    ``config.TELEGRAM_MAX_MESSAGES`` messages and documents are enabled, only
+    the first message is sent, followed by one document upload of the full
+    report (or of ``document_path`` in ``excel`` mode).
+    """
+    if not telegram_configured():
+        raise ValueError("Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID in environment variables.")
+    session = session or get_session()
+    messages = build_telegram_messages(report_md)
+    use_document = config.TELEGRAM_DOCUMENT != "off" and len(messages) > config.TELEGRAM_MAX_MESSAGES
+    if use_document:
+        messages = messages[:1]
+    limiter = RateLimiter(config.TELEGRAM_RATE)
+    results = []
+    for payload in messages:
+        limiter.wait()
+        results.append(_post(session, "sendMessage", data=payload))
+    if use_document:
+        limiter.wait()
+        results.append(_send_document(session, report_md, document_path))
+    return results
@@ -0,0 +1,121 @@
+import asyncio
+import time
+import unittest
+
+from src.core import aio, metrics
+
+
+@unittest.skipUnless(aio.available(), "httpx not installed")
+class AsyncHTTPTest(unittest.TestCase):
+    def _get(self, handler, urls, **kwargs):
+        import httpx
+
+        async def main():
+            http = aio.AsyncHTTP(backoff=0, **kwargs)
+            http.transport = httpx.MockTransport(handler)
+            async with http:
+                return await asyncio.gather(*(http.get(url) for url in urls))
+
+        return asyncio.run(main())
+
+    def test_retries_retryable_status(self):
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(503 if len(calls) < 3 else 200, text="ok")
+
+        (resp,) = self._get(handler, ["http://a.test/x"], retries=2)
+        self.assertEqual((resp.status_code, resp.text, len(calls)), (200, "ok", 3))
+
+    def test_final_response_and_retries_reach_the_active_recorder(self):
+        import httpx
+
+        self.addCleanup(setattr, metrics, "_active", metrics.active())
+        recorder = metrics.start_run()
+        statuses = [503, 502, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), content=b"payload")
+
+        async def main():
+            http = aio.AsyncHTTP(backoff=0, retries=2)
+            http.transport = httpx.MockTransport(handler)
+            async with http:
+                with metrics.step("async"):
+                    await http.get("http://a.test/x")
+
+        asyncio.run(main())
+        span = recorder.finish().steps["async"]
+        self.assertEqual((span.requests, span.bytes, span.retries), (1, 7, 2))
+
+    def test_returns_last_answer_when_retries_are_used_up(self):
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(429)
+
+        (resp,) = self._get(handler, ["http://a.test/x"], retries=1)
+        self.assertEqual((resp.status_code, len(calls)), (429, 2))
+
+    def test_client_errors_are_not_retried(self):
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(404)
+
+        (resp,) = self._get(handler, ["http://a.test/x"], retries=2)
+        self.assertEqual((resp.status_code, len(calls)), (404, 1))
+
+    def test_transport_error_is_raised_after_retries(self):
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            raise httpx.ConnectError("refused", request=request)
+
+        with self.assertRaises(httpx.ConnectError):
+            self._get(handler, ["http://a.test/x"], retries=1)
+        self.assertEqual(len(calls), 2)
+
+    def test_requests_to_one_host_are_spaced(self):
+        import httpx
+
+        seen = []
+
+        def handler(request):
+            seen.append((request.url.host, time.monotonic()))
+            return httpx.Response(200)
+
+        self._get(handler, ["http://a.test/1", "http://a.test/2", "http://a.test/3", "http://b.test/1"], host_rate=10)
+        a_times = [t for host, t in seen if host == "a.test"]
+        self.assertGreaterEqual(a_times[-1] - a_times[0], 0.18)
+        # 另一个主机有自己的限速器，不排在 a.test 后面
+        b_time = next(t for host, t in seen if host == "b.test")
+        self.assertLess(b_time - a_times[0], 0.05)
+
+
+class AsyncRateLimiterTest(unittest.TestCase):
+    def test_zero_rate_does_not_wait(self):
+        async def main():
+            limiter = aio.AsyncRateLimiter(0)
+            start = time.monotonic()
+            for _ in range(100):
+                await limiter.wait()
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(main()), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
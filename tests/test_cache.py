@@ -0,0 +1,148 @@
+import datetime
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from src.data.cache import MarketDataCache, is_expired, next_session_boundary
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def _put_many(root: str, worker: int, count: int) -> None:
+    cache = MarketDataCache(root)
+    for i in range(count):
+        cache.put(f"w{worker}", [str(i)], "d", pd.DataFrame({"x": [i]}))
+        cache.get(f"w{worker}", [str(i)], "d", ttl=None)
+
+
+def _ny(*args) -> float:
+    return datetime.datetime(*args, tzinfo=NEW_YORK).timestamp()
+
+
+class SessionExpiryTest(unittest.TestCase):
+    def test_before_open_expires_at_open(self):
+        # 2026-10-16 是周五
+        self.assertEqual(next_session_boundary(["US"], _ny(2026, 10, 16, 8, 0)), _ny(2026, 10, 16, 9, 30))
+
+    def test_intraday_expires_at_close(self):
+        self.assertEqual(next_session_boundary(["US"], _ny(2026, 10, 16, 11, 0)), _ny(2026, 10, 16, 16, 0))
+
+    def test_after_friday_close_lasts_until_monday_open(self):
+        self.assertEqual(next_session_boundary(["US"], _ny(2026, 10, 16, 17, 0)), _ny(2026, 10, 19, 9, 30))
+
+    def test_earliest_market_wins(self):
+        # 纽约 08:00 = 香港 20:00（已收盘），下一个边界是纽约开盘
+        after = _ny(2026, 10, 16, 8, 0)
+        self.assertEqual(next_session_boundary(["HK", "US"], after), _ny(2026, 10, 16, 9, 30))
+
+    def test_premarket_entry_is_stale_after_open(self):
+        created = _ny(2026, 10, 16, 8, 0)
+        self.assertFalse(is_expired(created, ("US",), now=_ny(2026, 10, 16, 9, 0)))
+        self.assertTrue(is_expired(created, ("US",), now=_ny(2026, 10, 16, 9, 31)))
+
+    def test_seconds_ttl_and_no_expiry(self):
+        self.assertFalse(is_expired(100.0, 60, now=150.0))
+        self.assertTrue(is_expired(100.0, 60, now=161.0))
+        self.assertFalse(is_expired(0.0, None, now=1e12))
+
+
+class MarketDataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+
+    def test_round_trip_keeps_dtypes(self):
+        cache = MarketDataCache(self.root)
+        df = pd.DataFrame({"代码": ["A"], "收盘": pd.array([1.5], dtype="float32")})
+        cache.put("src", ["A"], "2026-10-16", df)
+        got = cache.get("src", ["A"], "2026-10-16", ttl=60)
+        pd.testing.assert_frame_equal(got, df)
+        self.assertIsNone(cache.get("src", ["A"], "2026-10-17", ttl=60))
+
+    def test_ttl_expiry(self):
+        cache = MarketDataCache(self.root)
+        cache.put("src", [], "d", pd.DataFrame({"x": [1]}))
+        self.assertIsNotNone(cache.get("src", [], "d", ttl=60))
+        self.assertIsNone(cache.get("src", [], "d", ttl=-1))
+
+    def test_lru_eviction_keeps_recently_used(self):
+        df = pd.DataFrame({"x": range(1000)})
+        cache = MarketDataCache(self.root)
+        cache.put("a", [], "d", df)
+        pkl = next(name for name in os.listdir(self.root) if name.endswith(".pkl"))
+        size = os.path.getsize(os.path.join(self.root, pkl))
+        cache.max_bytes = int(size * 2.5)
+        cache.put("b", [], "d", df)
+        time.sleep(0.01)
+        cache.get("a", [], "d", ttl=None)  # a 比 b 更近被访问
+        cache.put("c", [], "d", df)
+        self.assertIsNotNone(cache.get("a", [], "d", ttl=None))
+        self.assertIsNone(cache.get("b", [], "d", ttl=None))
+        self.assertIsNotNone(cache.get("c", [], "d", ttl=None))
+
+    def test_latest_ignores_date_and_ttl(self):
+        cache = MarketDataCache(self.root)
+        cache.put("src", [], "2026-10-15", pd.DataFrame({"x": [1]}))
+        cache.put("src", [], "2026-10-16", pd.DataFrame({"x": [2]}))
+        self.assertEqual(cache.latest("src", [])["x"].iloc[0], 2)
+
+
+class SharedCacheTest(unittest.TestCase):
+    """Several cache instances (queue worker processes) sharing one directory."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+
+    def _index(self) -> dict:
+        with open(os.path.join(self.root, "index.json"), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def test_get_in_one_instance_keeps_entries_of_another(self):
+        first, second = MarketDataCache(self.root), MarketDataCache(self.root)
+        first.put("a", [], "d", pd.DataFrame({"x": [1]}))
+        second.put("b", [], "d", pd.DataFrame({"x": [2]}))
+        self.assertIsNotNone(first.get("a", [], "d", ttl=None))
+        self.assertEqual(len(self._index()), 2)
+        self.assertEqual(first.get("b", [], "d", ttl=None)["x"].iloc[0], 2)
+
+    def test_reads_do_not_rewrite_the_index(self):
+        cache = MarketDataCache(self.root)
+        cache.put("a", [], "d", pd.DataFrame({"x": [1]}))
+        before = os.stat(os.path.join(self.root, "index.json")).st_mtime_ns
+        cache.get("a", [], "d", ttl=None)
+        cache.latest("a", [])
+        self.assertEqual(os.stat(os.path.join(self.root, "index.json")).st_mtime_ns, before)
+
+    def test_access_times_are_written_with_the_next_put(self):
+        cache = MarketDataCache(self.root)
+        cache.put("a", [], "d", pd.DataFrame({"x": [1]}))
+        created = next(iter(self._index().values()))["accessed"]
+        time.sleep(0.01)
+        cache.get("a", [], "d", ttl=None)
+        cache.put("b", [], "d", pd.DataFrame({"x": [2]}))
+        accessed = {entry["source"]: entry["accessed"] for entry in self._index().values()}
+        self.assertGreater(accessed["a"], created)
+
+    def test_concurrent_processes_keep_every_entry(self):
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_put_many, args=(self.root, worker, 10)) for worker in range(4)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join(60)
+            self.assertEqual(proc.exitcode, 0)
+        self.assertEqual(len(self._index()), 40)
+        self.assertEqual(len([name for name in os.listdir(self.root) if name.endswith(".pkl")]), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
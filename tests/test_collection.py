@@ -0,0 +1,66 @@
+"""End-to-end collection against the benchmark stub server (recorded source fixtures)."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+from benchmarks.stub_server import StubServer, async_transport, download_bars_from_stub, install
+from src.core import aio, conditional, http
+from src.data import fetcher, quotes
+
+
+class OfflineCollectionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.server = StubServer().__enter__()
+        state = cls._tmp.name
+        # 与 benchmarks.run._isolate_state 相同的隔离，测试结束后恢复
+        cls._patches = [
+            mock.patch.multiple(
+                config, STATE_DIR=state, CACHE_DIR=os.path.join(state, "cache"),
+                HISTORY_DIR=os.path.join(state, "history"), CACHE_ENABLED=False, HISTORY_ENABLED=False,
+                CONDITIONAL_ENABLED=False, QUEUE_PATH=os.path.join(state, "queue", "jobs.sqlite3"),
+            ),
+            mock.patch.object(http, "_session", None),
+            mock.patch.object(conditional, "_memo", None),
+            mock.patch.object(quotes, "download_batch", download_bars_from_stub(cls.server)),
+        ]
+        for patch in cls._patches:
+            patch.start()
+        install(http.get_session(), cls.server)
+        cls.threads = fetcher.run_all_data_collection(use_cache=False, engine="threads")
+
+    @classmethod
+    def tearDownClass(cls):
+        for patch in reversed(cls._patches):
+            patch.stop()
+        cls.server.__exit__(None, None, None)
+        cls._tmp.cleanup()
+
+    def test_every_step_finishes_with_data(self):
+        collection = self.threads.collection
+        self.assertEqual(collection.failed + collection.timed_out, [])
+        steps = [name for name, _, _ in fetcher.build_collection_steps()]
+        self.assertEqual(collection.finished, steps)
+        for name, df in self.threads.items():
+            self.assertFalse(df.empty, name)
+
+    def test_every_report_section_has_data(self):
+        report = fetcher.build_report_markdown(self.threads)
+        self.assertNotIn("（无数据）", report)
+        self.assertEqual(report.count("\n## "), len(fetcher.REPORT_SECTIONS) + len(fetcher.watchlist_groups()))
+
+    @unittest.skipUnless(aio.available(), "httpx not installed")
+    def test_async_engine_collects_the_same_datasets(self):
+        with mock.patch.object(aio.AsyncHTTP, "transport", async_transport(self.server)):
+            registry = fetcher.run_all_data_collection(use_cache=False, engine="async")
+        self.assertEqual(registry.collection.finished, self.threads.collection.finished)
+        for name, df in self.threads.items():
+            self.assertTrue(registry.get(name).equals(df), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.core.conditional import ResponseMemo
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status_code: int = 200, etag: str | None = None):
+        self.content = body
+        self.status_code = status_code
+        self.headers = {"ETag": etag} if etag else {}
+
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, resp):
+        self.calls += 1
+        return resp.content.decode()
+
+
+class ResponseMemoTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+
+    def test_not_modified_returns_previous_result(self):
+        memo, parser = ResponseMemo(self.root), CountingParser()
+        self.assertEqual(memo.parse("u", FakeResponse(b"v1", etag='"1"'), parser), "v1")
+        self.assertEqual(memo.headers("u"), {"If-None-Match": '"1"'})
+        self.assertEqual(memo.parse("u", FakeResponse(b"", status_code=304), parser), "v1")
+        self.assertEqual(parser.calls, 1)
+
+    def test_unchanged_body_is_not_parsed_again(self):
+        memo, parser = ResponseMemo(self.root), CountingParser()
+        memo.parse("u", FakeResponse(b"same"), parser)
+        self.assertEqual(ResponseMemo(self.root).parse("u", FakeResponse(b"same"), parser), "same")
+        self.assertEqual(parser.calls, 1)
+
+    def test_changed_body_is_parsed(self):
+        memo, parser = ResponseMemo(self.root), CountingParser()
+        memo.parse("u", FakeResponse(b"v1"), parser)
+        self.assertEqual(memo.parse("u", FakeResponse(b"v2"), parser), "v2")
+        self.assertEqual(parser.calls, 2)
+
+    def test_instances_sharing_root_keep_each_others_entries(self):
+        first, second = ResponseMemo(self.root), ResponseMemo(self.root)
+        first.parse("a", FakeResponse(b"a", etag='"a"'), CountingParser())
+        second.parse("b", FakeResponse(b"b", etag='"b"'), CountingParser())
+        first.parse("c", FakeResponse(b"c", etag='"c"'), CountingParser())
+        with open(os.path.join(self.root, "index.json"), encoding="utf-8") as fh:
+            self.assertEqual(sorted(json.load(fh)), ["a", "b", "c"])
+        self.assertEqual(first.headers("b"), {"If-None-Match": '"b"'})
+        self.assertFalse([name for name in os.listdir(self.root) if name.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
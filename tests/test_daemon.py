@@ -0,0 +1,68 @@
+import datetime
+import unittest
+from zoneinfo import ZoneInfo
+
+from src.daemon import Cadence
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+
+def _at(day: int, hour: int, minute: int = 0) -> datetime.datetime:
+    # 2026-10-16 是周五
+    return datetime.datetime(2026, 10, day, hour, minute, tzinfo=TZ)
+
+
+class CadenceParseTest(unittest.TestCase):
+    def test_interval_with_window(self):
+        cadence = Cadence.parse("every 5m 09:25-15:05")
+        self.assertEqual(cadence.interval, 300)
+        self.assertEqual(cadence.window, (datetime.time(9, 25), datetime.time(15, 5)))
+
+    def test_interval_units(self):
+        self.assertEqual(Cadence.parse("every 30s").interval, 30)
+        self.assertEqual(Cadence.parse("Every 1.5H").interval, 5400)
+
+    def test_times_of_day_are_sorted(self):
+        expected = (datetime.time(8, 30), datetime.time(15, 5))
+        self.assertEqual(Cadence.parse("at 15:05, 08:30").times, expected)
+        self.assertEqual(Cadence.parse("08:30,15:05").times, expected)
+
+    def test_off(self):
+        for spec in ("", "off", " Never "):
+            self.assertIsNone(Cadence.parse(spec))
+
+    def test_invalid_spec(self):
+        with self.assertRaises(ValueError):
+            Cadence.parse("every 5 minutes")
+
+
+class CadenceNextAfterTest(unittest.TestCase):
+    def test_interval_inside_window(self):
+        cadence = Cadence.parse("every 5m 09:25-15:05")
+        self.assertEqual(cadence.next_after(_at(15, 10, 0)), _at(15, 10, 5))
+
+    def test_interval_before_window_waits_for_open(self):
+        cadence = Cadence.parse("every 5m 09:25-15:05")
+        self.assertEqual(cadence.next_after(_at(15, 7, 0)), _at(15, 9, 25))
+
+    def test_interval_after_window_moves_to_next_day(self):
+        cadence = Cadence.parse("every 5m 09:25-15:05")
+        self.assertEqual(cadence.next_after(_at(15, 15, 3)), _at(16, 9, 25))
+
+    def test_weekdays_only_skips_the_weekend(self):
+        cadence = Cadence.parse("every 5m 09:25-15:05")
+        self.assertEqual(cadence.next_after(_at(16, 15, 3), weekdays_only=True), _at(19, 9, 25))
+        self.assertEqual(cadence.next_after(_at(16, 15, 3)), _at(17, 9, 25))
+
+    def test_interval_without_window_runs_around_the_clock(self):
+        self.assertEqual(Cadence.parse("every 1h").next_after(_at(17, 23, 30)), _at(18, 0, 30))
+
+    def test_times_strictly_after_now(self):
+        cadence = Cadence.parse("at 08:30,15:05")
+        self.assertEqual(cadence.next_after(_at(15, 8, 30)), _at(15, 15, 5))
+        self.assertEqual(cadence.next_after(_at(15, 16, 0)), _at(16, 8, 30))
+        self.assertEqual(cadence.next_after(_at(16, 16, 0), weekdays_only=True), _at(19, 8, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import os
+import unittest
+
+import pandas as pd
+
+from src.core import extract
+
+FIXTURES = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fh:
+        return fh.read()
+
+
+def _table(*cells, style=""):
+    rows = "".join(f"<tr><td>{cell}</td></tr>" for cell in cells)
+    return f'<table style="{style}"><tr><th>h</th></tr>{rows}</table>'
+
+
+@unittest.skipUnless(extract.available(), "lxml not installed")
+class NthTableTest(unittest.TestCase):
+    def assertSameAsReadHtml(self, html, index, chunk_size=extract.CHUNK_SIZE):
+        expected = pd.read_html(io.StringIO(html))[index]
+        pd.testing.assert_frame_equal(extract.nth_table(html, index, chunk_size=chunk_size), expected)
+
+    def test_premarket_fixture_matches_read_html(self):
+        html = _fixture("finviz_premarket.html")
+        for chunk_size in (extract.CHUNK_SIZE, 97):  # 小块：标签跨越块边界
+            self.assertSameAsReadHtml(html, 2, chunk_size=chunk_size)
+
+    def test_counts_tables_like_read_html(self):
+        # 空表格和 display:none 的表格不计数
+        html = ("<html><body><table><tr><td> </td></tr></table>"
+                + _table("hidden", style="display: none") + _table("a") + _table("b") + "</body></html>")
+        for index in (0, 1):
+            self.assertSameAsReadHtml(html, index)
+
+    def test_nested_tables_are_counted_in_document_order(self):
+        html = f"<table><tr><td>outer</td><td>{_table('inner')}</td></tr></table>{_table('last')}"
+        for index in range(len(pd.read_html(io.StringIO(html)))):
+            self.assertSameAsReadHtml(html, index)
+
+    def test_missing_table_raises_index_error(self):
+        with self.assertRaises(IndexError):
+            extract.nth_table(_table("a"), 1)
+
+
+@unittest.skipUnless(extract.available(), "lxml not installed")
+class ElementTextTest(unittest.TestCase):
+    def test_rate_fixture_matches_beautifulsoup(self):
+        from bs4 import BeautifulSoup
+
+        from src.data.fetcher import RATES_SPAN_CLASS
+
+        html = _fixture("tradingeconomics_rate.html")
+        expected = BeautifulSoup(html, "html.parser").find("span", {"class": RATES_SPAN_CLASS}).text.strip()
+        self.assertEqual(extract.element_text(html, "span", RATES_SPAN_CLASS), expected)
+        self.assertEqual(extract.element_text(html, "span", RATES_SPAN_CLASS, chunk_size=61), expected)
+
+    def test_single_class_matches_one_of_several(self):
+        html = '<span class="x">no</span><span class="a rate b"> 4.25 <b>%</b></span>'
+        self.assertEqual(extract.element_text(html, "span", "rate"), "4.25 %")
+
+    def test_multi_class_needs_the_exact_attribute(self):
+        html = '<span class="b a">no</span><span class="a b">yes</span>'
+        self.assertEqual(extract.element_text(html, "span", "a b"), "yes")
+
+    def test_missing_element(self):
+        self.assertIsNone(extract.element_text("<div><span>1</span></div>", "span", "rate"))
+
+
+if __name__ == "__main__":
+    unittest.main()
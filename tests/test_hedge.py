@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.core.hedge import HostHealth, hedged_get
+
+A, B = "https://a.example/api", "https://b.example/api"
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeSession:
+    """Answer each host after its delay; hosts listed in ``failing`` raise."""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = failing
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls.append(url)
+        time.sleep(self.delays.get(url, 0))
+        if url in self.failing:
+            raise OSError("down")
+        return FakeResponse(url)
+
+
+class HostHealthTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "state", "host_health.json")
+
+    def test_failures_move_a_host_back(self):
+        health = HostHealth()
+        self.assertEqual(health.order([A, B]), [A, B])
+        health.record_failure(A)
+        health.record_success(B, 0.2)
+        self.assertEqual(health.order([A, B]), [B, A])
+
+    def test_save_merges_hosts_of_other_processes(self):
+        first, second = HostHealth(self.path), HostHealth(self.path)
+        first.record_success(A, 0.1)
+        second.record_success(B, 0.3)
+        first.save()
+        second.save()
+        with open(self.path, encoding="utf-8") as fh:
+            saved = json.load(fh)
+        self.assertEqual(sorted(saved), ["https://a.example", "https://b.example"])
+        self.assertFalse([name for name in os.listdir(os.path.dirname(self.path)) if name.endswith(".tmp")])
+
+    def test_save_keeps_the_more_recent_stats_of_a_host(self):
+        stale, fresh = HostHealth(self.path), HostHealth(self.path)
+        stale.record_success(A, 5.0)
+        fresh.record_failure(A)
+        fresh.save()
+        stale.save()
+        self.assertEqual(HostHealth(self.path).order([A, B]), [B, A])
+
+
+class HedgedGetTest(unittest.TestCase):
+    def test_hedge_wins_when_first_mirror_is_slow(self):
+        session = FakeSession({A: 1.0, B: 0.0})
+        payload, url = hedged_get([A, B], lambda resp: resp.text, session, hedge_delay=0.05)
+        self.assertEqual((payload, url), (B, B))
+
+    def test_failure_starts_next_mirror_immediately(self):
+        session = FakeSession({}, failing={A})
+        health = HostHealth()
+        start = time.monotonic()
+        payload, url = hedged_get([A, B], lambda resp: resp.text, session, hedge_delay=5, health=health)
+        self.assertEqual(url, B)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(health.order([A, B]), [B, A])
+
+    def test_all_mirrors_failing(self):
+        session = FakeSession({}, failing={A, B})
+        self.assertEqual(hedged_get([A, B], lambda resp: resp.text, session, hedge_delay=0.01), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.data.history import HistoryStore, bars_to_panel
+
+
+def _frame(dates, closes):
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name="Date")
+    closes = np.asarray(closes, dtype="f8")
+    return pd.DataFrame({"Open": closes, "High": closes + 1, "Low": closes - 1, "Close": closes,
+                         "Volume": np.full(len(closes), 100.0)}, index=index)
+
+
+class FakeDownloader:
+    """Serve bars from a mutable {code: frame} map and record every call."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def __call__(self, codes, period=None, start=None):
+        self.calls.append((tuple(codes), period, start))
+        out = {}
+        for code in codes:
+            df = self.frames.get(code)
+            if df is not None:
+                out[code] = df[df.index >= pd.Timestamp(start)] if start else df
+        return out
+
+
+class HistoryStoreUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_first_update_downloads_initial_period(self):
+        fake = FakeDownloader({"AAA": _frame(["2026-10-14", "2026-10-15"], [10, 11])})
+        store = HistoryStore(self._tmp.name, initial_period="3y", downloader=fake)
+        self.assertEqual(store.update(["AAA"]), {"AAA": 2})
+        self.assertEqual(fake.calls, [(("AAA",), "3y", None)])
+
+    def test_second_update_replaces_partial_bar_of_today(self):
+        today = pd.Timestamp.today().normalize()
+        days = [today - pd.Timedelta(days=1), today]
+        fake = FakeDownloader({"AAA": _frame(days, [10.0, 10.5])})  # 11:00 的盘中K线
+        store = HistoryStore(self._tmp.name, downloader=fake)
+        store.update(["AAA"])
+        fake.frames["AAA"] = _frame(days, [10.0, 12.0])  # 收盘后的完整K线
+        store.update(["AAA"])
+        self.assertEqual(fake.calls[-1][2], str(np.datetime64(today.date(), "D")))
+        closes = store.closes(["AAA"])["AAA"]
+        self.assertEqual(len(closes), 2)
+        self.assertEqual(closes.iloc[-1], 12.0)
+
+    def test_update_appends_new_bars_without_duplicates(self):
+        fake = FakeDownloader({"AAA": _frame(["2026-10-13", "2026-10-14"], [1, 2])})
+        store = HistoryStore(self._tmp.name, downloader=fake)
+        store.update(["AAA"])
+        fake.frames["AAA"] = _frame(["2026-10-13", "2026-10-14", "2026-10-15"], [1, 2.5, 3])
+        self.assertEqual(store.update(["AAA"]), {"AAA": 1})
+        np.testing.assert_array_equal(store.closes(["AAA"])["AAA"].to_numpy(), [1, 2.5, 3])
+
+
+class BarsToPanelTest(unittest.TestCase):
+    def test_aligns_calendars_with_nan_holes(self):
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        fake = FakeDownloader({
+            "AAA": _frame(["2026-10-13", "2026-10-14"], [1, 2]),
+            "BBB": _frame(["2026-10-14", "2026-10-15"], [5, 6]),
+        })
+        store = HistoryStore(store_dir.name, downloader=fake)
+        store.update(["AAA", "BBB"])
+        close = bars_to_panel({code: store.load(code) for code in ("AAA", "BBB")})["close"]
+        self.assertEqual(list(close.columns), ["AAA", "BBB"])
+        self.assertEqual(len(close), 3)
+        self.assertTrue(np.isnan(close["AAA"].iloc[-1]))
+        self.assertTrue(np.isnan(close["BBB"].iloc[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
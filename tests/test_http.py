@@ -0,0 +1,123 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from src.core import http
+from src.core.http import RetryableError, build_session, call_with_retries, request_not_sent
+
+
+def _flaky(*errors):
+    """Raise ``errors`` one per call, then return "ok"; ``calls`` counts the attempts."""
+    pending = list(errors)
+
+    def func():
+        func.calls += 1
+        if pending:
+            raise pending.pop(0)
+        return "ok"
+
+    func.calls = 0
+    return func
+
+
+def _refused() -> requests.ConnectionError:
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return requests.ConnectionError(MaxRetryError(None, "/sendMessage", reason))
+
+
+class RequestNotSentTest(unittest.TestCase):
+    def test_connect_failures_were_not_sent(self):
+        self.assertTrue(request_not_sent(requests.ConnectTimeout()))
+        self.assertTrue(request_not_sent(_refused()))
+
+    def test_read_failures_may_have_been_sent(self):
+        self.assertFalse(request_not_sent(requests.ReadTimeout()))
+        self.assertFalse(request_not_sent(requests.ConnectionError(ProtocolError("Connection aborted."))))
+
+
+class CallWithRetriesTest(unittest.TestCase):
+    def test_idempotent_call_retries_read_timeouts(self):
+        func = _flaky(requests.ReadTimeout(), requests.ReadTimeout())
+        self.assertEqual(call_with_retries(func, retries=3, backoff=0), "ok")
+        self.assertEqual(func.calls, 3)
+
+    def test_non_idempotent_call_never_resends_after_read_timeout(self):
+        func = _flaky(requests.ReadTimeout())
+        with self.assertRaises(requests.ReadTimeout):
+            call_with_retries(func, retries=3, backoff=0, idempotent=False)
+        self.assertEqual(func.calls, 1)
+
+    def test_non_idempotent_call_retries_connect_failures_and_retryable_status(self):
+        func = _flaky(requests.ConnectTimeout(), _refused(), RetryableError("HTTP 429", retry_after=0))
+        self.assertEqual(call_with_retries(func, retries=3, backoff=0, idempotent=False), "ok")
+        self.assertEqual(func.calls, 4)
+
+    def test_last_error_is_raised_when_retries_run_out(self):
+        func = _flaky(*[RetryableError("HTTP 503")] * 3)
+        with self.assertRaises(RetryableError):
+            call_with_retries(func, retries=2, backoff=0)
+        self.assertEqual(func.calls, 3)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.peers.append(self.client_address)
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.peers, self.server.statuses = [], []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/x"
+
+    def test_connections_are_kept_alive(self):
+        with build_session() as session:
+            for _ in range(3):
+                session.get(self.url, timeout=5)
+        self.assertEqual(len(self.server.peers), 3)
+        self.assertEqual(len(set(self.server.peers)), 1)
+
+    def test_server_errors_are_retried(self):
+        self.server.statuses = [503, 502]
+        with build_session(retries=3, backoff_factor=0) as session:
+            resp = session.get(self.url, timeout=5)
+        self.assertEqual((resp.status_code, len(self.server.peers)), (200, 3))
+
+    def test_last_answer_is_returned_when_retries_run_out(self):
+        self.server.statuses = [503] * 5
+        with build_session(retries=1, backoff_factor=0) as session:
+            resp = session.get(self.url, timeout=5)
+        self.assertEqual((resp.status_code, len(self.server.peers)), (503, 2))
+
+    def test_shared_session_is_created_once(self):
+        with mock.patch.object(http, "_session", None):
+            sessions = []
+            threads = [threading.Thread(target=lambda: sessions.append(http.get_session())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len({id(session) for session in sessions}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.data import indicators
+from src.data.indicators import atr, indicator_table, macd, pack_valid, rsi, sma, top_correlations
+
+NAN = np.nan
+
+
+def _walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def _wilder_rsi(close: np.ndarray, period: int = 14) -> float:
+    # 逐根递推的参考实现
+    gain = loss = None
+    for delta in np.diff(close):
+        up, down = max(delta, 0.0), max(-delta, 0.0)
+        if gain is None:
+            gain, loss = up, down
+        else:
+            gain += (up - gain) / period
+            loss += (down - loss) / period
+    return 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+
+def _panel(closes: dict[str, np.ndarray], index: pd.DatetimeIndex) -> dict[str, pd.DataFrame]:
+    close = pd.DataFrame(closes, index=index)
+    return {"close": close, "high": close * 1.01, "low": close * 0.99}
+
+
+class PrimitiveTest(unittest.TestCase):
+    def test_pack_valid_bottom_aligns_each_column(self):
+        values = np.array([[1.0, NAN], [NAN, 5.0], [3.0, NAN], [4.0, 6.0]])
+        (packed,) = pack_valid(values, valid=~np.isnan(values))
+        np.testing.assert_array_equal(packed, [[NAN, NAN], [1.0, NAN], [3.0, 5.0], [4.0, 6.0]])
+
+    def test_sma_matches_rolling_mean(self):
+        values = np.column_stack([_walk(50, 1), _walk(50, 2)])
+        expected = pd.DataFrame(values).rolling(20).mean().to_numpy()
+        np.testing.assert_allclose(sma(values, 20), expected, equal_nan=True)
+
+    def test_sma_waits_for_a_full_window_after_padding(self):
+        values = np.array([NAN, NAN, 1.0, 2.0, 3.0])[:, None]
+        np.testing.assert_array_equal(sma(values, 3)[:, 0], [NAN, NAN, NAN, NAN, 2.0])
+
+    def test_rsi_matches_wilder_recursion(self):
+        close = _walk(120, 3)
+        self.assertAlmostEqual(rsi(close[:, None])[-1, 0], _wilder_rsi(close), places=8)
+
+    def test_rsi_bounds(self):
+        rising = np.arange(1.0, 31.0)[:, None]
+        flat = np.full((30, 1), 5.0)
+        self.assertEqual(rsi(rising)[-1, 0], 100.0)
+        self.assertEqual(rsi(flat)[-1, 0], 50.0)
+
+    def test_macd_matches_pandas_ewm(self):
+        close = _walk(200, 4)
+        series = pd.Series(close)
+        line = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+        signal = line.ewm(span=9, adjust=False).mean()
+        got_line, got_signal, got_hist = (a[:, 0] for a in macd(close[:, None]))
+        np.testing.assert_allclose(got_line, line)
+        np.testing.assert_allclose(got_signal, signal)
+        np.testing.assert_allclose(got_hist, line - signal)
+
+    def test_atr_of_constant_range(self):
+        close = np.full((40, 1), 10.0)
+        np.testing.assert_allclose(atr(close + 1, close - 1, close)[-1], [2.0])
+
+
+class IndicatorTableTest(unittest.TestCase):
+    def test_calendar_holes_match_per_ticker_computation(self):
+        index = pd.bdate_range("2024-01-01", periods=300)
+        a, b = _walk(300, 5), _walk(300, 6)
+        b[::7] = NAN  # 另一个交易所的休市日
+        table = indicator_table(_panel({"AAA": a, "BBB": b}, index), {"AAA": "甲"})
+        row = table.set_index("代码").loc["BBB"]
+        compact = b[~np.isnan(b)]
+        self.assertAlmostEqual(row["收盘"], round(compact[-1], 2))
+        self.assertAlmostEqual(row["MA20"], round(compact[-20:].mean(), 2))
+        self.assertAlmostEqual(row["RSI14"], round(_wilder_rsi(compact), 2), places=6)
+        self.assertEqual(table.set_index("代码").loc["AAA", "名称"], "甲")
+
+    def test_sorted_by_rsi_and_drops_empty_tickers(self):
+        index = pd.bdate_range("2024-01-01", periods=60)
+        up, down = np.linspace(10, 20, 60), np.linspace(20, 10, 60)
+        table = indicator_table(_panel({"DOWN": down, "UP": up, "NONE": np.full(60, NAN)}, index), {})
+        self.assertEqual(table["代码"].tolist(), ["UP", "DOWN"])
+        self.assertTrue(np.isnan(table["MA200"]).all())
+
+    def test_lookback_does_not_change_latest_values(self):
+        index = pd.bdate_range("2022-01-01", periods=700)
+        panel = _panel({"AAA": _walk(700, 7), "BBB": _walk(700, 8)}, index)
+        with mock.patch.object(indicators, "LOOKBACK", 10_000):
+            full = indicator_table(panel, {})
+        pd.testing.assert_frame_equal(indicator_table(panel, {}), full)
+
+
+class TopCorrelationsTest(unittest.TestCase):
+    def test_strongest_pairs_first(self):
+        index = pd.bdate_range("2026-01-01", periods=80)
+        base = _walk(80, 9)
+        noise = _walk(80, 10)
+        closes = {"A": base, "B": base * 2, "C": 1000 / base, "D": noise}
+        out = top_correlations({"close": pd.DataFrame(closes, index=index)}, {"A": "甲"}, limit=2)
+        self.assertEqual(out["资产A"].tolist(), ["甲（A）", "甲（A）"])
+        self.assertEqual(out["资产B"].tolist(), ["B（B）", "C（C）"])
+        self.assertEqual(out["相关系数"].iloc[0], 1.0)
+        self.assertLess(out["相关系数"].iloc[1], -0.99)
+
+    def test_needs_two_tickers(self):
+        index = pd.bdate_range("2026-01-01", periods=10)
+        out = top_correlations({"close": pd.DataFrame({"A": _walk(10, 1)}, index=index)}, {})
+        self.assertTrue(out.empty)
+        self.assertEqual(list(out.columns), ["资产A", "资产B", "相关系数"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.core.jobqueue import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def _drain(path: str, worker: str, claimed) -> None:
+    queue = JobQueue(path)
+    while (job := queue.claim(worker)) is not None:
+        claimed.put(job.id)
+        queue.finish(job)
+
+
+class JobQueueTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "jobs.sqlite3")
+
+    def _queue(self, **kwargs) -> JobQueue:
+        queue = JobQueue(self.path, **kwargs)
+        queue.submit("run", [(name, "step", {"n": i}) for i, name in enumerate("abc")])
+        return queue
+
+    def test_claims_oldest_first_and_each_job_once(self):
+        queue = self._queue()
+        claimed = [queue.claim("w1"), queue.claim("w2"), queue.claim("w1")]
+        self.assertEqual([job.name for job in claimed], ["a", "b", "c"])
+        self.assertEqual(claimed[1].payload, {"n": 1})
+        self.assertEqual((claimed[1].status, claimed[1].worker, claimed[1].attempts), (RUNNING, "w2", 1))
+        self.assertIsNone(queue.claim("w3"))
+
+    def test_claim_scoped_to_a_run(self):
+        queue = self._queue()
+        queue.submit("other", [("x", "step", {})])
+        self.assertEqual(queue.claim("w1", run_id="other").name, "x")
+        self.assertIsNone(queue.claim("w1", run_id="other"))
+
+    def test_expired_lease_is_claimed_again(self):
+        queue = self._queue(lease=0.05)
+        job = queue.claim("dead")
+        time.sleep(0.1)
+        again = queue.claim("alive")
+        self.assertEqual((again.id, again.worker, again.attempts), (job.id, "alive", 2))
+        # 原工作进程迟到的结果被丢弃
+        self.assertFalse(queue.finish(job, "late.pkl"))
+        self.assertFalse(queue.renew(job))
+        self.assertTrue(queue.finish(again, "ok.pkl"))
+        self.assertEqual(queue.jobs("run")[0].result, "ok.pkl")
+
+    def test_renew_keeps_the_lease(self):
+        queue = self._queue(lease=0.2)
+        job = queue.claim("w1")
+        for _ in range(3):
+            time.sleep(0.1)
+            self.assertTrue(queue.renew(job))
+        self.assertEqual(queue.claim("w2").name, "b")
+
+    def test_lease_expiry_after_last_attempt_fails_the_job(self):
+        queue = self._queue(lease=0.05, max_attempts=1)
+        job = queue.claim("dead")
+        time.sleep(0.1)
+        self.assertEqual(queue.claim("w2").name, "b")
+        expired = queue.jobs("run")[0]
+        self.assertEqual((expired.id, expired.status, expired.error), (job.id, FAILED, "lease expired"))
+
+    def test_fail_requeues_until_attempts_are_used_up(self):
+        queue = self._queue(max_attempts=2)
+        job = queue.claim("w1", run_id="run")
+        self.assertTrue(queue.fail(job, "boom"))
+        self.assertEqual(queue.jobs("run")[0].status, QUEUED)
+        job = queue.claim("w1")
+        self.assertEqual((job.name, job.attempts), ("a", 2))
+        queue.fail(job, "boom again")
+        self.assertEqual((queue.jobs("run")[0].status, queue.jobs("run")[0].error), (FAILED, "boom again"))
+
+    def test_fail_without_retry(self):
+        queue = self._queue(max_attempts=3)
+        queue.fail(queue.claim("w1"), "timeout", retry=False)
+        self.assertEqual(queue.jobs("run")[0].status, FAILED)
+
+    def test_cancel_stops_queued_and_running_jobs(self):
+        queue = self._queue()
+        running = queue.claim("w1")
+        queue.finish(queue.claim("w1"))
+        self.assertEqual(queue.cancel("run"), 2)
+        self.assertEqual([job.status for job in queue.jobs("run")], [CANCELLED, DONE, CANCELLED])
+        self.assertEqual(queue.unfinished("run"), 0)
+        self.assertFalse(queue.finish(running))
+
+    def test_delete_removes_a_run(self):
+        queue = self._queue()
+        queue.delete("run")
+        self.assertEqual(queue.jobs("run"), [])
+
+    def test_processes_claim_every_job_exactly_once(self):
+        queue = JobQueue(self.path)
+        ids = queue.submit("run", [(f"job{i}", "step", {}) for i in range(100)])
+        ctx = multiprocessing.get_context("spawn")
+        claimed = ctx.Queue()
+        procs = [ctx.Process(target=_drain, args=(self.path, f"w{i}", claimed)) for i in range(4)]
+        for proc in procs:
+            proc.start()
+        got = [claimed.get(timeout=60) for _ in ids]
+        for proc in procs:
+            proc.join(60)
+        self.assertEqual(sorted(got), ids)
+        self.assertEqual({job.status for job in queue.jobs("run")}, {DONE})
+
+    def test_metrics_round_trip(self):
+        queue = JobQueue(self.path)
+        queue.submit("run", [("a", "step", {})])
+        job = queue.claim("w1")
+        self.assertTrue(queue.finish(job, "1.pkl", metrics={"spans": [{"name": "a", "wall": 1.5}]}))
+        (done,) = queue.jobs("run")
+        self.assertEqual((done.status, done.result), (DONE, "1.pkl"))
+        self.assertEqual(done.metrics, {"spans": [{"name": "a", "wall": 1.5}]})
+
+    def test_adds_metrics_column_to_an_old_queue_file(self):
+        db = sqlite3.connect(self.path)
+        db.executescript(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, name TEXT NOT NULL, "
+            "kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'queued', "
+            "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_until REAL, started REAL, finished REAL, "
+            "result TEXT, error TEXT);"
+            "INSERT INTO jobs (run_id, name, kind, payload) VALUES ('old', 'a', 'step', '{}');"
+        )
+        db.close()
+        queue = JobQueue(self.path)
+        JobQueue(self.path)  # 第二次打开不应重复加列
+        self.assertEqual(queue.jobs("old")[0].metrics, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
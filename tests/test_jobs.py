@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from src.core import metrics
+from src.core.jobqueue import DONE, QUEUED, JobQueue
+from src.core.scheduler import FAILED
+from src.data import jobs
+
+
+def _fake_step(job, store, cache):
+    with metrics.step(job.name) as span:
+        span.rows = 3
+        return pd.DataFrame({"x": [1, 2, 3]})
+
+
+def _broken_step(job, store, cache):
+    with metrics.step(job.name):
+        raise RuntimeError("源站返回空页面")
+
+
+@mock.patch.object(jobs.fetcher, "open_stores", lambda use_cache=None: (None, None))
+class ExecuteTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.queue = JobQueue(os.path.join(self._tmp.name, "jobs.sqlite3"))
+        self.addCleanup(setattr, metrics, "_active", metrics.active())
+
+    def _run(self, step):
+        self.queue.submit("run", [("微博热搜榜", jobs.STEP, {"use_cache": False})])
+        with mock.patch.object(jobs, "_run_step", step):
+            jobs._execute(self.queue, self.queue.claim("w1"))
+        return self.queue.jobs("run")[0]
+
+    def test_finished_job_carries_its_step_metrics(self):
+        job = self._run(_fake_step)
+        self.assertEqual(job.status, DONE)
+        (span,) = job.metrics["spans"]
+        self.assertEqual((span["name"], span["status"], span["rows"]), ("微博热搜榜", "ok", 3))
+        self.assertEqual(jobs._outcome(self.queue, job).result["x"].tolist(), [1, 2, 3])
+
+    def test_unreadable_result_fails_only_its_step(self):
+        job = self._run(_fake_step)
+        path = os.path.join(jobs._results_dir(self.queue, job.run_id), job.result)
+        with open(path, "r+b") as fh:
+            fh.truncate(5)
+        outcome = jobs._outcome(self.queue, job)
+        self.assertEqual((outcome.status, outcome.result), (FAILED, None))
+        os.remove(path)
+        self.assertEqual(jobs._outcome(self.queue, job).status, FAILED)
+
+    def test_failed_job_carries_the_error(self):
+        job = self._run(_broken_step)
+        self.assertEqual(job.status, QUEUED)  # 还有重试次数
+        (span,) = job.metrics["spans"]
+        self.assertEqual(span["status"], "failed")
+        self.assertIn("空页面", span["error"])
+
+    def test_coordinator_records_worker_metrics(self):
+        job = self._run(_fake_step)
+        recorder = metrics.start_run()
+        jobs._record_job_metrics([job])
+        self.assertEqual(recorder.record.steps["微博热搜榜"].rows, 3)
+
+
+class GatherTest(unittest.TestCase):
+    def _part(self, code, closes):
+        frame = pd.DataFrame({code: closes}, index=pd.to_datetime(["2026-10-14", "2026-10-15"]))
+        return {"closes": frame, "close": frame, "indicators": pd.DataFrame({"代码": [code], "RSI14": [closes[-1]]})}
+
+    def test_shards_are_combined(self):
+        gathered = jobs.GatheredQuotes([self._part("A", [1, 2]), self._part("B", [3, 4])], complete=True)
+        self.assertEqual(list(gathered.closes().columns), ["A", "B"])
+        self.assertEqual(list(gathered.panel()["close"].columns), ["A", "B"])
+
+    def test_missing_shard_falls_back_to_group_downloads(self):
+        gathered = jobs.GatheredQuotes([self._part("A", [1, 2])], complete=False)
+        self.assertIsNone(gathered.closes())
+        self.assertEqual(list(gathered.panel()["close"].columns), ["A"])
+
+    def test_indicator_tables_are_resorted_by_rsi(self):
+        parts = [self._part("A", [1, 20]), self._part("B", [1, 70]), {"indicators": None}]
+        table = jobs.combine_indicators([part["indicators"] for part in parts])
+        self.assertEqual(table["代码"].tolist(), ["B", "A"])
+        self.assertIsNone(jobs.combine_indicators([None]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import config
+from src.core import conditional
+from src.core.conditional import ResponseMemo
+from src.data import fetcher, keywords
+from src.data.keywords import KeywordAutomaton, load_keywords
+
+
+class KeywordAutomatonTest(unittest.TestCase):
+    def test_overlapping_keywords_are_all_found(self):
+        automaton = KeywordAutomaton(["宁德", "宁德时代", "时代", "代"])
+        self.assertEqual(automaton.matches("看好宁德时代"), ["宁德", "宁德时代", "时代", "代"])
+
+    def test_matches_follow_first_occurrence(self):
+        automaton = KeywordAutomaton(["茅台", "比亚迪"])
+        self.assertEqual(automaton.matches("比亚迪和茅台，茅台"), ["比亚迪", "茅台"])
+        self.assertEqual(automaton.matches("没有关键词"), [])
+
+    def test_failure_links_recover_partial_matches(self):
+        automaton = KeywordAutomaton(["abcd", "bce", "c"])
+        self.assertEqual(sorted(automaton.matches("abce")), ["bce", "c"])
+
+    def test_case_sensitive_and_duplicates_ignored(self):
+        automaton = KeywordAutomaton(["AI", "AI", "", "ai"])
+        self.assertEqual(len(automaton), 2)
+        self.assertEqual(automaton.matches("AI 芯片"), ["AI"])
+
+    def test_count_documents_counts_once_per_text(self):
+        automaton = KeywordAutomaton(["茅台", "白酒"])
+        counts = automaton.count_documents(["茅台茅台", "白酒与茅台", "无关"])
+        self.assertEqual(counts, Counter({"茅台": 2, "白酒": 1}))
+
+    def test_agrees_with_substring_search(self):
+        rng = random.Random(0)
+        alphabet = "甲乙丙丁戊"
+        words = ["".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(40)]
+        texts = ["".join(rng.choices(alphabet, k=30)) for _ in range(50)]
+        automaton = KeywordAutomaton(words)
+        expected = Counter(word for text in texts for word in automaton.keywords if word in text)
+        self.assertEqual(automaton.count_documents(texts), expected)
+
+
+class LoadKeywordsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "words.txt")
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write("# 注释\n茅台\n\n  比亚迪  \n")
+
+    def test_skips_comments_blank_lines_and_missing_files(self):
+        missing = os.path.join(self._tmp.name, "missing.txt")
+        self.assertEqual(load_keywords([self.path, missing]), ["茅台", "比亚迪"])
+
+    def test_automaton_is_rebuilt_when_a_file_changes(self):
+        with mock.patch.object(config, "KEYWORD_FILES", [self.path]), \
+                mock.patch.multiple(keywords, _automaton=None, _automaton_stamp=()):
+            first = keywords.get_automaton()
+            self.assertIs(keywords.get_automaton(), first)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write("宁德时代\n")
+            os.utime(self.path, (0, os.path.getmtime(self.path) + 10))
+            self.assertIn("宁德时代", keywords.get_automaton().keywords)
+
+
+class FakeXueqiu:
+    """Serve three pages of hot posts whose cursors differ on every run, like the real API."""
+
+    def __init__(self, run: int):
+        self.run = run
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        if url == fetcher.XUEQIU_URL:
+            return mock.Mock(status_code=200, content=b"", headers={})
+        page = 0 if params["max_id"] == "-1" else int(params["max_id"].split("-")[1])
+        next_max_id = f"{self.run}-{page + 1}" if page < 2 else -1
+        body = {"items": [{"id": f"{self.run}-{page}", "title": "宁德时代", "text": ""}], "next_max_id": next_max_id}
+        content = json.dumps(body).encode()
+        return mock.Mock(status_code=200, content=content, headers={}, json=lambda: body)
+
+
+class XueqiuPagingTest(unittest.TestCase):
+    def test_only_the_first_page_is_memoized(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.object(conditional, "_memo", ResponseMemo(tmp)), \
+                    mock.patch.object(config, "PAGE_RATE", 0):
+                for run in range(3):
+                    self.assertIsNotNone(fetcher.fetch_xueqiu_hot_words(FakeXueqiu(run), pages=5))
+            with open(os.path.join(tmp, "index.json"), encoding="utf-8") as fh:
+                self.assertEqual(list(json.load(fh)), [fetcher.XUEQIU_API_URL])
+            self.assertEqual(len([name for name in os.listdir(tmp) if name.endswith(".pkl")]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from src.data import merge
+from src.data.merge import SOURCE_COLUMN, stream_merge_csvs, stream_merge_to_excel
+
+
+class StreamMergeTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+        with open(os.path.join(self.dir, "a.csv"), "w", encoding="utf-8") as fh:
+            fh.write("代码,收盘\n000001,1.50\n600000,\n")
+        with open(os.path.join(self.dir, "b.csv"), "w", encoding="utf-8") as fh:
+            fh.write("代码,热度\n" + "".join(f"{i:06d},{i}\n" for i in range(5)))
+        open(os.path.join(self.dir, "empty.csv"), "w").close()
+        self.out = os.path.join(self.dir, "merged.csv")
+
+    def _merged(self) -> pd.DataFrame:
+        return pd.read_csv(self.out, dtype=str, keep_default_na=False)
+
+    def test_union_schema_and_verbatim_values(self):
+        self.assertEqual(stream_merge_csvs(self.dir, self.out, chunksize=2), 7)
+        merged = self._merged()
+        self.assertEqual(list(merged.columns), ["代码", "收盘", "热度", SOURCE_COLUMN])
+        self.assertEqual(merged.iloc[0].tolist(), ["000001", "1.50", "", "a"])
+        self.assertEqual(merged.iloc[1].tolist(), ["600000", "", "", "a"])
+        self.assertEqual(merged[SOURCE_COLUMN].tolist(), ["a"] * 2 + ["b"] * 5)
+
+    def test_chunk_size_does_not_change_the_output(self):
+        stream_merge_csvs(self.dir, self.out, chunksize=1)
+        small = self._merged()
+        stream_merge_csvs(self.dir, self.out, chunksize=1000)  # 旧的输出文件不作为输入
+        pd.testing.assert_frame_equal(self._merged(), small)
+
+    def test_excel_sheets_continue_past_the_row_limit(self):
+        from openpyxl import load_workbook
+
+        path = os.path.join(self.dir, "overview.xlsx")
+        with mock.patch.object(merge, "EXCEL_MAX_ROWS", 3):
+            self.assertEqual(stream_merge_to_excel(self.dir, path, chunksize=2), 4)
+        wb = load_workbook(path, read_only=True)
+        self.assertEqual(wb.sheetnames, ["a", "b", "b_2", "b_3"])
+        rows = [list(row) for row in wb["b_3"].iter_rows(values_only=True)]
+        self.assertEqual(rows[0], ["代码", "热度"])
+        self.assertEqual([row[1] for row in rows[1:]], [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
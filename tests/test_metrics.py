@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core import aio, metrics
+from src.core.metrics import OTHER, RunRecorder, SpanMetrics, bind_context
+from src.core.scheduler import CollectionResult, StepOutcome
+
+
+class FakeResponse:
+    def __init__(self, size: int):
+        self.content = b"x" * size
+        self.raw = None
+
+
+class RunRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, metrics, "_active", metrics.active())
+        self.recorder = metrics.start_run()
+
+    def test_step_records_wall_time_and_rows(self):
+        with metrics.step("行情") as span:
+            span.rows = 5
+        recorded = self.recorder.record.steps["行情"]
+        self.assertEqual((recorded.status, recorded.rows), ("ok", 5))
+        self.assertGreaterEqual(recorded.wall, 0)
+
+    def test_failed_step_keeps_the_error(self):
+        with self.assertRaises(ValueError):
+            with metrics.step("坏步骤"):
+                raise ValueError("boom")
+        span = self.recorder.record.steps["坏步骤"]
+        self.assertEqual((span.status, span.error), ("failed", "boom"))
+
+    def test_responses_are_attributed_to_the_span_of_their_thread(self):
+        barrier = threading.Barrier(2)
+
+        def fetch(name, size):
+            with metrics.step(name):
+                barrier.wait(5)
+                metrics.record_response(FakeResponse(size))
+
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(bind_context(fetch), name, size) for name, size in (("a", 10), ("b", 20))]
+            for future in futures:
+                future.result()
+        metrics.record_response(FakeResponse(7))
+        record = self.recorder.finish()
+        self.assertEqual({name: span.bytes for name, span in record.steps.items()}, {"a": 10, "b": 20, OTHER: 7})
+
+    @unittest.skipUnless(aio.available(), "httpx not installed")
+    def test_httpx_responses_are_counted(self):
+        import httpx
+
+        with metrics.step("async"):
+            metrics.record_response(httpx.Response(200, content=b"abcd"))
+            metrics.record_response(httpx.Response(200, content=b"ef"), retries=2)
+        span = self.recorder.finish().steps["async"]
+        self.assertEqual((span.requests, span.bytes, span.retries), (2, 6, 2))
+
+    def test_timed_out_steps_are_marked(self):
+        result = CollectionResult(outcomes={
+            "ok": StepOutcome("ok", "finished", elapsed=1.0),
+            "slow": StepOutcome("slow", "timed_out", elapsed=45.0),
+        }, elapsed=45.0)
+        self.recorder.attach_collection(result)
+        self.assertEqual(self.recorder.record.collection["timed_out"], ["slow"])
+        self.assertEqual((self.recorder.record.steps["slow"].status, self.recorder.record.steps["slow"].wall),
+                         ("timed_out", 45.0))
+
+    def test_steps_from_other_processes_are_added(self):
+        metrics.record_response(FakeResponse(1))
+        self.recorder.add_steps([SpanMetrics("分片", wall=2.0, requests=3), SpanMetrics(OTHER, requests=2, bytes=5)])
+        record = self.recorder.finish()
+        self.assertEqual(record.steps["分片"].wall, 2.0)
+        self.assertEqual((record.steps[OTHER].requests, record.steps[OTHER].bytes), (3, 6))
+
+    def test_run_record_json(self):
+        with metrics.step("a"):
+            pass
+        with metrics.delivery("telegram"):
+            pass
+        self.recorder.finish()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs", "run.json")
+            self.recorder.write_json(path)
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        self.assertEqual(sorted(data), ["collection", "deliveries", "elapsed", "started_at", "steps"])
+        self.assertIn("telegram", data["deliveries"])
+        self.assertIn("最慢: ", self.recorder.summary())
+
+    def test_without_active_recorder_spans_are_discarded(self):
+        metrics._active = None
+        with metrics.step("x") as span:
+            span.rows = 1
+        self.assertIsNone(metrics.active())
+        self.assertIsInstance(RunRecorder().record.steps, dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
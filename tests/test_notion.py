@@ -0,0 +1,101 @@
+import itertools
+import threading
+import unittest
+from unittest import mock
+
+import config
+from src.execution import notion
+from src.execution.notion import TEXT_LIMIT, _page_batches, build_report_blocks, upload_report_to_notion
+
+
+def _text(block: dict) -> str:
+    return "".join(part["text"]["content"] for part in block[block["type"]]["rich_text"])
+
+
+def _table(rows: int) -> str:
+    return "| 代码 | 收盘 |\n|:--|--:|\n" + "".join(f"| {i} | {i}.0 |\n" for i in range(rows))
+
+
+class BuildReportBlocksTest(unittest.TestCase):
+    def test_headings_tables_and_paragraphs(self):
+        blocks = build_report_blocks("# 报告\n\n## 行情\n| 名称 | 收盘 |\n|:--|--:|\n| 甲 | 1 |\n| 乙 |\n说明文字\n")
+        self.assertEqual([block["type"] for block in blocks], ["heading_1", "heading_2", "table", "paragraph"])
+        self.assertEqual(_text(blocks[1]), "行情")
+        table = blocks[2]["table"]
+        self.assertEqual((table["table_width"], table["has_column_header"]), (2, True))
+        cells = [[cell[0]["text"]["content"] for cell in row["table_row"]["cells"]] for row in table["children"]]
+        self.assertEqual(cells, [["名称", "收盘"], ["甲", "1"], ["乙", ""]])
+        self.assertEqual(_text(blocks[3]), "说明文字")
+
+    def test_long_text_is_split_into_paragraphs(self):
+        blocks = build_report_blocks("x" * (TEXT_LIMIT * 2 + 5))
+        self.assertEqual([len(_text(block)) for block in blocks], [TEXT_LIMIT, TEXT_LIMIT, 5])
+
+
+class PageBatchesTest(unittest.TestCase):
+    def test_batches_respect_block_count(self):
+        blocks = build_report_blocks("\n".join(f"## 小节{i}" for i in range(7)))
+        batches, overflow = _page_batches(blocks, batch_size=3)
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual(overflow, {})
+
+    def test_large_table_keeps_first_rows_and_overflows_the_rest(self):
+        blocks = build_report_blocks("## 表\n" + _table(10))
+        batches, overflow = _page_batches(blocks, batch_size=4)
+        self.assertEqual(len(batches[0][1]["table"]["children"]), 4)
+        self.assertEqual(len(overflow[1]), 7)  # 表头 + 10 行 - 4
+
+    def test_request_block_limit_counts_table_rows(self):
+        with mock.patch.object(notion, "REQUEST_BLOCK_LIMIT", 10):
+            blocks = build_report_blocks(_table(5) + "\n文字\n" + _table(5))
+            batches, _ = _page_batches(blocks, batch_size=100)
+        self.assertEqual([[block["type"] for block in batch] for batch in batches],
+                         [["table", "paragraph"], ["table"]])
+
+
+class FakeNotion:
+    """Records create/append calls and hands out sequential block ids."""
+
+    def __init__(self):
+        self.calls = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._children = {}
+        self.pages = mock.Mock(create=self._create)
+        self.blocks = mock.Mock(children=mock.Mock(append=self._append, list=self._list))
+
+    def _results(self, parent, children):
+        with self._lock:
+            results = [{"id": f"b{next(self._ids)}"} for _ in children]
+            self._children.setdefault(parent, []).extend(results)
+        return results
+
+    def _create(self, parent, properties, children):
+        self.calls.append(("create", len(children)))
+        self._results("page", children)
+        return {"id": "page"}
+
+    def _append(self, block_id, children):
+        with self._lock:
+            self.calls.append((block_id, len(children)))
+        return {"results": self._results(block_id, children)}
+
+    def _list(self, block_id, page_size):
+        return {"results": self._children[block_id][:page_size]}
+
+
+@mock.patch.multiple(config, NOTION_TOKEN="token", NOTION_PAGE_ID="parent", NOTION_BATCH_SIZE=3, NOTION_CONCURRENCY=2)
+class UploadReportTest(unittest.TestCase):
+    def test_blocks_and_overflow_rows_go_to_the_right_parents(self):
+        fake = FakeNotion()
+        report = "## A\n" + _table(5) + "\n".join(f"## 小节{i}" for i in range(4)) + "\n" + _table(4)
+        with mock.patch.object(notion, "get_notion_client", lambda: fake):
+            self.assertEqual(upload_report_to_notion(report, title="测试")["id"], "page")
+        # 首批 3 个块随页面创建，其余按顺序追加到页面
+        self.assertEqual(fake.calls[:3], [("create", 3), ("page", 3), ("page", 1)])
+        # 两个表格各 6/5 行，超出 3 行的部分追加到各自的表格块（b2 与 b7）
+        self.assertEqual(sorted(fake.calls[3:]), [("b2", 3), ("b7", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from src.core.paging import RateLimiter, afetch_remaining_pages, fetch_remaining_pages, page_count
+
+
+class PageCountTest(unittest.TestCase):
+    def test_pages_for_total(self):
+        self.assertEqual(page_count(101, 50), 3)
+        self.assertEqual(page_count(100, 50), 2)
+        self.assertEqual(page_count(0, 50), 1)
+
+    def test_capped_by_max_rows(self):
+        self.assertEqual(page_count(5000, 100, max_rows=250), 3)
+        self.assertEqual(page_count(120, 100, max_rows=0), 2)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_spaces_calls_across_threads(self):
+        limiter = RateLimiter(20)  # 50ms 间隔
+        stamps, lock = [], threading.Lock()
+
+        def call():
+            limiter.wait()
+            with lock:
+                stamps.append(time.monotonic())
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gaps = [b - a for a, b in zip(sorted(stamps), sorted(stamps)[1:])]
+        self.assertGreaterEqual(min(gaps), 0.04)
+
+    def test_no_limit(self):
+        start = time.monotonic()
+        limiter = RateLimiter(0)
+        for _ in range(100):
+            limiter.wait()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+
+class FetchRemainingPagesTest(unittest.TestCase):
+    def test_pages_come_back_in_order(self):
+        def fetch(number):
+            time.sleep(0.01 * (6 - number))  # 后面的页先返回
+            return number
+
+        self.assertEqual(fetch_remaining_pages(fetch, 5, max_workers=4), [2, 3, 4, 5])
+
+    def test_failed_page_is_none(self):
+        def fetch(number):
+            if number == 3:
+                raise ValueError("bad page")
+            return number
+
+        self.assertEqual(fetch_remaining_pages(fetch, 4), [2, None, 4])
+
+    def test_bounded_concurrency(self):
+        active, peak, lock = 0, 0, threading.Lock()
+
+        def fetch(number):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return number
+
+        fetch_remaining_pages(fetch, 12, max_workers=3)
+        self.assertLessEqual(peak, 3)
+
+    def test_single_page(self):
+        self.assertEqual(fetch_remaining_pages(lambda number: number, 1), [])
+
+    def test_async_pages(self):
+        async def fetch(number):
+            await asyncio.sleep(0.01 * (6 - number))
+            if number == 4:
+                raise ValueError("bad page")
+            return number
+
+        self.assertEqual(asyncio.run(afetch_remaining_pages(fetch, 5)), [2, 3, None, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import config
+from src.data import quotes
+from src.data.quotes import QuoteBatch, normalize_quotes
+
+NAN = np.nan
+
+
+def _closes(rows: dict[str, list[float]], dates=("2026-10-13", "2026-10-14", "2026-10-15")) -> pd.DataFrame:
+    return pd.DataFrame(rows, index=pd.DatetimeIndex(pd.to_datetime(list(dates)), name="Date"))
+
+
+class NormalizeQuotesTest(unittest.TestCase):
+    def test_last_two_closes_give_percent_change(self):
+        out = normalize_quotes(_closes({"AAA": [9.0, 10.0, 11.0]}), {"甲": "AAA"})
+        self.assertEqual(out.to_dict("records"), [{"名称": "甲", "代码": "AAA", "收盘": 11.0, "涨跌幅": 10.0}])
+
+    def test_calendar_gaps_use_the_last_valid_closes(self):
+        # BBB 今天休市：用它最后两个有效收盘价；CCC 中间缺一天
+        closes = _closes({"AAA": [1.0, 2.0, 4.0], "BBB": [8.0, 10.0, NAN], "CCC": [5.0, NAN, 6.0]})
+        out = normalize_quotes(closes, {"甲": "AAA", "乙": "BBB", "丙": "CCC"}, with_date=True)
+        self.assertEqual(out["收盘"].tolist(), [4.0, 10.0, 6.0])
+        self.assertEqual(out["涨跌幅"].tolist(), [100.0, 25.0, 20.0])
+        self.assertEqual(out["日期"].tolist(), ["2026-10-15", "2026-10-14", "2026-10-15"])
+
+    def test_single_close_has_no_change(self):
+        out = normalize_quotes(_closes({"AAA": [NAN, NAN, 3.0]}), {"甲": "AAA"})
+        self.assertEqual(out["收盘"].tolist(), [3.0])
+        self.assertTrue(np.isnan(out["涨跌幅"].iloc[0]))
+
+    def test_tickers_without_data_are_dropped(self):
+        closes = _closes({"AAA": [1.0, 1.0, 1.0], "EMPTY": [NAN, NAN, NAN]})
+        out = normalize_quotes(closes, {"无数据": "EMPTY", "甲": "AAA", "未下载": "MISSING"})
+        self.assertEqual(out["代码"].tolist(), ["AAA"])
+        self.assertEqual(out["涨跌幅"].tolist(), [0.0])
+
+    def test_rows_follow_the_group_order_and_round(self):
+        closes = _closes({"AAA": [1.0, 3.0, 3.0], "BBB": [3.0, 3.0, 3.14159]})
+        out = normalize_quotes(closes, {"乙": "BBB", "甲": "AAA"})
+        self.assertEqual(out["名称"].tolist(), ["乙", "甲"])
+        self.assertEqual(out["收盘"].tolist(), [3.14, 3.0])
+        self.assertEqual(out["涨跌幅"].tolist(), [4.72, 0.0])
+
+    def test_zero_previous_close_gives_zero_change(self):
+        out = normalize_quotes(_closes({"AAA": [1.0, 0.0, 2.0]}), {"甲": "AAA"})
+        self.assertEqual(out["涨跌幅"].tolist(), [0.0])
+
+    def test_empty_input_keeps_the_columns(self):
+        out = normalize_quotes(pd.DataFrame(), {"甲": "AAA"}, with_date=True)
+        self.assertTrue(out.empty)
+        self.assertEqual(list(out.columns), ["名称", "代码", "收盘", "涨跌幅", "日期"])
+
+
+def _batch_frame(closes: dict[str, list[float]]) -> pd.DataFrame:
+    """A group_by="ticker" yf.download result: (code, field) columns."""
+    index = pd.DatetimeIndex(pd.to_datetime(["2026-10-14", "2026-10-15"]), name="Date")
+    return pd.concat({code: pd.DataFrame({"Close": values, "Volume": 1.0}, index=index)
+                      for code, values in closes.items()}, axis=1)
+
+
+class DownloadBatchTest(unittest.TestCase):
+    def test_one_call_for_deduplicated_codes(self):
+        data = _batch_frame({"AAA": [1.0, 2.0], "BBB": [NAN, 3.0], "CCC": [NAN, NAN]})
+        with mock.patch("yfinance.download", return_value=data) as download:
+            frames = quotes.download_batch(["AAA", "BBB", "AAA", "CCC", "MISSING"], period="5d")
+        download.assert_called_once()
+        self.assertEqual(download.call_args.args[0], ["AAA", "BBB", "CCC", "MISSING"])
+        self.assertEqual(download.call_args.kwargs["group_by"], "ticker")
+        # 没有收盘价的行被丢弃，全空或缺失的代码不出现
+        self.assertEqual(sorted(frames), ["AAA", "BBB"])
+        self.assertEqual(list(frames["BBB"]["Close"]), [3.0])
+
+    def test_no_codes_no_request(self):
+        with mock.patch("yfinance.download") as download:
+            self.assertEqual(quotes.download_batch([]), {})
+        download.assert_not_called()
+
+    def test_groups_share_codes(self):
+        groups = {"a": {"甲": "AAA", "乙": "BBB"}, "b": {"乙2": "BBB", "丙": "CCC"}}
+        with mock.patch.dict(quotes.QUOTE_GROUPS, groups, clear=True):
+            self.assertEqual(quotes.unique_codes(), ["AAA", "BBB", "CCC"])
+            self.assertEqual(quotes.unique_codes(["b"]), ["BBB", "CCC"])
+            self.assertEqual(quotes.code_names()["BBB"], "乙")
+
+
+class QuoteBatchTest(unittest.TestCase):
+    def test_concurrent_callers_share_one_download(self):
+        calls = []
+        gate = threading.Event()
+
+        def fake_closes(codes):
+            calls.append(list(codes))
+            gate.wait(5)
+            return _closes({"AAA": [1.0, 2.0, 3.0]})
+
+        batch = QuoteBatch(["AAA"])
+        with mock.patch.object(quotes, "download_closes", fake_closes), ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(batch.closes) for _ in range(4)]
+            gate.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(calls, [["AAA"]])
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_failed_download_returns_none_once(self):
+        batch = QuoteBatch(["AAA"])
+        with mock.patch.object(quotes, "download_closes", side_effect=RuntimeError("down")) as download:
+            self.assertIsNone(batch.closes())
+            self.assertIsNone(batch.closes())
+        download.assert_called_once()
+
+
+class DownloadBarsTest(unittest.TestCase):
+    def _fake_batch(self, fail=()):
+        calls = []
+
+        def fake(codes, period=None, start=None):
+            calls.append(list(codes))
+            if set(codes) & set(fail):
+                raise RuntimeError("rate limited")
+            return {code: code for code in codes}
+
+        return fake, calls
+
+    def test_universe_is_split_into_chunks(self):
+        fake, calls = self._fake_batch()
+        codes = [f"C{i}" for i in range(7)]
+        with mock.patch.object(quotes, "download_batch", fake):
+            frames = quotes.download_bars(codes + ["C0"], period="5d", chunk_size=3, max_workers=2)
+        self.assertEqual(sorted(calls), [["C0", "C1", "C2"], ["C3", "C4", "C5"], ["C6"]])
+        self.assertEqual(sorted(frames), codes)
+
+    def test_failed_chunk_is_skipped(self):
+        fake, _ = self._fake_batch(fail=["C4"])
+        with mock.patch.object(quotes, "download_batch", fake):
+            frames = quotes.download_bars([f"C{i}" for i in range(6)], chunk_size=3)
+        self.assertEqual(sorted(frames), ["C0", "C1", "C2"])
+
+    def test_error_is_raised_when_every_chunk_failed(self):
+        fake, _ = self._fake_batch(fail=["C0", "C3"])
+        with mock.patch.object(quotes, "download_batch", fake), self.assertRaises(RuntimeError):
+            quotes.download_bars([f"C{i}" for i in range(6)], chunk_size=3)
+
+
+class WatchlistsTest(unittest.TestCase):
+    def _write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        return path
+
+    def test_later_files_and_local_config_replace_whole_groups(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = self._write(tmp, "base.yaml", "watchlists:\n  指数:\n    上证指数: 000001.SS\n"
+                                                 "  半导体:\n    英伟达: NVDA\n    台积电: TSM\n")
+            extra = self._write(tmp, "extra.yaml", "watchlists:\n  半导体:\n    超微: AMD\n")
+            local = {"watchlists": {"指数": {"深证成指": "399001.SZ"}}}
+            with mock.patch.object(config, "_LOCAL_CFG", local):
+                groups = config._load_watchlists([extra, os.path.join(tmp, "missing.yaml")], builtin=base)
+        self.assertEqual(groups, {"指数": {"深证成指": "399001.SZ"}, "半导体": {"超微": "AMD"}})
+
+    def test_user_files_without_builtin_groups_keep_them(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            user = self._write(tmp, "wl.yaml", "watchlists:\n  半导体:\n    英伟达: NVDA\n")
+            with mock.patch.object(config, "_LOCAL_CFG", {}):
+                groups = config._load_watchlists([user])
+        self.assertEqual(groups["半导体"], {"英伟达": "NVDA"})
+        self.assertLessEqual(set(quotes.BUILTIN_GROUPS), set(groups))
+
+    def test_steps_build_when_builtin_groups_are_missing(self):
+        from src.data import fetcher
+
+        with mock.patch.dict(quotes.QUOTE_GROUPS, {"半导体": {"英伟达": "NVDA"}}, clear=True):
+            names = [name for name, _, _ in fetcher.build_collection_steps()]
+            self.assertEqual(fetcher._quote_group("港股与中概股行情", _closes({"NVDA": [1.0, 2.0, 3.0]})).shape[0], 0)
+        self.assertIn("半导体", names)
+        self.assertIn("港股与中概股行情", names)
+
+    def test_extra_groups_become_watchlist_steps(self):
+        groups = {"指数": {"上证指数": "000001.SS"}, "半导体": {"英伟达": "NVDA"}}
+        with mock.patch.dict(quotes.QUOTE_GROUPS, groups, clear=True):
+            self.assertEqual(quotes.watchlist_groups(), ["半导体"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.data.registry import ResultRegistry
+from src.data.schema import columnar_available, read_dataset
+
+
+class ResultRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.registry = ResultRegistry()
+        self.registry.put("雪球热词", pd.DataFrame({"热词": ["茅台"], "出现次数": [3.0]}))
+        self.registry.put("空数据集", pd.DataFrame())
+        self.registry.put("未采集", None)
+
+    def test_put_applies_the_schema(self):
+        df = self.registry.get("雪球热词")
+        self.assertEqual(df["出现次数"].dtype, "Int64")
+        self.assertIsInstance(df["热词"].dtype, pd.CategoricalDtype)
+
+    def test_none_is_not_stored(self):
+        self.assertNotIn("未采集", self.registry)
+        self.assertIsNone(self.registry.get("未采集"))
+        self.assertEqual(len(self.registry), 2)
+        self.assertEqual([name for name, _ in self.registry.items()], ["雪球热词", "空数据集"])
+
+    def test_write_skips_empty_datasets(self):
+        paths = self.registry.write_csvs(self._tmp.name)
+        self.assertEqual([os.path.basename(path) for path in paths], ["雪球热词.csv"])
+        self.assertEqual(read_dataset(paths[0])["出现次数"].tolist(), [3])
+
+    def test_unknown_format_falls_back_to_csv(self):
+        (path,) = self.registry.write(self._tmp.name, "xlsx")
+        self.assertTrue(path.endswith(".csv"))
+
+    @unittest.skipUnless(columnar_available(), "pyarrow not installed")
+    def test_parquet_output(self):
+        (path,) = self.registry.write(self._tmp.name, "parquet")
+        pd.testing.assert_frame_equal(read_dataset(path), self.registry.get("雪球热词"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from src.core.scheduler import FAILED, FINISHED, TIMED_OUT, arun_steps, run_steps
+
+
+class RunStepsTest(unittest.TestCase):
+    def setUp(self):
+        # 被放弃的步骤线程等这个事件后退出，不拖到后面的测试
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _hang(self):
+        self.release.wait(10)
+        return "late"
+
+    def test_results_keep_step_order(self):
+        result = run_steps([("a", lambda: 1), ("b", lambda: 2), ("c", lambda: 3)], max_workers=3)
+        self.assertEqual(list(result.outcomes), ["a", "b", "c"])
+        self.assertEqual(result.finished, ["a", "b", "c"])
+        self.assertEqual([outcome.result for outcome in result.outcomes.values()], [1, 2, 3])
+
+    def test_steps_run_concurrently(self):
+        start = time.monotonic()
+        run_steps([(str(i), lambda: time.sleep(0.2)) for i in range(4)], max_workers=4)
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    def test_failure_is_isolated(self):
+        def broken():
+            raise ValueError("boom")
+
+        result = run_steps([("ok", lambda: "x"), ("bad", broken)])
+        self.assertEqual(result.outcomes["ok"].status, FINISHED)
+        self.assertEqual((result.outcomes["bad"].status, result.outcomes["bad"].error), (FAILED, "boom"))
+
+    def test_step_timeout_abandons_slow_step(self):
+        start = time.monotonic()
+        result = run_steps([("slow", self._hang), ("fast", lambda: 1)], max_workers=2, step_timeout=0.2)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(result.timed_out, ["slow"])
+        self.assertEqual(result.finished, ["fast"])
+        self.assertGreaterEqual(result.outcomes["slow"].elapsed, 0.2)
+
+    def test_step_timeout_counts_from_step_start(self):
+        # 单线程排队：第二个步骤在第一个完成后才开始计时
+        steps = [("first", lambda: time.sleep(0.15)), ("second", lambda: time.sleep(0.15))]
+        result = run_steps(steps, max_workers=1, step_timeout=0.25)
+        self.assertEqual(result.finished, ["first", "second"])
+
+    def test_deadline_bounds_the_whole_run(self):
+        start = time.monotonic()
+        result = run_steps([("a", self._hang), ("b", self._hang), ("c", lambda: 1)], max_workers=3, deadline=0.2)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(sorted(result.timed_out), ["a", "b"])
+        self.assertEqual(result.outcomes["a"].status, TIMED_OUT)
+        self.assertEqual(result.finished, ["c"])
+
+    def test_steps_not_started_by_the_deadline_time_out(self):
+        result = run_steps([("a", self._hang), ("queued", lambda: 1)], max_workers=1, deadline=0.2)
+        self.assertEqual(result.timed_out, ["a", "queued"])
+        self.assertEqual(result.outcomes["queued"].elapsed, 0)
+
+    def test_args_are_passed_to_every_step(self):
+        result = run_steps([("double", lambda x: x * 2), ("square", lambda x: x * x)], 3)
+        self.assertEqual([outcome.result for outcome in result.outcomes.values()], [6, 9])
+
+
+async def _value(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _broken():
+    raise ValueError("boom")
+
+
+class ArunStepsTest(unittest.TestCase):
+    def _run(self, steps, **kwargs):
+        return asyncio.run(arun_steps(steps, **kwargs))
+
+    def test_results_keep_step_order(self):
+        steps = [("a", lambda: _value(1, 0.05)), ("b", lambda: _value(2)), ("c", lambda: _value(3, 0.02))]
+        result = self._run(steps)
+        self.assertEqual(list(result.outcomes), ["a", "b", "c"])
+        self.assertEqual([outcome.result for outcome in result.outcomes.values()], [1, 2, 3])
+
+    def test_steps_run_concurrently(self):
+        result = self._run([(str(i), lambda: _value(i, 0.2)) for i in range(5)])
+        self.assertEqual(len(result.finished), 5)
+        self.assertLess(result.elapsed, 0.6)
+
+    def test_failure_is_isolated(self):
+        result = self._run([("ok", lambda: _value("x")), ("bad", _broken)])
+        self.assertEqual(result.finished, ["ok"])
+        self.assertEqual((result.outcomes["bad"].status, result.outcomes["bad"].error), (FAILED, "boom"))
+
+    def test_step_timeout_cancels_slow_step(self):
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        result = self._run([("slow", slow), ("fast", lambda: _value(1))], step_timeout=0.1)
+        self.assertLess(result.elapsed, 2)
+        self.assertEqual((result.timed_out, result.finished), (["slow"], ["fast"]))
+        self.assertEqual(cancelled, [True])
+
+    def test_deadline_bounds_the_whole_run(self):
+        steps = [("a", lambda: _value(1, 10)), ("b", lambda: _value(2, 0.01))]
+        result = self._run(steps, deadline=0.1)
+        self.assertLess(result.elapsed, 2)
+        self.assertEqual((result.timed_out, result.finished), (["a"], ["b"]))
+
+    def test_no_steps(self):
+        result = self._run([])
+        self.assertEqual((result.finished, result.timed_out, result.failed), ([], [], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
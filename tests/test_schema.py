@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.data.fetcher import format_pct_columns
+from src.data.schema import apply_schema, columnar_available, read_dataset, write_dataset
+
+FLOWS = "东方财富主力资金流向"
+
+
+def _flows():
+    return pd.DataFrame({"代码": ["600000", "000001"], "名称": ["甲", "乙"], "最新价": ["10.5", "8"],
+                         "涨跌幅": [1.2, None], "主力净流入": [1.5e8, None], "超大单净流入": ["-", "3"]})
+
+
+class ApplySchemaTest(unittest.TestCase):
+    def test_casts_declared_columns(self):
+        df = apply_schema(FLOWS, _flows())
+        self.assertEqual(df["最新价"].dtype, "float32")
+        self.assertIsInstance(df["代码"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["主力净流入"].dtype, "Int64")
+
+    def test_missing_integers_stay_null(self):
+        df = apply_schema(FLOWS, _flows())
+        self.assertEqual(df["主力净流入"].iloc[0], 150_000_000)
+        self.assertTrue(pd.isna(df["主力净流入"].iloc[1]))
+        self.assertTrue(pd.isna(df["超大单净流入"].iloc[0]))
+
+    def test_typed_frame_is_returned_unchanged(self):
+        df = apply_schema(FLOWS, _flows())
+        self.assertIs(apply_schema(FLOWS, df), df)
+
+    def test_undeclared_dataset_is_untouched(self):
+        df = _flows()
+        self.assertIs(apply_schema("未声明的数据集", df), df)
+
+    def test_report_renders_missing_values_as_dash(self):
+        rendered = format_pct_columns(apply_schema(FLOWS, _flows()))
+        self.assertEqual(rendered["主力净流入"].tolist(), [150_000_000, "-"])
+        self.assertEqual(rendered["涨跌幅"].tolist(), ["1.20%", "-"])
+
+    def test_scraped_rate_text_is_a_percent(self):
+        df = apply_schema("全球主要利率", pd.DataFrame([{"美国基准利率": "5.50%"}]))
+        self.assertEqual(df["美国基准利率"].dtype, "float32")
+        self.assertAlmostEqual(float(df["美国基准利率"].iloc[0]), 5.5)
+
+
+class DatasetFileTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.df = apply_schema(FLOWS, _flows())
+
+    def _round_trip(self, fmt):
+        path = write_dataset(self.df, os.path.join(self._tmp.name, FLOWS), fmt)
+        back = read_dataset(path)
+        self.assertEqual(back["主力净流入"].dtype, "Int64")
+        self.assertTrue(pd.isna(back["主力净流入"].iloc[1]))
+        self.assertEqual(back["最新价"].dtype, "float32")
+        return back
+
+    def test_csv_round_trip_keeps_nulls(self):
+        self._round_trip("csv")
+
+    @unittest.skipUnless(columnar_available(), "pyarrow not installed")
+    def test_parquet_and_arrow_round_trip_keep_nulls(self):
+        self._round_trip("parquet")
+        self._round_trip("arrow")
+
+
+if __name__ == "__main__":
+    unittest.main()
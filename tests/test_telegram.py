@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+import requests
+
+import config
+from src.execution.telegram import send_report_to_telegram, split_report
+
+
+def _report(*sections):
+    return "# 报告\n\n" + "".join(f"## {name}\n{body}\n\n" for name, body in sections)
+
+
+class SplitReportTest(unittest.TestCase):
+    def test_short_report_is_one_message(self):
+        report = _report(("A", "a"), ("B", "b"))
+        self.assertEqual(split_report(report), [report.strip("\n")])
+
+    def test_splits_at_section_headers_and_keeps_order(self):
+        report = _report(("A", "a" * 30), ("B", "b" * 30), ("C", "c" * 30))
+        chunks = split_report(report, limit=50)
+        self.assertTrue(all(len(chunk) <= 50 for chunk in chunks))
+        self.assertEqual(chunks, ["# 报告\n\n## A\n" + "a" * 30, "## B\n" + "b" * 30, "## C\n" + "c" * 30])
+
+    def test_long_section_is_split_on_lines(self):
+        lines = [f"line {i:02d}" for i in range(20)]
+        chunks = split_report("## A\n" + "\n".join(lines) + "\n", limit=40)
+        self.assertTrue(all(len(chunk) <= 40 for chunk in chunks))
+        self.assertEqual("\n".join(chunks).split("\n")[1:], lines)
+
+    def test_overlong_line_is_hard_cut(self):
+        chunks = split_report("x" * 95, limit=40)
+        self.assertEqual([len(chunk) for chunk in chunks], [40, 40, 15])
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"ok": True}
+
+
+class FakeSession:
+    """Raise the queued errors on the matching call numbers, otherwise answer 200."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.sent = []
+
+    def post(self, url, timeout=None, data=None, files=None):
+        self.sent.append(data["text"] if data and "text" in data else url.rsplit("/", 1)[-1])
+        error = self.errors.get(len(self.sent))
+        if error is not None:
+            raise error
+        return FakeResponse()
+
+
+@mock.patch.multiple(config, TELEGRAM_BOT_TOKEN="token", TELEGRAM_CHAT_ID="1", TELEGRAM_RATE=0,
+                     TELEGRAM_MAX_MESSAGES=10, DELIVERY_BACKOFF=0)
+class SendReportTest(unittest.TestCase):
+    report = _report(*[(name, name.lower() * 3000) for name in "ABC"])
+
+    def test_read_timeout_does_not_repost_a_section(self):
+        session = FakeSession({2: requests.ReadTimeout()})
+        with self.assertRaises(requests.ReadTimeout):
+            send_report_to_telegram(self.report, session=session)
+        self.assertEqual(len(session.sent), 2)
+        self.assertNotEqual(session.sent[0], session.sent[1])
+
+    def test_connect_timeout_is_retried_in_order(self):
+        session = FakeSession({2: requests.ConnectTimeout()})
+        results = send_report_to_telegram(self.report, session=session)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(session.sent[1], session.sent[2])
+        self.assertEqual(session.sent[2:], split_report(self.report)[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()